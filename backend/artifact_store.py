@@ -0,0 +1,228 @@
+"""
+Content-addressed storage for large artifacts (transcript JSON, SRT files).
+
+With a store configured, transcripts and subtitles rows keep only metadata:
+artifact_key (SHA-256 of the content), artifact_size and the usual ids
+(migrations/005_artifact_store.sql). The content itself is written once per
+distinct hash, so re-upserting an unchanged SRT or the same subtitle for two
+videos stores nothing new. Artifacts are kept gzip-compressed; downloads
+stream the compressed bytes as they are to clients that accept gzip.
+
+Chosen with ARTIFACT_STORE:
+
+  database    (default) no store: the content stays in the text/srt columns
+  filesystem  files under ARTIFACT_PATH (default "artifacts"), sharded by
+              the first two bytes of the hash
+  s3          an S3-compatible bucket (ARTIFACT_S3_BUCKET, optional
+              ARTIFACT_S3_ENDPOINT for MinIO and others, ARTIFACT_S3_PREFIX).
+              Credentials come from the usual AWS_* variables. Optional
+              dependency: pip install boto3. Downloads redirect to presigned
+              URLs valid for ARTIFACT_PRESIGN_SEC (0 streams through the
+              backend instead).
+
+Nothing deletes artifacts: a key no row references any more is garbage,
+cheap to keep and safe to sweep offline.
+"""
+import os
+import gzip
+import hashlib
+import logging
+import tempfile
+import threading
+
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "database")
+ARTIFACT_PATH = os.getenv("ARTIFACT_PATH", "artifacts")
+ARTIFACT_S3_BUCKET = os.getenv("ARTIFACT_S3_BUCKET", "")
+ARTIFACT_S3_ENDPOINT = os.getenv("ARTIFACT_S3_ENDPOINT") or None
+ARTIFACT_S3_PREFIX = os.getenv("ARTIFACT_S3_PREFIX", "artifacts/")
+ARTIFACT_PRESIGN_SEC = int(os.getenv("ARTIFACT_PRESIGN_SEC", "300"))
+BACKENDS = ("database", "filesystem", "s3")
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def content_key(data):
+    """Key of an artifact: the SHA-256 of its uncompressed bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ArtifactNotFound(Exception):
+    pass
+
+
+class ArtifactStore:
+    """Base class: compression and hashing around the backend's raw reads and writes."""
+
+    name = "base"
+
+    def put(self, data):
+        """Store `data` (bytes or str) unless an artifact with its hash exists. Returns the key."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        key = content_key(data)
+        if not self._exists(key):
+            self._write(key, gzip.compress(data, compresslevel=6, mtime=0))
+        return key
+
+    def get(self, key):
+        """The artifact's bytes. Raises ArtifactNotFound."""
+        return gzip.decompress(self._read(key))
+
+    def get_text(self, key):
+        return self.get(key).decode("utf-8")
+
+    def open_compressed(self, key):
+        """
+        Iterator over the gzip-compressed bytes of the artifact, in blocks,
+        for streaming. Raises ArtifactNotFound before the first block.
+        """
+        raise NotImplementedError
+
+    def presigned_url(self, key, filename, content_type):
+        """A URL the client can download the artifact from directly, or None."""
+        return None
+
+    def _exists(self, key):
+        raise NotImplementedError
+
+    def _read(self, key):
+        raise NotImplementedError
+
+    def _write(self, key, compressed):
+        raise NotImplementedError
+
+
+class FilesystemStore(ArtifactStore):
+    """Artifacts as files under `root`: <root>/<2 hex>/<2 hex>/<key>.gz."""
+
+    name = "filesystem"
+
+    def __init__(self, root=ARTIFACT_PATH):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.gz")
+
+    def _exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def _read(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise ArtifactNotFound(key)
+
+    def _write(self, key, compressed):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename: concurrent writers of the same key race harmlessly
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+
+    def open_compressed(self, key):
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise ArtifactNotFound(key)
+
+        def blocks():
+            with f:
+                yield from iter(lambda: f.read(STREAM_BLOCK_SIZE), b"")
+        return blocks()
+
+
+class S3Store(ArtifactStore):
+    """Artifacts as objects <prefix><key> in an S3-compatible bucket, stored with Content-Encoding: gzip."""
+
+    name = "s3"
+
+    def __init__(self, bucket=ARTIFACT_S3_BUCKET, endpoint_url=ARTIFACT_S3_ENDPOINT, prefix=ARTIFACT_S3_PREFIX,
+                 presign_sec=ARTIFACT_PRESIGN_SEC, client=None):
+        if not bucket:
+            raise ValueError("ARTIFACT_S3_BUCKET is required for the s3 artifact store")
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.prefix = prefix
+        self.presign_sec = presign_sec
+        self._client = client
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        import boto3
+                    except ImportError:
+                        raise RuntimeError("The s3 artifact store requires boto3 (pip install boto3)")
+                    self._client = boto3.client("s3", endpoint_url=self.endpoint_url)
+        return self._client
+
+    def _object_key(self, key):
+        return f"{self.prefix}{key}"
+
+    @staticmethod
+    def _is_not_found(error):
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _get_object(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))
+        except Exception as e:
+            if self._is_not_found(e):
+                raise ArtifactNotFound(key)
+            raise
+
+    def _exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception as e:
+            if self._is_not_found(e):
+                return False
+            raise
+
+    def _read(self, key):
+        return self._get_object(key)["Body"].read()
+
+    def _write(self, key, compressed):
+        self.client.put_object(
+            Bucket=self.bucket, Key=self._object_key(key), Body=compressed,
+            ContentEncoding="gzip", ContentType="application/octet-stream",
+        )
+
+    def open_compressed(self, key):
+        body = self._get_object(key)["Body"]
+
+        def blocks():
+            try:
+                yield from body.iter_chunks(STREAM_BLOCK_SIZE)
+            finally:
+                body.close()
+        return blocks()
+
+    def presigned_url(self, key, filename, content_type):
+        if self.presign_sec <= 0:
+            return None
+        return self.client.generate_presigned_url("get_object", Params={
+            "Bucket": self.bucket,
+            "Key": self._object_key(key),
+            "ResponseContentType": content_type,
+            "ResponseContentDisposition": f'attachment; filename="{filename}"',
+        }, ExpiresIn=self.presign_sec)
+
+
+def open_store(backend=ARTIFACT_STORE):
+    """The configured store, or None when artifacts stay in the database."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown ARTIFACT_STORE '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    if backend == "database":
+        return None
+    store = S3Store() if backend == "s3" else FilesystemStore()
+    logging.info(f"Artifacts are stored in the {store.name} store")
+    return store
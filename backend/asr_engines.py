@@ -0,0 +1,257 @@
+"""
+Speech-to-text engines for the transcription pipeline.
+
+Every engine turns an audio chunk into Whisper-style segment dicts
+({"id", "start", "end", "text", ...}) with timestamps shifted by the chunk's
+start time, so chunks from any engine merge the same way.
+
+  groq   Groq hosted whisper-large-v3-turbo (default)
+  local  faster-whisper (CTranslate2, int8) on the CPU, optional dependency:
+         pip install faster-whisper
+
+Engines can also detect the spoken language (detect_and_transcribe), which the
+pipeline runs on the first chunk before fanning out the rest with that hint.
+
+Engine choice per request ("asr_engine" in /upload) or by policy:
+ASR_ENGINE=groq|local|auto. With "auto", clips up to ASR_LOCAL_MAX_SECONDS
+go to the local engine and longer ones to Groq (which parallelises better
+across chunks); without a Groq key everything goes local.
+"""
+import os
+import logging
+import threading
+
+import deadlines
+import resilience
+import usage
+
+ASR_ENGINE = os.getenv("ASR_ENGINE", "groq")
+ASR_LOCAL_MAX_SECONDS = float(os.getenv("ASR_LOCAL_MAX_SECONDS", "600"))
+
+GROQ_ASR_MODEL = os.getenv("GROQ_ASR_MODEL", "whisper-large-v3-turbo")
+# Per-call timeout (capped by the request deadline) and optional cap on chunks in flight
+GROQ_ASR_TIMEOUT = float(os.getenv("GROQ_ASR_TIMEOUT", resilience.timeout("groq")))
+GROQ_ASR_CONCURRENCY = int(os.getenv("GROQ_ASR_CONCURRENCY", "0")) or None
+
+# Small model by default so it runs (and can be pre-cached) on a CPU-only box
+LOCAL_ASR_MODEL = os.getenv("LOCAL_ASR_MODEL", "tiny")
+LOCAL_ASR_MODEL_DIR = os.getenv("LOCAL_ASR_MODEL_DIR")
+LOCAL_ASR_COMPUTE_TYPE = os.getenv("LOCAL_ASR_COMPUTE_TYPE", "int8")
+# Parallel chunk inferences x threads per inference should roughly equal the core count
+LOCAL_ASR_WORKERS = int(os.getenv("LOCAL_ASR_WORKERS", max(1, (os.cpu_count() or 1) // 2)))
+LOCAL_ASR_THREADS = int(os.getenv("LOCAL_ASR_THREADS", max(1, (os.cpu_count() or 1) // LOCAL_ASR_WORKERS)))
+
+# Whisper's language table (code -> name). Groq's verbose_json reports the
+# detected language by name, faster-whisper by code.
+WHISPER_LANGUAGES = {
+    "en": "english", "zh": "chinese", "de": "german", "es": "spanish", "ru": "russian",
+    "ko": "korean", "fr": "french", "ja": "japanese", "pt": "portuguese", "tr": "turkish",
+    "pl": "polish", "ca": "catalan", "nl": "dutch", "ar": "arabic", "sv": "swedish",
+    "it": "italian", "id": "indonesian", "hi": "hindi", "fi": "finnish", "vi": "vietnamese",
+    "he": "hebrew", "uk": "ukrainian", "el": "greek", "ms": "malay", "cs": "czech",
+    "ro": "romanian", "da": "danish", "hu": "hungarian", "ta": "tamil", "no": "norwegian",
+    "th": "thai", "ur": "urdu", "hr": "croatian", "bg": "bulgarian", "lt": "lithuanian",
+    "la": "latin", "mi": "maori", "ml": "malayalam", "cy": "welsh", "sk": "slovak",
+    "te": "telugu", "fa": "persian", "lv": "latvian", "bn": "bengali", "sr": "serbian",
+    "az": "azerbaijani", "sl": "slovenian", "kn": "kannada", "et": "estonian", "mk": "macedonian",
+    "br": "breton", "eu": "basque", "is": "icelandic", "hy": "armenian", "ne": "nepali",
+    "mn": "mongolian", "bs": "bosnian", "kk": "kazakh", "sq": "albanian", "sw": "swahili",
+    "gl": "galician", "mr": "marathi", "pa": "punjabi", "si": "sinhala", "km": "khmer",
+    "sn": "shona", "yo": "yoruba", "so": "somali", "af": "afrikaans", "oc": "occitan",
+    "ka": "georgian", "be": "belarusian", "tg": "tajik", "sd": "sindhi", "gu": "gujarati",
+    "am": "amharic", "yi": "yiddish", "lo": "lao", "uz": "uzbek", "fo": "faroese",
+    "ht": "haitian creole", "ps": "pashto", "tk": "turkmen", "nn": "nynorsk", "mt": "maltese",
+    "sa": "sanskrit", "lb": "luxembourgish", "my": "myanmar", "bo": "tibetan", "tl": "tagalog",
+    "mg": "malagasy", "as": "assamese", "tt": "tatar", "haw": "hawaiian", "ln": "lingala",
+    "ha": "hausa", "ba": "bashkir", "jw": "javanese", "su": "sundanese", "yue": "cantonese",
+}
+_LANGUAGE_CODES = {name: code for code, name in WHISPER_LANGUAGES.items()}
+
+
+def language_code(language):
+    """Normalize a Whisper language name or code ("English", "en") to its code, or None."""
+    if not language:
+        return None
+    language = str(language).strip().lower()
+    if language in WHISPER_LANGUAGES:
+        return language
+    return _LANGUAGE_CODES.get(language)
+
+
+class ASREngine:
+    """Base class for transcription engines."""
+
+    name = "base"
+    # How many chunks the pipeline should transcribe at once with this engine
+    max_concurrency = None
+
+    def is_available(self):
+        return True
+
+    def transcribe(self, chunk_path, language_hint="en", chunk_start_sec=0):
+        """Return the segments of one chunk, shifted by chunk_start_sec."""
+        raise NotImplementedError
+
+    def detect_and_transcribe(self, chunk_path, chunk_start_sec=0):
+        """Transcribe one chunk without a hint; return (segments, detected language code or None)."""
+        raise NotImplementedError
+
+    @staticmethod
+    def shift_segments(segments, chunk_start_sec):
+        for seg in segments:
+            seg['start'] += chunk_start_sec
+            seg['end'] += chunk_start_sec
+        return segments
+
+
+class GroqASREngine(ASREngine):
+    """Groq hosted Whisper. One client is shared by all requests (httpx pools its connections)."""
+
+    name = "groq"
+    max_concurrency = GROQ_ASR_CONCURRENCY
+
+    def __init__(self, api_key=None, model=GROQ_ASR_MODEL):
+        self.api_key = api_key if api_key is not None else os.getenv('GROQ_API_KEY', '').split(',')[0].strip()
+        self.model = model
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def is_available(self):
+        return bool(self.api_key)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from groq import Groq
+                    self._client = usage.instrument_groq(Groq(api_key=self.api_key))
+        return self._client
+
+    def _request(self, chunk_path, language=None):
+        options = {"language": language} if language else {}
+        deadline = deadlines.current()
+        timeout = deadline.timeout(GROQ_ASR_TIMEOUT)
+        # The SDK's retries would outlive a deadline that caps this attempt
+        client = self.client if timeout >= GROQ_ASR_TIMEOUT else self.client.with_options(max_retries=0)
+        with open(chunk_path, "rb") as file, resilience.protected("groq", "audio.transcriptions"):
+            result = client.audio.transcriptions.create(
+                file=(chunk_path, file.read()),
+                model=self.model,
+                response_format="verbose_json",
+                timeout=timeout,
+                **options
+            )
+        usage.record(asr_calls=1, asr_audio_seconds=getattr(result, "duration", None) or 0)
+        return result
+
+    def transcribe(self, chunk_path, language_hint="en", chunk_start_sec=0):
+        result = self._request(chunk_path, language_hint)
+        return self.shift_segments(result.segments, chunk_start_sec)
+
+    def detect_and_transcribe(self, chunk_path, chunk_start_sec=0):
+        result = self._request(chunk_path)
+        return self.shift_segments(result.segments, chunk_start_sec), language_code(getattr(result, "language", None))
+
+
+class LocalWhisperEngine(ASREngine):
+    """
+    faster-whisper on the CPU with int8 weights. Chunks are transcribed
+    concurrently on LOCAL_ASR_WORKERS model replicas (CTranslate2 releases the
+    GIL), each using LOCAL_ASR_THREADS intra-op threads.
+    """
+
+    name = "local"
+
+    def __init__(self, model=LOCAL_ASR_MODEL, model_dir=LOCAL_ASR_MODEL_DIR,
+                 compute_type=LOCAL_ASR_COMPUTE_TYPE, workers=LOCAL_ASR_WORKERS, threads=LOCAL_ASR_THREADS):
+        self.model_name = model
+        self.model_dir = model_dir
+        self.compute_type = compute_type
+        self.max_concurrency = workers
+        self.threads = threads
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def is_available(self):
+        try:
+            import faster_whisper  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    try:
+                        from faster_whisper import WhisperModel
+                    except ImportError:
+                        raise RuntimeError("Local ASR engine requires faster-whisper (pip install faster-whisper)")
+                    logging.info(f"Loading local Whisper model '{self.model_name}' ({self.compute_type}, "
+                                 f"{self.max_concurrency} workers x {self.threads} threads)")
+                    self._model = WhisperModel(
+                        self.model_name,
+                        device="cpu",
+                        compute_type=self.compute_type,
+                        cpu_threads=self.threads,
+                        num_workers=self.max_concurrency,
+                        download_root=self.model_dir
+                    )
+        return self._model
+
+    def _run(self, chunk_path, language=None, chunk_start_sec=0):
+        segments, info = self.model.transcribe(chunk_path, language=language, beam_size=1)
+        return self.shift_segments([
+            {"id": seg.id, "start": seg.start, "end": seg.end, "text": seg.text,
+             "avg_logprob": seg.avg_logprob, "no_speech_prob": seg.no_speech_prob}
+            for seg in segments
+        ], chunk_start_sec), info
+
+    def transcribe(self, chunk_path, language_hint="en", chunk_start_sec=0):
+        return self._run(chunk_path, language_hint, chunk_start_sec)[0]
+
+    def detect_and_transcribe(self, chunk_path, chunk_start_sec=0):
+        segments, info = self._run(chunk_path, None, chunk_start_sec)
+        return segments, language_code(info.language)
+
+
+ENGINES = {
+    GroqASREngine.name: GroqASREngine,
+    LocalWhisperEngine.name: LocalWhisperEngine,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_engine(name):
+    """Return the shared instance of an engine by name."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown ASR engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = ENGINES[name]()
+        return _instances[name]
+
+
+def select_engine(requested=None, duration_sec=None):
+    """
+    Pick the engine for a request: an explicit request wins, otherwise the
+    ASR_ENGINE policy applies ("auto" routes by clip duration).
+    """
+    choice = requested or ASR_ENGINE
+    if choice != "auto":
+        return get_engine(choice)
+
+    groq = get_engine("groq")
+    local = get_engine("local")
+    if not local.is_available():
+        return groq
+    if not groq.is_available():
+        return local
+    if duration_sec is not None and duration_sec <= ASR_LOCAL_MAX_SECONDS:
+        return local
+    return groq
+
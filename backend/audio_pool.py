@@ -0,0 +1,279 @@
+"""
+Process pool for the CPU-bound audio stages (decode, resample, encode).
+
+Flask request threads only submit work here and wait on the result, so ffmpeg
+encode/decode no longer competes for the GIL with the rest of the server.
+Decoded PCM is written once to a memory-mapped scratch file; chunk workers
+slice that file in place, so the audio is never pickled between processes or
+copied through Python objects.
+"""
+import os
+import atexit
+import logging
+import mmap
+import subprocess
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+# Whisper-friendly PCM layout: 16kHz mono signed 16-bit little endian
+SAMPLE_RATE = 16000
+CHANNELS = 1
+SAMPLE_WIDTH = 2
+
+AUDIO_POOL_WORKERS = int(os.getenv("AUDIO_POOL_WORKERS", os.cpu_count() or 1))
+
+# Bytes handed to an ffmpeg stdin pipe per write
+PIPE_WRITE_SIZE = 1024 * 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """
+    Return the persistent audio process pool, creating it on first use.
+    Workers are spawned (not forked) so they never inherit request threads or
+    open client sockets from the Flask process.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=AUDIO_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                logging.info(f"Started audio process pool with {AUDIO_POOL_WORKERS} workers")
+    return _pool
+
+
+def shutdown_pool():
+    """Stop the audio process pool (registered with atexit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown_pool)
+
+
+def ffmpeg_binary():
+    """
+    Return the ffmpeg executable used by pydub, falling back to the binary
+    bundled with imageio-ffmpeg when ffmpeg is not on PATH.
+    """
+    from pydub import AudioSegment
+    from pydub.utils import which
+
+    if which(AudioSegment.converter):
+        return AudioSegment.converter
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return AudioSegment.converter
+
+
+def _run_ffmpeg(args, stdin=None):
+    """Run ffmpeg with the given arguments and raise on failure."""
+    command = [ffmpeg_binary(), "-hide_banner", "-loglevel", "error", "-y"]
+    if stdin is None:
+        command.append("-nostdin")
+    command += args
+    proc = subprocess.Popen(
+        command,
+        stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE
+    )
+    # Drain stderr while stdin is written: a chatty ffmpeg would otherwise block on a full pipe
+    stderr_chunks = []
+    drain = threading.Thread(target=lambda: stderr_chunks.append(proc.stderr.read()), daemon=True)
+    drain.start()
+    broken_pipe = False
+    if stdin is not None:
+        # Feed the PCM slice in pieces straight from the mapped buffer
+        try:
+            for offset in range(0, len(stdin), PIPE_WRITE_SIZE):
+                proc.stdin.write(stdin[offset:offset + PIPE_WRITE_SIZE])
+        except BrokenPipeError:
+            # ffmpeg exited early; its stderr says why
+            broken_pipe = True
+        finally:
+            try:
+                proc.stdin.close()
+            except BrokenPipeError:
+                broken_pipe = True
+    drain.join()
+    proc.stderr.close()
+    stderr = b"".join(stderr_chunks).decode(errors="replace").strip()
+    if proc.wait() != 0 or broken_pipe:
+        raise RuntimeError(f"ffmpeg failed ({proc.returncode}): {stderr or 'stopped reading its input'}")
+
+
+def _raw_input_args(sample_rate, channels):
+    return ["-f", "s16le", "-ar", str(sample_rate), "-ac", str(channels), "-i", "pipe:0"]
+
+
+# ---------- WORKER FUNCTIONS (run inside the pool) ----------
+
+def _decode_worker(input_path, sample_rate, channels):
+    """Decode and resample any input ffmpeg understands into a raw PCM file."""
+    pcm_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pcm")
+    pcm_file.close()
+    try:
+        _run_ffmpeg([
+            "-i", input_path, "-vn",
+            "-ac", str(channels), "-ar", str(sample_rate),
+            "-acodec", "pcm_s16le", "-f", "s16le", pcm_file.name
+        ])
+    except Exception:
+        os.remove(pcm_file.name)
+        raise
+    return pcm_file.name, os.path.getsize(pcm_file.name)
+
+
+def _encode_slice_worker(pcm_path, start_byte, end_byte, sample_rate, channels, fmt, suffix):
+    """Encode bytes [start_byte, end_byte) of a raw PCM file into a temp audio file."""
+    out_file = tempfile.NamedTemporaryFile(delete=False, suffix=suffix)
+    out_file.close()
+    with open(pcm_path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                _run_ffmpeg(
+                    _raw_input_args(sample_rate, channels) + ["-f", fmt, out_file.name],
+                    stdin=view[start_byte:end_byte]
+                )
+            except Exception:
+                os.remove(out_file.name)
+                raise
+            finally:
+                view.release()
+    return out_file.name
+
+
+def _transcode_worker(src_path, dst_path, fmt, bitrate):
+    """Transcode a whole file (e.g. downloaded m4a to mp3) in one ffmpeg pass."""
+    args = ["-i", src_path, "-vn"]
+    if bitrate:
+        args += ["-b:a", bitrate]
+    _run_ffmpeg(args + ["-f", fmt, dst_path])
+    return dst_path
+
+
+# ---------- PUBLIC API ----------
+
+class PCMBuffer:
+    """
+    Handle to decoded PCM living in a memory-mapped scratch file.
+    Use as a context manager (or call close()) to delete the scratch file.
+    """
+
+    def __init__(self, path, nbytes, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+        self.path = path
+        self.nbytes = nbytes
+        self.sample_rate = sample_rate
+        self.channels = channels
+
+    @property
+    def frame_width(self):
+        return SAMPLE_WIDTH * self.channels
+
+    @property
+    def duration_sec(self):
+        return self.nbytes / float(self.frame_width * self.sample_rate)
+
+    def byte_offset(self, seconds):
+        """Byte offset of a timestamp, aligned to a whole frame."""
+        frames = int(seconds * self.sample_rate)
+        return min(frames * self.frame_width, self.nbytes)
+
+    def close(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.warning(f"Failed to delete PCM scratch file {self.path}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def decode_pcm(input_path, sample_rate=SAMPLE_RATE, channels=CHANNELS):
+    """Decode and resample input_path in the pool. Returns a PCMBuffer."""
+    path, nbytes = get_pool().submit(_decode_worker, input_path, sample_rate, channels).result()
+    return PCMBuffer(path, nbytes, sample_rate, channels)
+
+
+def encode_pcm(pcm, fmt="flac", start_sec=0, end_sec=None):
+    """Encode (a window of) a PCMBuffer to a temp file in the pool. Returns its path."""
+    start_byte = pcm.byte_offset(start_sec)
+    end_byte = pcm.nbytes if end_sec is None else pcm.byte_offset(end_sec)
+    return get_pool().submit(
+        _encode_slice_worker, pcm.path, start_byte, end_byte,
+        pcm.sample_rate, pcm.channels, fmt, f".{fmt}"
+    ).result()
+
+
+def chunk_bounds(pcm, chunk_duration=60):
+    """(index, start_sec, end_sec) of each chunk_duration second piece of a PCMBuffer."""
+    bounds = []
+    start_sec = 0
+    while pcm.byte_offset(start_sec) < pcm.nbytes:
+        bounds.append((len(bounds), start_sec, min(start_sec + chunk_duration, pcm.duration_sec)))
+        start_sec += chunk_duration
+    return bounds
+
+
+def encode_chunks(pcm, chunk_duration=60, fmt="flac", skip=()):
+    """
+    Encode a PCMBuffer into chunk_duration second pieces, in parallel across
+    the pool. Chunks whose index is in skip are left out (indices stay the
+    same). Returns list of (chunk_path, index, chunk_start_sec).
+    """
+    pool = get_pool()
+    futures = []
+    for index, chunk_start_sec, _ in chunk_bounds(pcm, chunk_duration):
+        if index in skip:
+            continue
+        futures.append((index, chunk_start_sec, pool.submit(
+            _encode_slice_worker, pcm.path,
+            pcm.byte_offset(chunk_start_sec), pcm.byte_offset(chunk_start_sec + chunk_duration),
+            pcm.sample_rate, pcm.channels, fmt, f".{fmt}"
+        )))
+
+    chunks = []
+    completed = False
+    try:
+        for index, start_sec, future in futures:
+            chunks.append((future.result(), index, start_sec))
+        completed = True
+    finally:
+        if not completed:
+            # Failed or cancelled (deadlines.Cancelled is a BaseException): stop what hasn't
+            # started, let the running encodes finish and remove every chunk written
+            for _, _, future in futures:
+                future.cancel()
+            wait([future for _, _, future in futures])
+            for _, _, future in futures:
+                if future.cancelled() or future.exception() is not None:
+                    continue
+                try:
+                    os.remove(future.result())
+                except OSError:
+                    pass
+    return chunks
+
+
+def transcode(src_path, dst_path, fmt="mp3", bitrate="192k"):
+    """Transcode src_path to dst_path in the pool. Returns dst_path."""
+    return get_pool().submit(_transcode_worker, src_path, dst_path, fmt, bitrate).result()
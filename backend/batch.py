@@ -0,0 +1,290 @@
+"""
+Bulk ingest: many videos per request, scheduled on one shared, bounded pool.
+
+POST /batch (server.py) turns a list of YouTube URLs or a playlist into a
+Batch with one Item per distinct video. Every batch of the process shares
+BATCH_WORKERS worker threads. A free worker takes the next queued item of
+the next batch in round-robin order, so a 300-video channel submitted first
+holds back a 3-video batch submitted after it by one turn per worker, not
+by 300 videos.
+
+Item states:
+
+  queued     waiting for a worker
+  running    being processed (stage: metadata, download, transcribe,
+             summarize, translate)
+  done       processed and stored
+  cached     nothing to do: transcript, summary and subtitles were stored
+  failed     error holds the reason
+  cancelled  the video ran out of time (BATCH_VIDEO_BUDGET_SEC)
+
+Progress lives in memory and is written through a callback (server.py:
+batch_items and batches, migrations/006_batches.sql) in one write per
+BATCH_FLUSH_ITEMS changed items or BATCH_FLUSH_SEC, whichever comes first,
+so any worker process can answer GET /batch/<id>. A batch lives and dies
+with the process running it: after a restart its unfinished items stay
+queued/running in the table and the batch has to be submitted again
+(finished videos are then cached, interrupted transcriptions resume from
+their checkpoints).
+"""
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+import deadlines
+import metrics
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "2"))
+BATCH_VIDEO_BUDGET_SEC = float(os.getenv("BATCH_VIDEO_BUDGET_SEC", "1800"))
+BATCH_FLUSH_ITEMS = int(os.getenv("BATCH_FLUSH_ITEMS", "20"))
+BATCH_FLUSH_SEC = float(os.getenv("BATCH_FLUSH_SEC", "5"))
+# Finished batches kept in memory for GET /batch/<id> (older ones are read from the table)
+BATCH_KEEP_FINISHED = int(os.getenv("BATCH_KEEP_FINISHED", "100"))
+
+QUEUED, RUNNING, DONE, CACHED, FAILED, CANCELLED = "queued", "running", "done", "cached", "failed", "cancelled"
+STATES = (QUEUED, RUNNING, DONE, CACHED, FAILED, CANCELLED)
+FINISHED_STATES = (DONE, CACHED, FAILED, CANCELLED)
+
+
+def summarize(items):
+    """Aggregate progress of item dicts: batch status, counts per state and the finished fraction."""
+    counts = dict.fromkeys(STATES, 0)
+    for item in items:
+        counts[item["status"]] += 1
+    total = len(items)
+    finished = sum(counts[state] for state in FINISHED_STATES)
+    return {"status": "finished" if finished == total else "running", "total": total, "counts": counts,
+            "progress": round(finished / total, 4) if total else 1.0}
+
+
+def format_counts(counts):
+    return ", ".join(f"{count} {state}" for state, count in counts.items() if count)
+
+
+class Item:
+    """One video of a batch."""
+
+    def __init__(self, position, url, video_id=None, status=QUEUED, stored=None):
+        self.position = position
+        self.url = url
+        self.video_id = video_id
+        self.status = status
+        self.stage = None
+        self.error = None
+        self.title = None
+        # What server.py found already stored for the video when the batch was created
+        self.stored = stored or {}
+        self.updated_at = datetime.utcnow().isoformat()
+
+    def to_dict(self):
+        return {"position": self.position, "url": self.url, "video_id": self.video_id, "title": self.title,
+                "status": self.status, "stage": self.stage, "error": self.error, "updated_at": self.updated_at}
+
+
+class Batch:
+    """
+    A user's videos and their progress. process(batch, item) does one video
+    and returns its final state (DONE by default); write(batch, items), when
+    set, stores the state of changed items.
+    """
+
+    def __init__(self, user_id, items, process, write=None, options=None):
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.items = items
+        self.options = options or {}
+        self.process = process
+        self.created_at = datetime.utcnow().isoformat()
+        self.finished_at = None
+        self.write = write
+        self._queue = deque(item for item in items if item.status == QUEUED)
+        self._unfinished = sum(item.status not in FINISHED_STATES for item in items)
+        self._lock = threading.Lock()
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+        self._flush_timer = None
+        self._write_lock = threading.Lock()
+        self.finished = threading.Event()
+        for item in items:
+            if item.status in FINISHED_STATES:
+                metrics.BATCH_ITEMS.labels(item.status).inc()
+        if not self._unfinished:
+            self.finished_at = self.created_at
+            self.finished.set()
+
+    def next_item(self):
+        """Pop the next queued item, or None."""
+        with self._lock:
+            return self._queue.popleft() if self._queue else None
+
+    def has_queued(self):
+        with self._lock:
+            return bool(self._queue)
+
+    def update(self, item, status=None, stage=None, error=None, title=None):
+        """Change an item's state; finishing the last item finishes the batch."""
+        with self._lock:
+            if status is not None:
+                if status in FINISHED_STATES and item.status not in FINISHED_STATES:
+                    self._unfinished -= 1
+                    metrics.BATCH_ITEMS.labels(status).inc()
+                item.status = status
+                if status in FINISHED_STATES:
+                    item.stage = None
+            if stage is not None:
+                item.stage = stage
+            if error is not None:
+                item.error = error
+            if title is not None:
+                item.title = title
+            item.updated_at = datetime.utcnow().isoformat()
+            self._dirty[item.position] = item
+            last = self._unfinished == 0 and not self.finished.is_set()
+            if last:
+                self.finished_at = item.updated_at
+            due = len(self._dirty) >= BATCH_FLUSH_ITEMS or time.monotonic() - self._last_flush >= BATCH_FLUSH_SEC
+            if not (due or last) and self._flush_timer is None:
+                # Nothing else may change for a while (a long transcription): flush anyway
+                self._flush_timer = threading.Timer(BATCH_FLUSH_SEC, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if due or last:
+            self.flush()
+        if last:
+            self.finished.set()
+            logging.info(f"Batch {self.id} finished: {format_counts(self.progress(with_items=False)['counts'])}")
+
+    def flush(self):
+        """Write the items changed since the last flush in one call."""
+        with self._write_lock:
+            with self._lock:
+                items = list(self._dirty.values())
+                self._dirty = {}
+                self._last_flush = time.monotonic()
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+            if items and self.write is not None:
+                try:
+                    self.write(self, items)
+                except Exception as e:
+                    logging.error(f"Could not store the progress of batch {self.id}: {e}")
+
+    def progress(self, with_items=True):
+        with self._lock:
+            items = [item.to_dict() for item in self.items]
+        result = {"batch_id": self.id, "created_at": self.created_at, "finished_at": self.finished_at,
+                  **summarize(items)}
+        if with_items:
+            result["items"] = items
+        return result
+
+
+class Scheduler:
+    """
+    BATCH_WORKERS threads shared by every batch of the process, handing out
+    items one batch at a time in round-robin order.
+    """
+
+    def __init__(self, workers=BATCH_WORKERS):
+        self.workers = workers
+        self._turns = deque()
+        self._batches = {}
+        self._finished = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def submit(self, batch):
+        with self._cond:
+            self._batches[batch.id] = batch
+            if batch.finished.is_set():
+                self._retire_locked(batch)
+            elif batch.has_queued():
+                self._turns.append(batch)
+                self._cond.notify()
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"batch-worker-{len(self._threads)}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return batch
+
+    def get(self, batch_id):
+        with self._cond:
+            return self._batches.get(batch_id)
+
+    def active(self, user_id):
+        """The user's unfinished batches in this process."""
+        with self._cond:
+            return [b for b in self._batches.values() if b.user_id == user_id and not b.finished.is_set()]
+
+    def _next(self):
+        with self._cond:
+            while True:
+                while self._turns:
+                    batch = self._turns.popleft()
+                    item = batch.next_item()
+                    if item is None:
+                        continue
+                    # Back of the line: every other batch gets a turn first
+                    if batch.has_queued():
+                        self._turns.append(batch)
+                    return batch, item
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            batch, item = self._next()
+            self._run(batch, item)
+
+    def _run(self, batch, item):
+        batch.update(item, RUNNING)
+        try:
+            deadline = deadlines.Deadline(BATCH_VIDEO_BUDGET_SEC, name=f"batch video {item.url}")
+            with deadlines.scope(deadline), metrics.span("batch_video"):
+                status = batch.process(batch, item) or DONE
+            batch.update(item, status)
+        except deadlines.Cancelled as e:
+            batch.update(item, CANCELLED, error=e.reason)
+        except Exception as e:
+            logging.error(f"Batch {batch.id} item {item.position} ({item.url}) failed: {e}")
+            batch.update(item, FAILED, error=str(e))
+        if batch.finished.is_set():
+            self._retire(batch)
+
+    def _retire(self, batch):
+        with self._cond:
+            self._retire_locked(batch)
+
+    def _retire_locked(self, batch):
+        if batch.id in self._batches and batch not in self._finished:
+            self._finished.append(batch)
+            while len(self._finished) > BATCH_KEEP_FINISHED:
+                self._batches.pop(self._finished.popleft().id, None)
+
+
+_scheduler = None
+_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The process-wide scheduler, created on first use."""
+    global _scheduler
+    if _scheduler is None:
+        with _lock:
+            if _scheduler is None:
+                _scheduler = Scheduler()
+    return _scheduler
+
+
+def _reset_after_fork():
+    # Worker threads don't survive fork; a forked child starts its own
+    global _scheduler, _lock
+    _scheduler = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
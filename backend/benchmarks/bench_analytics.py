@@ -0,0 +1,119 @@
+"""
+Analytics aggregation benchmark: SQL functions vs the client-side path.
+
+Seeds the fake Supabase with --users users of --videos videos each (one
+summary and --languages subtitles per video), then times, with
+--supabase-latency per round trip, each analytics operation twice: with the
+SQL functions of migrations/003_analytics_aggregation.sql (registered in
+FakePostgrest) and without them (server.py's client-side fallback). Reports
+wall time, Supabase round trips and response bytes per operation, plus the
+bulk re-sync of every user (resync_analytics.py).
+
+The fake filters unindexed Python lists, so its times are not Postgres
+times; the round trips and bytes are what carry over to a real database.
+
+    cd backend
+    python -m benchmarks.bench_analytics --users 50 --videos 200
+"""
+import os
+import json
+import time
+import uuid
+import random
+import argparse
+from datetime import datetime
+
+from benchmarks.fakes import FakePostgrest, DEFAULT_RPC_FUNCTIONS
+from benchmarks.bench_load import RESULTS_DIR, FAKE_SUPABASE_KEY
+
+
+class ByteCountingPostgrest(FakePostgrest):
+    """FakePostgrest that also counts the JSON bytes it answers with."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bytes_sent = 0
+
+    def handle(self, method, path, query, headers, body):
+        status, response_headers, payload = super().handle(method, path, query, headers, body)
+        if payload not in (None, b""):
+            self.bytes_sent += len(payload if isinstance(payload, bytes) else json.dumps(payload))
+        return status, response_headers, payload
+
+
+def seed(fake, users, videos, languages):
+    rng = random.Random(0)
+    codes = ["es", "fr", "de", "it", "pt", "ja", "ko", "zh", "ru", "hi"]
+    for user_id in users:
+        rows = fake.seed("video_url", [{"video_url": f"https://youtube.com/watch?v={uuid.uuid4().hex[:11]}",
+                                        "user_id": user_id, "title": "Synthetic"} for _ in range(videos)])
+        fake.seed("summaries", [{"video_id": row["id"], "user_id": user_id, "summary": "s" * 800} for row in rows])
+        fake.seed("subtitles", [{"video_id": row["id"], "user_id": user_id, "language": language, "srt": "x" * 4000}
+                                for row in rows for language in rng.sample(codes, languages)])
+
+
+def measure(fake, operation, repeat):
+    calls_before, bytes_before = sum(fake.snapshot().values()), fake.bytes_sent
+    started = time.perf_counter()
+    for _ in range(repeat):
+        operation()
+    elapsed = (time.perf_counter() - started) / repeat
+    return {"ms": round(1000 * elapsed, 2),
+            "round_trips": round((sum(fake.snapshot().values()) - calls_before) / repeat, 1),
+            "kb": round((fake.bytes_sent - bytes_before) / repeat / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics: SQL functions vs client-side aggregation")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--videos", type=int, default=200, help="Videos per user")
+    parser.add_argument("--languages", type=int, default=3, help="Subtitle languages per video")
+    parser.add_argument("--supabase-latency", type=float, default=0.01)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=20, help="Users per bulk re-sync batch")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/analytics-<timestamp>.json)")
+    args = parser.parse_args()
+
+    fake = ByteCountingPostgrest(latency=args.supabase_latency).start()
+    os.environ.update({"SUPABASE_URL": fake.url, "SUPABASE_KEY": FAKE_SUPABASE_KEY, "GROQ_API_KEY": "gsk_fake"})
+    import server
+    import resync_analytics
+
+    users = sorted(str(uuid.UUID(int=random.Random(i).getrandbits(128))) for i in range(args.users))
+    seed(fake, users, args.videos, args.languages)
+    user = users[0]
+    operations = {
+        "sync one user": lambda: server.sync_existing_user_data(user),
+        "track activity": lambda: server.track_user_activity(user, "subtitle_generated", 1, "es", 3),
+        "dashboard": lambda: server.get_user_dashboard_data(user),
+    }
+    report = {"created_at": datetime.utcnow().isoformat(), "config": vars(args), "modes": {}}
+    try:
+        for mode in ("sql functions", "client-side"):
+            fake.rpc_functions = dict(DEFAULT_RPC_FUNCTIONS) if mode == "sql functions" else {}
+            server._missing_rpcs.clear()
+            # The first call of each function discovers whether it exists
+            for operation in operations.values():
+                operation()
+            results = {name: measure(fake, operation, args.repeat) for name, operation in operations.items()}
+            if mode == "sql functions":
+                results["bulk re-sync (all users)"] = measure(
+                    fake, lambda: resync_analytics.resync(args.batch_size), 1)
+            report["modes"][mode] = results
+    finally:
+        fake.stop()
+
+    print(f"{args.users} users x {args.videos} videos, {args.supabase_latency * 1000:.0f} ms per Supabase round trip")
+    for mode, results in report["modes"].items():
+        print(f"\n{mode}")
+        for name, result in results.items():
+            print(f"  {name:<26} {result['ms']:9.1f} ms  {result['round_trips']:6.1f} round trips  {result['kb']:9.1f} KB")
+    output = args.output or os.path.join(RESULTS_DIR, f"analytics-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
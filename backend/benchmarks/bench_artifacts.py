@@ -0,0 +1,161 @@
+"""
+Artifact store benchmark: content in table rows vs filesystem vs S3.
+
+For each ARTIFACT_STORE backend, stores the transcript and --languages
+subtitles of --videos videos of --minutes minutes (synthetic segments)
+through server.py's upsert functions, upserts them all a second time
+unchanged, then downloads every subtitle through /download-subtitle and
+reads every transcript back (get_transcript). Reports wall time and the
+bytes that went through PostgREST for each phase, plus the bytes the store
+holds (deduplicated, gzip). The s3 backend runs against FakeS3 and needs
+boto3; it is skipped without it.
+
+    cd backend
+    python -m benchmarks.bench_artifacts --videos 20 --minutes 60
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import importlib
+from datetime import datetime
+
+from benchmarks.fakes import FakePostgrest, FakeS3
+from benchmarks.synthetic import synthetic_segments
+from benchmarks.bench_load import RESULTS_DIR, FAKE_SUPABASE_KEY
+
+
+class ByteCountingPostgrest(FakePostgrest):
+    """FakePostgrest that counts the bytes it receives and answers with."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.bytes_in = self.bytes_out = 0
+
+    def handle(self, method, path, query, headers, body):
+        status, response_headers, payload = super().handle(method, path, query, headers, body)
+        self.bytes_in += len(body or b"")
+        if payload not in (None, b""):
+            self.bytes_out += len(payload if isinstance(payload, bytes) else json.dumps(payload))
+        return status, response_headers, payload
+
+
+def store_bytes(backend, path, s3):
+    if backend == "filesystem":
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    if backend == "s3":
+        return sum(len(obj["body"]) for obj in s3.objects.values())
+    return 0
+
+
+def measure(fake, operation):
+    bytes_in, bytes_out = fake.bytes_in, fake.bytes_out
+    started = time.perf_counter()
+    operation()
+    return {"ms": round(1000 * (time.perf_counter() - started), 1),
+            "postgrest_kb_in": round((fake.bytes_in - bytes_in) / 1024, 1),
+            "postgrest_kb_out": round((fake.bytes_out - bytes_out) / 1024, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcript/subtitle storage: table rows vs artifact store")
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--minutes", type=float, default=60, help="Length of each video")
+    parser.add_argument("--languages", type=int, default=3, help="Subtitle languages per video")
+    parser.add_argument("--supabase-latency", type=float, default=0.005)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/artifacts-<timestamp>.json)")
+    args = parser.parse_args()
+
+    fake = ByteCountingPostgrest(latency=args.supabase_latency).start()
+    s3 = FakeS3().start()
+    artifact_path = tempfile.mkdtemp(prefix="bench_artifacts_")
+    os.environ.update({
+        "SUPABASE_URL": fake.url, "SUPABASE_KEY": FAKE_SUPABASE_KEY, "GROQ_API_KEY": "gsk_fake",
+        "ARTIFACT_PATH": artifact_path, "ARTIFACT_S3_BUCKET": "bench", "ARTIFACT_S3_ENDPOINT": s3.url,
+        # Stream through the backend so the download phase measures the store, not a redirect
+        "ARTIFACT_PRESIGN_SEC": "0",
+        "AWS_ACCESS_KEY_ID": "bench", "AWS_SECRET_ACCESS_KEY": "bench", "AWS_DEFAULT_REGION": "us-east-1",
+    })
+    import server
+    import artifact_store
+    importlib.reload(artifact_store)
+    # Search indexing costs the same whatever the store and grows with the index: leave it out
+    server.index_for_search = lambda *args, **kwargs: None
+
+    user_id = str(uuid.uuid4())
+    segment_count = int(args.minutes * 60 / 4.2)
+    codes = ["es", "fr", "de", "it", "pt", "ja", "ko", "zh", "ru", "hi"][:args.languages]
+    documents = []
+    for video in range(args.videos):
+        segments = synthetic_segments(segment_count, seed=video)
+        srt_text = server.format_srt(segments)
+        # Same cues in every language: a worst case for the row store, dedup for the artifact store
+        documents.append((segments, {language: srt_text for language in codes}))
+
+    backends = ["database", "filesystem"]
+    try:
+        import boto3  # noqa: F401
+        backends.append("s3")
+    except ImportError:
+        print("boto3 not installed: skipping the s3 backend", file=sys.stderr)
+
+    report = {"created_at": datetime.utcnow().isoformat(), "config": vars(args), "backends": {}}
+    client = server.app.test_client()
+    headers = {"X-User-Id": user_id, "Accept-Encoding": "gzip"}
+    try:
+        for backend in backends:
+            for table in ("transcripts", "subtitles"):
+                fake.tables[table] = []
+            server.artifacts = artifact_store.open_store(backend)
+
+            def store_all():
+                for video, (segments, subtitles) in enumerate(documents, start=1):
+                    server.upsert_transcript(video, "en", segments, user_id)
+                    server.upsert_subtitles(video, subtitles, user_id)
+
+            def download_all():
+                for video in range(1, len(documents) + 1):
+                    for language in codes:
+                        response = client.get(f"/download-subtitle/{video}/{language}", headers=headers)
+                        assert response.status_code == 200, response.status_code
+                        response.get_data()
+
+            def read_transcripts():
+                for video in range(1, len(documents) + 1):
+                    json.loads(server.get_transcript(video, "en"))
+
+            results = {
+                "store": measure(fake, store_all),
+                "store again (unchanged)": measure(fake, store_all),
+                "download subtitles": measure(fake, download_all),
+                "read transcripts": measure(fake, read_transcripts),
+            }
+            results["store_kb"] = round(store_bytes(backend, artifact_path, s3) / 1024, 1)
+            report["backends"][backend] = results
+    finally:
+        fake.stop()
+        s3.stop()
+        shutil.rmtree(artifact_path, ignore_errors=True)
+
+    print(f"{args.videos} videos x {args.minutes:.0f} min, transcript + {args.languages} subtitles each, "
+          f"{args.supabase_latency * 1000:.0f} ms per Supabase round trip")
+    for backend, results in report["backends"].items():
+        print(f"\n{backend} (store holds {results['store_kb']:.0f} KB)")
+        for phase, result in results.items():
+            if phase == "store_kb":
+                continue
+            print(f"  {phase:<24} {result['ms']:9.1f} ms   PostgREST in {result['postgrest_kb_in']:9.1f} KB"
+                  f"   out {result['postgrest_kb_out']:9.1f} KB")
+    output = args.output or os.path.join(RESULTS_DIR, f"artifacts-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
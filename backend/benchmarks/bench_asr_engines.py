@@ -0,0 +1,120 @@
+"""
+Throughput benchmark for the ASR engines.
+
+Runs the real chunk pipeline (decode, 60 s FLAC chunks, concurrent
+transcribe_all_chunks) with each engine and reports wall time, the real-time
+factor (audio seconds transcribed per wall second) and segment counts.
+
+The local engine needs faster-whisper and a cached model; on a CPU-only box
+pre-fetch a small one once and point LOCAL_ASR_MODEL_DIR at it:
+
+    cd backend
+    LOCAL_ASR_MODEL=tiny LOCAL_ASR_MODEL_DIR=~/.cache/whisper \\
+        python -m benchmarks.bench_asr_engines --engines local --audio sample.mp3
+    python -m benchmarks.bench_asr_engines --engines groq local --fake-groq --minutes 5
+
+Synthetic audio (noise) is fine for timing but gives meaningless transcripts;
+pass --audio with real speech to sanity-check output quality. --fake-groq
+runs the Groq engine against an in-process FakeGroq so it can be timed
+without a key or network.
+"""
+import os
+import json
+import time
+import asyncio
+import argparse
+
+# server.py builds its clients at import time; no requests are made here
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.ZmFrZQ")
+
+
+def run_engine(server, engine, chunk_infos, language):
+    loop = asyncio.new_event_loop()
+    try:
+        start = time.perf_counter()
+        transcriptions = loop.run_until_complete(server.transcribe_all_chunks(chunk_infos, language, engine))
+        elapsed = time.perf_counter() - start
+    finally:
+        loop.close()
+    return elapsed, server.merge_transcriptions(transcriptions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the ASR engines")
+    parser.add_argument("--engines", nargs="+", default=["local"])
+    parser.add_argument("--audio", help="Audio file to transcribe (default: synthetic audio)")
+    parser.add_argument("--minutes", type=float, default=2, help="Length of the synthetic audio")
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--fake-groq", action="store_true", help="Time the Groq engine against a local FakeGroq")
+    parser.add_argument("--fake-groq-latency", type=float, default=0.5)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    fake_groq = None
+    if args.fake_groq:
+        from benchmarks.fakes import FakeGroq
+        fake_groq = FakeGroq(latency=args.fake_groq_latency).start()
+        # Read when the engine builds its client, so set before the first get_engine("groq")
+        os.environ["GROQ_BASE_URL"] = fake_groq.url
+        os.environ["GROQ_API_KEY"] = "fake-key"
+
+    import server
+    import audio_pool
+    import asr_engines
+    from benchmarks.synthetic import write_wav, remove_quietly
+
+    audio_path = args.audio or write_wav(args.minutes * 60)
+    results = {}
+    chunk_infos = []
+    try:
+        with audio_pool.decode_pcm(audio_path) as pcm:
+            duration = pcm.duration_sec
+            chunk_infos = audio_pool.encode_chunks(pcm, chunk_duration=60, fmt="flac")
+        print(f"{duration:.0f}s of audio in {len(chunk_infos)} chunks")
+
+        for name in args.engines:
+            engine = asr_engines.get_engine(name)
+            if not engine.is_available():
+                print(f"{name:<8} skipped (not available)")
+                continue
+            if name == "local":
+                # Load the model outside the timed runs
+                started = time.perf_counter()
+                try:
+                    engine.model
+                except Exception as e:
+                    print(f"{name:<8} skipped (model load failed: {e})")
+                    continue
+                print(f"{name:<8} model load {time.perf_counter() - started:.2f}s")
+            runs = []
+            for _ in range(args.repeat):
+                elapsed, segments = run_engine(server, engine, chunk_infos, args.language)
+                runs.append(elapsed)
+            best = min(runs)
+            results[name] = {
+                "audio_sec": round(duration, 2),
+                "chunks": len(chunk_infos),
+                "concurrency": engine.max_concurrency,
+                "best_sec": round(best, 3),
+                "realtime_factor": round(duration / best, 2) if best else None,
+                "segments": len(segments),
+            }
+            print(f"{name:<8} best={best:8.2f}s  x{duration / best:7.1f} realtime  "
+                  f"segments={len(segments)}  concurrency={engine.max_concurrency}")
+    finally:
+        remove_quietly(*[path for path, _, _ in chunk_infos])
+        if not args.audio:
+            remove_quietly(audio_path)
+        audio_pool.shutdown_pool()
+        if fake_groq:
+            fake_groq.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
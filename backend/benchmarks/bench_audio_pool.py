@@ -0,0 +1,94 @@
+"""
+Throughput benchmark for the audio process pool.
+
+Runs the preprocess + chunking stage for N concurrent jobs (default 1, 2, 4
+and 8) and compares the old in-thread pydub path against audio_pool.
+
+    cd backend
+    python -m benchmarks.bench_audio_pool --minutes 10 --jobs 1 2 4 8
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import audio_pool
+from benchmarks.synthetic import write_wav, remove_quietly
+
+
+def inline_pipeline(input_path, chunk_duration=60):
+    """The pre-pool implementation: pydub decode/resample/encode in the request thread."""
+    from pydub import AudioSegment
+    AudioSegment.converter = audio_pool.ffmpeg_binary()
+
+    audio = AudioSegment.from_file(input_path)
+    audio = audio.set_frame_rate(16000).set_channels(1)
+    processed = tempfile.NamedTemporaryFile(delete=False, suffix=".flac")
+    audio.export(processed.name, format="flac")
+    chunks = []
+    for i in range(0, len(audio), chunk_duration * 1000):
+        chunk = audio[i:i + chunk_duration * 1000]
+        temp_chunk = tempfile.NamedTemporaryFile(delete=False, suffix=".flac")
+        chunk.export(temp_chunk.name, format="flac")
+        chunks.append((temp_chunk.name, len(chunks), i // 1000))
+    remove_quietly(processed.name)
+    return chunks
+
+
+def pool_pipeline(input_path, chunk_duration=60):
+    with audio_pool.decode_pcm(input_path) as pcm:
+        return audio_pool.encode_chunks(pcm, chunk_duration=chunk_duration, fmt="flac")
+
+
+def run(pipeline, input_path, jobs):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(lambda _: pipeline(input_path), range(jobs)))
+    elapsed = time.perf_counter() - start
+    for chunks in results:
+        remove_quietly(*[path for path, _, _ in chunks])
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", default=["inline", "pool"])
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    input_path = write_wav(args.minutes * 60)
+    audio_minutes_per_job = args.minutes
+    pipelines = {"inline": inline_pipeline, "pool": pool_pipeline}
+    results = []
+    try:
+        # Warm the pool so process start-up isn't billed to the first run
+        audio_pool.get_pool().submit(audio_pool.ffmpeg_binary).result()
+        for mode in args.modes:
+            for jobs in args.jobs:
+                elapsed = run(pipelines[mode], input_path, jobs)
+                row = {
+                    "mode": mode,
+                    "jobs": jobs,
+                    "seconds": round(elapsed, 3),
+                    "jobs_per_sec": round(jobs / elapsed, 3),
+                    "audio_minutes_per_sec": round(jobs * audio_minutes_per_job / elapsed, 2),
+                }
+                results.append(row)
+                print(f"{mode:>6}  jobs={jobs:<2}  {elapsed:8.2f}s  "
+                      f"{row['jobs_per_sec']:6.2f} jobs/s  {row['audio_minutes_per_sec']:7.1f} audio-min/s")
+    finally:
+        remove_quietly(input_path)
+        audio_pool.shutdown_pool()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"minutes": args.minutes, "workers": audio_pool.AUDIO_POOL_WORKERS,
+                       "cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Bulk ingest benchmark: one /upload per video vs one /batch.
+
+Runs the real app in-process (benchmarks.fake_app) against the local fakes,
+with --videos synthetic videos of --audio-seconds each, a fifth of them
+(--stored) already processed for the user. Three scenarios:
+
+  uploads      one /upload per video, --concurrency at a time (the rate
+               limit is lifted for the benchmark)
+  batch        one /batch with every URL, BATCH_WORKERS=--concurrency
+  fairness     a --videos batch, then a 3-video batch just after it: how
+               long the small batch waits with round-robin scheduling vs a
+               FIFO queue
+
+Reports wall time, YouTube metadata fetches, downloads and Supabase round
+trips per scenario.
+
+    cd backend
+    python -m benchmarks.bench_batch --videos 30 --audio-seconds 120
+"""
+import os
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fakes import FakeGroq, FakeTranslate, FakePostgrest, AudioServer
+from benchmarks.synthetic import write_wav
+from benchmarks.bench_load import RESULTS_DIR, FAKE_SUPABASE_KEY
+
+
+def video_url(prefix, index):
+    return f"https://www.youtube.com/watch?v={prefix}{index:06d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/upload per video vs /batch")
+    parser.add_argument("--videos", type=int, default=30)
+    parser.add_argument("--audio-seconds", type=float, default=120)
+    parser.add_argument("--stored", type=float, default=0.2, help="Fraction of the videos already processed")
+    parser.add_argument("--languages", default="es,fr")
+    parser.add_argument("--concurrency", type=int, default=2, help="Parallel /uploads, and BATCH_WORKERS")
+    parser.add_argument("--supabase-latency", type=float, default=0.01)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/batch-<timestamp>.json)")
+    args = parser.parse_args()
+
+    audio_dir = tempfile.mkdtemp(prefix="bench_batch_")
+    shutil.move(write_wav(args.audio_seconds), os.path.join(audio_dir, "template.wav"))
+    groq, translate = FakeGroq().start(), FakeTranslate().start()
+    postgrest = FakePostgrest(latency=args.supabase_latency).start()
+    audio = AudioServer(audio_dir, default_file="template.wav").start()
+    os.environ.update({
+        "SUPABASE_URL": postgrest.url, "SUPABASE_KEY": FAKE_SUPABASE_KEY, "GROQ_API_KEY": "gsk_fake",
+        "GROQ_BASE_URL": groq.url, "GOOGLE_TRANSLATE_ENDPOINT": translate.url, "FAKE_AUDIO_URL": audio.url,
+        "SEARCH_INDEX_PATH": os.path.join(audio_dir, "search_index.db"),
+        # Every video is the same audio: keep one run's checkpoints from serving another
+        "CHECKPOINT_FOLDER": os.path.join(audio_dir, "checkpoints"),
+    })
+    from benchmarks import fake_app
+    import server
+    import batch
+    import checkpoints
+    checkpoints.CheckpointStore.save_chunk = lambda *args, **kwargs: None
+    checkpoints.CheckpointStore.save_language = lambda *args, **kwargs: None
+    server.rate_limit = lambda user_id, **kwargs: True
+    server.BATCH_MAX_ACTIVE = 10
+
+    client = server.app.test_client()
+    stored = int(args.videos * args.stored)
+
+    def prepare(prefix):
+        """A fresh user with the first `stored` videos already processed."""
+        user_id = str(uuid.uuid4())
+        for index in range(stored):
+            response = client.post("/upload", headers={"X-User-Id": user_id},
+                                   json={"youtube_url": video_url(prefix, index), "language": args.languages})
+            assert response.status_code == 200, response.json
+        return user_id
+
+    def measure(run):
+        fetches, downloads = fake_app.metadata_fetches, audio.snapshot()
+        round_trips = sum(postgrest.snapshot().values())
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        return {"seconds": round(elapsed, 2),
+                "metadata_fetches": fake_app.metadata_fetches - fetches,
+                "downloads": sum(audio.snapshot().values()) - sum(downloads.values()),
+                "supabase_round_trips": sum(postgrest.snapshot().values()) - round_trips}
+
+    def wait(user_id, batch_id):
+        while True:
+            progress = client.get(f"/batch/{batch_id}", headers={"X-User-Id": user_id}).json
+            if progress["status"] == "finished":
+                return progress
+            time.sleep(0.2)
+
+    report = {"created_at": datetime.utcnow().isoformat(), "config": vars(args), "scenarios": {}}
+    try:
+        user_id = prepare("upld0")
+
+        def uploads():
+            def one(index):
+                response = client.post("/upload", headers={"X-User-Id": user_id},
+                                       json={"youtube_url": video_url("upld0", index), "language": args.languages})
+                assert response.status_code == 200, response.json
+            with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+                list(executor.map(one, range(args.videos)))
+        report["scenarios"]["uploads"] = measure(uploads)
+
+        batch._scheduler = batch.Scheduler(workers=args.concurrency)
+        user_id = prepare("batch")
+
+        def one_batch():
+            response = client.post("/batch", headers={"X-User-Id": user_id}, json={
+                "urls": [video_url("batch", index) for index in range(args.videos)], "language": args.languages})
+            assert response.status_code == 202, response.json
+            progress = wait(user_id, response.json["batch_id"])
+            assert progress["counts"]["failed"] == 0, progress["counts"]
+        report["scenarios"]["batch"] = measure(one_batch)
+
+        class FifoScheduler(batch.Scheduler):
+            """Baseline: each batch runs to its end before the next one starts."""
+
+            def _next(self):
+                with self._cond:
+                    while True:
+                        while self._turns:
+                            item = self._turns[0].next_item()
+                            if item is not None:
+                                return self._turns[0], item
+                            self._turns.popleft()
+                        self._cond.wait()
+
+        fairness = {}
+        for name, scheduler in (("round_robin", batch.Scheduler), ("fifo", FifoScheduler)):
+            batch._scheduler = scheduler(workers=args.concurrency)
+            user_id = str(uuid.uuid4())
+            big = client.post("/batch", headers={"X-User-Id": user_id}, json={
+                "urls": [video_url(f"big{name[:2]}", index) for index in range(args.videos)], "language": args.languages})
+            started = time.perf_counter()
+            small = client.post("/batch", headers={"X-User-Id": user_id}, json={
+                "urls": [video_url(f"sml{name[:2]}", index) for index in range(3)], "language": args.languages})
+            wait(user_id, small.json["batch_id"])
+            small_seconds = time.perf_counter() - started
+            wait(user_id, big.json["batch_id"])
+            fairness[name] = {"small_batch_seconds": round(small_seconds, 2),
+                              "both_batches_seconds": round(time.perf_counter() - started, 2)}
+        report["scenarios"]["fairness"] = fairness
+    finally:
+        for fake in (groq, translate, postgrest, audio):
+            fake.stop()
+        server.audio_pool.shutdown_pool()
+        shutil.rmtree(audio_dir, ignore_errors=True)
+
+    print(f"{args.videos} videos x {args.audio_seconds:.0f} s, {stored} already processed, "
+          f"languages {args.languages}, concurrency {args.concurrency}")
+    for name in ("uploads", "batch"):
+        result = report["scenarios"][name]
+        print(f"  {name:<8} {result['seconds']:7.2f} s   metadata fetches {result['metadata_fetches']:4d}   "
+              f"downloads {result['downloads']:4d}   Supabase round trips {result['supabase_round_trips']:5d}")
+    for name, result in report["scenarios"]["fairness"].items():
+        print(f"  fairness {name:<11} 3-video batch done after {result['small_batch_seconds']:6.2f} s "
+              f"(both batches {result['both_batches_seconds']:.2f} s)")
+    output = args.output or os.path.join(RESULTS_DIR, f"batch-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Cancellation check: cancelled /upload requests must stop calling Groq.
+
+Runs the app in-process against the local fakes with a slow FakeGroq and a
+long synthetic video, so transcription is still queued when the request is
+cancelled, in two ways:
+
+  disconnect  the client closes its connection --disconnect-after seconds
+              after the first chunk reached Groq
+  deadline    the request budget (REQUEST_BUDGET_SEC) is --budget seconds
+              (default: the time the disconnect run took to reach Groq, plus
+              --disconnect-after), so it expires mid-transcription
+
+For each it reports when the last Groq call started relative to the
+cancellation and how many of the video's chunks were sent. Exits non-zero if
+a call started later than --bound seconds after the cancellation or if
+every chunk was transcribed anyway.
+
+    cd backend
+    python -m benchmarks.bench_cancellation --minutes 20 --groq-latency 1
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import tempfile
+import threading
+import http.client
+from types import SimpleNamespace
+
+from benchmarks.fakes import FakeGroq, FakeTranslate, FakePostgrest, AudioServer
+from benchmarks.synthetic import write_wav
+from benchmarks.bench_load import InProcessServer, app_environment
+
+TRANSCRIPTION_ROUTE = "POST /openai/v1/audio/transcriptions"
+
+
+class CallTimeline:
+    """Samples the FakeGroq transcription counter to find when the last call arrived."""
+
+    def __init__(self, groq, interval=0.02):
+        self.groq = groq
+        self.interval = interval
+        self.last_change = None
+        self._count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def count(self):
+        return self.groq.snapshot().get(TRANSCRIPTION_ROUTE, 0)
+
+    def wait_for_call(self, baseline):
+        while self.count() <= baseline:
+            time.sleep(self.interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            count = self.count()
+            if count != self._count:
+                self._count = count
+                self.last_change = time.monotonic()
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def post_upload(url, video_key):
+    host, port = url.split("//")[1].split(":")
+    conn = http.client.HTTPConnection(host, int(port))
+    body = json.dumps({"youtube_url": f"https://www.youtube.com/watch?v={video_key}", "language": "es", "action": "both"})
+    conn.request("POST", "/upload", body=body, headers={"Content-Type": "application/json", "X-User-Id": str(uuid.uuid4())})
+    return conn
+
+
+def run_scenario(name, server_url, groq, chunks, settle, cancel):
+    """cancel(conn, timeline, before) blocks until the request is cancelled and returns (monotonic time, detail)."""
+    before = groq.snapshot().get(TRANSCRIPTION_ROUTE, 0)
+    timeline = CallTimeline(groq)
+    conn = post_upload(server_url, f"{name}-{uuid.uuid4().hex[:8]}")
+    cancelled_at, detail = cancel(conn, timeline, before)
+    time.sleep(settle)
+    timeline.stop()
+    sent = timeline.count() - before
+    last_call_after = (timeline.last_change - cancelled_at) if timeline.last_change else None
+    return {"sent_chunks": sent, "total_chunks": chunks,
+            "last_call_after_cancel_sec": round(last_call_after, 3) if last_call_after is not None else None,
+            "detail": detail}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cancellation check for /upload")
+    parser.add_argument("--minutes", type=int, default=20, help="Length of the synthetic video (one chunk per minute)")
+    parser.add_argument("--groq-latency", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=2, help="GROQ_ASR_CONCURRENCY for the app")
+    parser.add_argument("--disconnect-after", type=float, default=2.0)
+    parser.add_argument("--budget", type=float)
+    parser.add_argument("--bound", type=float, default=1.0, help="Max seconds from cancellation to the last new Groq call")
+    args = parser.parse_args()
+
+    audio_dir = tempfile.mkdtemp(prefix="cancel_audio_")
+    # 16 kHz mono keeps download and preprocessing short, so the run reaches Groq quickly
+    shutil.move(write_wav(args.minutes * 60, sample_rate=16000, channels=1), os.path.join(audio_dir, "template.wav"))
+    fakes = SimpleNamespace(
+        groq=FakeGroq(latency=args.groq_latency).start(),
+        translate=FakeTranslate().start(),
+        postgrest=FakePostgrest().start(),
+        audio=AudioServer(audio_dir, default_file="template.wav").start(),
+    )
+    env = app_environment(fakes)
+    env["GROQ_ASR_CONCURRENCY"] = str(args.concurrency)
+    server = InProcessServer(env, 0)
+    import deadlines
+    import audio_pool
+    # Start the pool up front so worker spawn time isn't part of the first request
+    audio_pool.get_pool().submit(audio_pool.ffmpeg_binary).result()
+    first_call_delay = []
+
+    def disconnect(conn, timeline, before):
+        started = time.monotonic()
+        timeline.wait_for_call(before)
+        first_call_delay.append(time.monotonic() - started)
+        time.sleep(args.disconnect_after)
+        conn.close()
+        return time.monotonic(), f"closed {args.disconnect_after}s into ASR"
+
+    def deadline(conn, timeline, before):
+        started = time.monotonic()
+        response = conn.getresponse()
+        response.read()
+        conn.close()
+        # The deadline starts when the view runs, not when the request was sent;
+        # the 504 goes out as soon as it cancels the request
+        return time.monotonic(), f"HTTP {response.status} after {time.monotonic() - started:.2f}s"
+
+    settle = args.groq_latency * 2 + 1
+    results = {}
+    failed = False
+    try:
+        for name, cancel in (("disconnect", disconnect), ("deadline", deadline)):
+            if name == "deadline":
+                # Read by the /upload decorator when the request starts
+                deadlines.REQUEST_BUDGET_SEC = args.budget or first_call_delay[0] + args.disconnect_after
+            result = run_scenario(name, server.url, fakes.groq, args.minutes, settle, cancel)
+            results[name] = result
+            late = result["last_call_after_cancel_sec"]
+            ok = (late is None or late <= args.bound) and result["sent_chunks"] < args.minutes
+            failed |= not ok
+            print(f"{name:<10} {result['detail']:<28} sent {result['sent_chunks']:>3}/{args.minutes} chunks  "
+                  f"last call {late if late is not None else '-'}s after cancel  {'OK' if ok else 'FAILED'}")
+    finally:
+        server.stop()
+        for fake in vars(fakes).values():
+            fake.stop()
+        shutil.rmtree(audio_dir, ignore_errors=True)
+        audio_pool.shutdown_pool()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
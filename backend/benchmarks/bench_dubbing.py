@@ -0,0 +1,143 @@
+"""
+Throughput and memory benchmark for the dubbing stage.
+
+Renders --minutes of synthetic segments (benchmarks.synthetic) with a TTS
+engine ("tone" by default, since it needs nothing installed; "espeak" when
+espeak-ng is available) through dubbing.render_dub on the audio pool, and
+reports wall time, segments per second, the realtime factor (audio seconds
+rendered per wall second), peak traced Python/NumPy memory in this process
+and peak RSS of this process and of the pool workers.
+
+--baseline also runs the straightforward version for comparison: every
+segment synthesised and fitted serially in this process and added into one
+full-length float32 track before encoding.
+
+    cd backend
+    python -m benchmarks.bench_dubbing --minutes 60 --workers 4 --baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_segments, remove_quietly
+
+
+def rss_mb(who):
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(who).ru_maxrss / 1024.0
+
+
+def run_pooled(segments, engine, fmt, total_sec):
+    import dubbing
+    path = tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}").name
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        stats = dubbing.render_dub(segments, path, "en", engine, fmt, total_sec=total_sec)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        return elapsed, peak, os.path.getsize(path), stats
+    finally:
+        tracemalloc.stop()
+        remove_quietly(path)
+
+
+def run_baseline(segments, engine_name, fmt, total_sec):
+    import dubbing
+    import audio_pool
+    engine = dubbing.get_engine(engine_name)
+    rate = dubbing.DUB_SAMPLE_RATE
+    path = tempfile.NamedTemporaryFile(delete=False, suffix=f".{fmt}").name
+    pcm_path = path + ".pcm"
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        track = np.zeros(int(total_sec * rate) + rate, dtype=np.float32)
+        for segment in segments:
+            start = int(segment["start"] * rate)
+            clip = dubbing.resample(engine.synthesize(segment["text"].strip(), "en"), engine.sample_rate, rate)
+            clip = dubbing.fit_to_window(clip, int(segment["end"] * rate) - start, sample_rate=rate)
+            track[start:start + len(clip)] += clip[:len(track) - start]
+        with open(pcm_path, "wb") as f:
+            f.write((np.clip(track, -1, 1) * 32767).astype("<i2").tobytes())
+        del track
+        encoded = audio_pool.encode_pcm(audio_pool.PCMBuffer(pcm_path, os.path.getsize(pcm_path), rate, 1), fmt=fmt)
+        os.replace(encoded, path)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        return elapsed, peak, os.path.getsize(path)
+    finally:
+        tracemalloc.stop()
+        remove_quietly(path, pcm_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dubbing throughput and memory")
+    parser.add_argument("--minutes", type=float, default=60)
+    parser.add_argument("--engine", default="tone")
+    parser.add_argument("--format", default="mp3")
+    parser.add_argument("--workers", type=int, help="AUDIO_POOL_WORKERS (default: CPU count)")
+    parser.add_argument("--baseline", action="store_true", help="Also run the serial, full-track version")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.workers:
+        os.environ["AUDIO_POOL_WORKERS"] = str(args.workers)
+    import dubbing
+    import audio_pool
+    if not dubbing.get_engine(args.engine).is_available():
+        sys.exit(f"TTS engine '{args.engine}' is not available here")
+
+    # synthetic_segments averages ~4.2 s per segment including gaps
+    segments = synthetic_segments(int(args.minutes * 60 / 4.2))
+    total_sec = segments[-1]["end"]
+    # Start the workers before timing
+    audio_pool.get_pool().submit(audio_pool.ffmpeg_binary).result()
+    print(f"{len(segments)} segments, {total_sec / 60:.1f} min of timeline, engine={args.engine}, "
+          f"{audio_pool.AUDIO_POOL_WORKERS} workers")
+
+    results = {}
+    elapsed, peak, size, stats = run_pooled(segments, args.engine, args.format, total_sec)
+    results["pooled"] = {
+        "wall_sec": round(elapsed, 3),
+        "segments_per_sec": round(len(segments) / elapsed, 1),
+        "realtime_factor": round(total_sec / elapsed, 1),
+        "traced_peak_mb": round(peak / 2 ** 20, 1),
+        "output_mb": round(size / 2 ** 20, 2),
+        "failed_segments": stats["failed"],
+    }
+    if args.baseline:
+        elapsed, peak, size = run_baseline(segments, args.engine, args.format, total_sec)
+        results["baseline"] = {
+            "wall_sec": round(elapsed, 3),
+            "segments_per_sec": round(len(segments) / elapsed, 1),
+            "realtime_factor": round(total_sec / elapsed, 1),
+            "traced_peak_mb": round(peak / 2 ** 20, 1),
+            "output_mb": round(size / 2 ** 20, 2),
+        }
+    audio_pool.shutdown_pool()
+    results["peak_rss_mb"] = {"main": round(rss_mb(resource.RUSAGE_SELF), 1),
+                              "largest_worker": round(rss_mb(resource.RUSAGE_CHILDREN), 1)}
+
+    for name in ("pooled", "baseline"):
+        if name in results:
+            r = results[name]
+            print(f"{name:<9} {r['wall_sec']:8.2f}s  {r['segments_per_sec']:7.1f} seg/s  "
+                  f"{r['realtime_factor']:6.1f}x realtime  traced peak {r['traced_peak_mb']:7.1f} MB  "
+                  f"output {r['output_mb']} MB")
+    print(f"peak RSS: main {results['peak_rss_mb']['main']} MB, "
+          f"largest worker {results['peak_rss_mb']['largest_worker']} MB")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
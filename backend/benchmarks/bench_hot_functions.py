@@ -0,0 +1,167 @@
+"""
+Microbenchmarks for the audio and text hot paths in server.py.
+
+Covers preprocess_audio, split_audio_chunks, merge_transcriptions,
+format_srt (with and without translation), hash_file, rate_limit and the
+JSON transcript round trip, on synthetic NumPy audio (1 min .. 3 h) and
+synthetic segment lists (10 .. 10 000 segments).
+
+For each case it reports best/median wall time, CPU time of this process and
+peak Python memory (tracemalloc). Audio stages run in the audio process
+pool, so their CPU is spent in pool workers and not in the "cpu" column.
+
+    cd backend
+    python -m benchmarks.bench_hot_functions                      # everything, default sizes
+    python -m benchmarks.bench_hot_functions --only format_srt merge_transcriptions
+    python -m benchmarks.bench_hot_functions --audio-minutes 1 10 60 180 --output baseline.json
+"""
+import os
+import json
+import time
+import random
+import argparse
+import statistics
+import tracemalloc
+
+# server.py builds its clients at import time; no requests are made here
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.ZmFrZQ")
+
+import server
+import audio_pool
+import translation_engines
+from benchmarks.synthetic import write_wav, synthetic_segments, remove_quietly
+
+
+class InMemoryTranslateClient:
+    """Deterministic Google client so format_srt's translation overhead is measured without network."""
+
+    def translate(self, values, target_language=None, format_=None, **kwargs):
+        if isinstance(values, str):
+            return {"translatedText": f"[{target_language}] {values}"}
+        return [{"translatedText": f"[{target_language}] {v}"} for v in values]
+
+
+def measure(func, repeat):
+    """Run func `repeat` times; return timing/memory stats. func may return a cleanup callable."""
+    walls, cpus, peaks = [], [], []
+    for _ in range(repeat):
+        tracemalloc.start()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        cleanup = func()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        if callable(cleanup):
+            cleanup()
+        walls.append(wall)
+        cpus.append(cpu)
+        peaks.append(peak)
+    return {
+        "best_sec": round(min(walls), 6),
+        "median_sec": round(statistics.median(walls), 6),
+        "cpu_sec": round(statistics.median(cpus), 6),
+        "peak_mem_mb": round(max(peaks) / 1e6, 3),
+        "repeat": repeat,
+    }
+
+
+def chunked_transcriptions(segments, per_chunk=12, seed=0):
+    """Split segments into shuffled (index, segments) tuples, as transcribe_all_chunks returns them."""
+    chunks = [(i, segments[start:start + per_chunk])
+              for i, start in enumerate(range(0, len(segments), per_chunk))]
+    random.Random(seed).shuffle(chunks)
+    return chunks
+
+
+def audio_cases(minutes_list):
+    for minutes in minutes_list:
+        path = write_wav(minutes * 60)
+        # Cases are consumed one at a time, so the file outlives every yielded callable
+        yield f"preprocess_audio[{minutes}min]", lambda: _remove_after(server.preprocess_audio(path))
+        yield f"split_audio_chunks[{minutes}min]", lambda: _remove_chunks_after(server.split_audio_chunks(path))
+        yield f"hash_file[{minutes}min]", lambda: server.hash_file(path)
+        remove_quietly(path)
+
+
+def _remove_after(path):
+    return lambda: remove_quietly(path)
+
+
+def _remove_chunks_after(chunks):
+    return lambda: remove_quietly(*[c[0] for c in chunks])
+
+
+def text_cases(segment_counts, only):
+    for count in segment_counts:
+        segments = synthetic_segments(count)
+        serialized = json.dumps(segments)
+        if "merge_transcriptions" in only:
+            yield (f"merge_transcriptions[{count}]",
+                   lambda: server.merge_transcriptions(chunked_transcriptions(segments)))
+        if "format_srt" in only:
+            yield f"format_srt[{count}]", lambda: server.format_srt(segments)
+            yield f"format_srt+translate[{count}]", lambda: server.format_srt(segments, "es")
+        if "json_roundtrip" in only:
+            yield f"json_roundtrip[{count}]", lambda: json.loads(json.dumps(segments))
+            yield f"json_loads[{count}]", lambda: json.loads(serialized)
+
+
+def rate_limit_cases(user_counts):
+    for users in user_counts:
+        user_ids = [f"user-{i}" for i in range(users)]
+
+        def run():
+            server.rate_limit_cache.clear()
+            for _ in range(9):
+                for user_id in user_ids:
+                    server.rate_limit(user_id)
+        yield f"rate_limit[{users}users x9]", run
+
+
+def main():
+    all_groups = ["preprocess_audio", "split_audio_chunks", "hash_file", "merge_transcriptions",
+                  "format_srt", "json_roundtrip", "rate_limit"]
+    parser = argparse.ArgumentParser(description="Microbenchmarks for audio and text hot functions")
+    parser.add_argument("--only", nargs="+", default=all_groups, choices=all_groups)
+    parser.add_argument("--audio-minutes", type=int, nargs="+", default=[1, 10, 60])
+    parser.add_argument("--segments", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--users", type=int, nargs="+", default=[10, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--audio-repeat", type=int, default=1)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    translation_engines.get_engine("google").client = InMemoryTranslateClient()
+    results = {}
+
+    def record(name, func, repeat):
+        result = measure(func, repeat)
+        results[name] = result
+        print(f"{name:<36} best={result['best_sec']:10.5f}s  median={result['median_sec']:10.5f}s  "
+              f"cpu={result['cpu_sec']:10.5f}s  peak={result['peak_mem_mb']:9.3f}MB")
+
+    try:
+        if {"preprocess_audio", "split_audio_chunks", "hash_file"} & set(args.only):
+            # Start the pool up front so worker spawn time isn't billed to the first case
+            audio_pool.get_pool().submit(audio_pool.ffmpeg_binary).result()
+            for name, func in audio_cases(args.audio_minutes):
+                if name.split("[")[0] in args.only:
+                    record(name, func, args.audio_repeat)
+        for name, func in text_cases(args.segments, args.only):
+            record(name, func, args.repeat)
+        if "rate_limit" in args.only:
+            for name, func in rate_limit_cases(args.users):
+                record(name, func, args.repeat)
+    finally:
+        audio_pool.shutdown_pool()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
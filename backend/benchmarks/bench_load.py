@@ -0,0 +1,327 @@
+"""
+End-to-end load test of the Flask app against local fakes.
+
+Starts FakeGroq, FakeTranslate, FakePostgrest and an AudioServer, then runs
+the app either in-process (threaded werkzeug server) or under gunicorn with
+gunicorn_config.py, exactly as start_backend.sh does. Traffic is driven in
+phases, each reported separately:
+
+  cold_upload     /upload for a never-seen video (download + ASR + LLM + translate)
+  cached_upload   /upload for a video whose transcript and summary exist
+  dashboard       /user-dashboard, /user-activity, /video-details, /usage-trends
+  mixed           weighted mix of the three (see --mix)
+
+Per phase it reports p50/p95/p99 latency, throughput, error count and the
+external calls each fake received per request. Results are written as JSON;
+--compare prints the change against an earlier result file.
+
+    cd backend
+    python -m benchmarks.bench_load --server gunicorn --concurrency 8 --requests 40
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.fakes import FakeGroq, FakeTranslate, FakePostgrest, AudioServer
+from benchmarks.synthetic import write_wav
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+FAKE_SUPABASE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.ZmFrZQ"
+DASHBOARD_PATHS = ("/user-dashboard", "/user-activity", "/video-details/{video_id}", "/usage-trends")
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class Fakes:
+    def __init__(self, args, audio_dir):
+        self.groq = FakeGroq(latency=args.groq_latency, rate_limit_fraction=args.groq_429).start()
+        self.translate = FakeTranslate(latency=args.translate_latency).start()
+        self.postgrest = FakePostgrest(latency=args.supabase_latency).start()
+        self.audio = AudioServer(audio_dir, default_file="template.wav").start()
+
+    def all(self):
+        return {"groq": self.groq, "translate": self.translate,
+                "supabase": self.postgrest, "youtube_audio": self.audio}
+
+    def snapshot(self):
+        return {name: fake.snapshot() for name, fake in self.all().items()}
+
+    def stop(self):
+        for fake in self.all().values():
+            fake.stop()
+
+
+def app_environment(fakes):
+    return {
+        "SUPABASE_URL": fakes.postgrest.url,
+        "SUPABASE_KEY": FAKE_SUPABASE_KEY,
+        "GROQ_API_KEY": "gsk_fake",
+        "GROQ_BASE_URL": fakes.groq.url,
+        "GOOGLE_TRANSLATE_ENDPOINT": fakes.translate.url,
+        "FAKE_AUDIO_URL": fakes.audio.url,
+        # The fake Supabase starts empty, so the local search index must too
+        "SEARCH_INDEX_PATH": os.path.join(tempfile.mkdtemp(prefix="bench_search_"), "search_index.db"),
+    }
+
+
+class InProcessServer:
+    def __init__(self, env, port):
+        os.environ.update(env)
+        from werkzeug.serving import make_server
+        from benchmarks.fake_app import app
+        self.server = make_server("127.0.0.1", port, app, threaded=True)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class GunicornServer:
+    def __init__(self, env, port, config, extra_args=()):
+        self.url = f"http://127.0.0.1:{port}"
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "-c", config, *extra_args, "benchmarks.fake_app:app"],
+            cwd=BACKEND_DIR, env=dict(os.environ, PORT=str(port), **env),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait(timeout=30)
+
+
+def wait_healthy(url, timeout=60):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if requests.get(f"{url}/health", timeout=2).status_code == 200:
+                return time.perf_counter() - start
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not become healthy")
+
+
+class Traffic:
+    """Builds requests for each request type, rotating users to stay under rate_limit()."""
+
+    def __init__(self, base_url, language, users=500):
+        self.base_url = base_url
+        self.language = language
+        self.users = [str(uuid.uuid4()) for _ in range(users)]
+        self.cached_videos = []
+        self._user_index = 0
+        self._lock = threading.Lock()
+
+    def next_user(self):
+        with self._lock:
+            self._user_index = (self._user_index + 1) % len(self.users)
+            return self.users[self._user_index]
+
+    def upload(self, video_key, user_id=None):
+        user_id = user_id or self.next_user()
+        return requests.post(
+            f"{self.base_url}/upload",
+            json={"youtube_url": f"https://www.youtube.com/watch?v={video_key}",
+                  "language": self.language, "action": "both"},
+            headers={"X-User-Id": user_id}, timeout=300
+        )
+
+    def cold_upload(self, rng):
+        return self.upload(f"cold-{uuid.uuid4().hex[:12]}")
+
+    def cached_upload(self, rng):
+        user_id, video_key, _ = rng.choice(self.cached_videos)
+        return self.upload(video_key, user_id)
+
+    def dashboard(self, rng):
+        user_id, _, video_id = rng.choice(self.cached_videos)
+        path = rng.choice(DASHBOARD_PATHS).format(video_id=video_id)
+        return requests.get(f"{self.base_url}{path}", headers={"X-User-Id": user_id}, timeout=60)
+
+
+def run_phase(name, make_request, count, concurrency, fakes, seed):
+    rng_lock = threading.Lock()
+    rng = random.Random(seed)
+    before = fakes.snapshot()
+
+    def one(_):
+        with rng_lock:
+            request_rng = random.Random(rng.random())
+        start = time.perf_counter()
+        try:
+            status = make_request(request_rng).status_code
+        except requests.RequestException:
+            status = "exception"
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(one, range(count)))
+    elapsed = time.perf_counter() - start
+
+    after = fakes.snapshot()
+    external = {}
+    for service, counts in after.items():
+        for route, value in counts.items():
+            delta = value - before.get(service, {}).get(route, 0)
+            if delta:
+                external[f"{service} {route}"] = {"total": delta, "per_request": round(delta / count, 3)}
+
+    latencies = sorted(s[0] for s in samples)
+    errors = sum(1 for _, status in samples if status == "exception" or status >= 400)
+    return {
+        "phase": name,
+        "requests": count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "status_counts": {str(k): sum(1 for _, s in samples if s == k) for k in {s for _, s in samples}},
+        "throughput_rps": round(count / elapsed, 3),
+        "latency_sec": {
+            "p50": round(percentile(latencies, 50), 4),
+            "p95": round(percentile(latencies, 95), 4),
+            "p99": round(percentile(latencies, 99), 4),
+            "max": round(latencies[-1], 4),
+        },
+        "external_calls": external,
+    }
+
+
+def mixed_request(traffic, weights):
+    kinds = list(weights)
+    chances = [weights[k] for k in kinds]
+
+    def make(rng):
+        kind = rng.choices(kinds, chances)[0]
+        return getattr(traffic, kind)(rng)
+    return make
+
+
+def print_phase(result):
+    lat = result["latency_sec"]
+    print(f"{result['phase']:>14}  n={result['requests']:<5} err={result['errors']:<4} "
+          f"{result['throughput_rps']:8.2f} req/s  p50={lat['p50']:.3f}s p95={lat['p95']:.3f}s p99={lat['p99']:.3f}s")
+    for route, calls in sorted(result["external_calls"].items()):
+        print(f"{'':>16}{route:<55} {calls['per_request']:8.2f}/req")
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {p["phase"]: p for p in json.load(f)["phases"]}
+    print(f"\nChange vs {baseline_path}:")
+    for phase in current["phases"]:
+        old = baseline.get(phase["phase"])
+        if not old:
+            continue
+        def delta(new, before):
+            return f"{100.0 * (new - before) / before:+.1f}%" if before else "n/a"
+        print(f"{phase['phase']:>14}  throughput {delta(phase['throughput_rps'], old['throughput_rps'])}  "
+              f"p50 {delta(phase['latency_sec']['p50'], old['latency_sec']['p50'])}  "
+              f"p95 {delta(phase['latency_sec']['p95'], old['latency_sec']['p95'])}  "
+              f"p99 {delta(phase['latency_sec']['p99'], old['latency_sec']['p99'])}")
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip()] = float(weight)
+    return weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test against local fakes")
+    parser.add_argument("--server", choices=["inprocess", "gunicorn"], default="inprocess")
+    parser.add_argument("--gunicorn-config", default="gunicorn_config.py")
+    parser.add_argument("--gunicorn-arg", action="append", default=[],
+                        help="Extra argument passed to gunicorn (repeatable)")
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per phase")
+    parser.add_argument("--phases", nargs="+", default=["cold_upload", "cached_upload", "dashboard", "mixed"])
+    parser.add_argument("--mix", default="cold_upload=0.1,cached_upload=0.3,dashboard=0.6")
+    parser.add_argument("--cached-videos", type=int, default=5)
+    parser.add_argument("--audio-seconds", type=int, default=120)
+    parser.add_argument("--language", default="es")
+    parser.add_argument("--groq-latency", type=float, default=0.2)
+    parser.add_argument("--groq-429", type=float, default=0.0, help="Fraction of Groq calls answered with 429")
+    parser.add_argument("--translate-latency", type=float, default=0.01)
+    parser.add_argument("--supabase-latency", type=float, default=0.003)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    audio_dir = tempfile.mkdtemp(prefix="dubmyyt_audio_")
+    write_wav(args.audio_seconds, os.path.join(audio_dir, "template.wav"))
+    fakes = Fakes(args, audio_dir)
+    env = app_environment(fakes)
+    if args.server == "gunicorn":
+        server = GunicornServer(env, args.port, args.gunicorn_config, args.gunicorn_arg)
+    else:
+        server = InProcessServer(env, args.port)
+
+    try:
+        startup = wait_healthy(server.url)
+        traffic = Traffic(server.url, args.language)
+
+        # Warm-up (not measured): these videos become the cached_upload / dashboard set
+        for i in range(args.cached_videos):
+            user_id = traffic.next_user()
+            response = traffic.upload(f"cached-{i}", user_id)
+            if response.status_code != 200:
+                raise RuntimeError(f"Warm-up upload failed: {response.status_code} {response.text[:200]}")
+            row = next(r for r in fakes.postgrest.tables["video_url"]
+                       if r["user_id"] == user_id and r["video_url"].endswith(f"cached-{i}"))
+            traffic.cached_videos.append((user_id, f"cached-{i}", row["id"]))
+
+        makers = {
+            "cold_upload": traffic.cold_upload,
+            "cached_upload": traffic.cached_upload,
+            "dashboard": traffic.dashboard,
+            "mixed": mixed_request(traffic, parse_mix(args.mix)),
+        }
+        phases = []
+        for index, phase in enumerate(args.phases):
+            result = run_phase(phase, makers[phase], args.requests, args.concurrency, fakes, args.seed + index)
+            print_phase(result)
+            phases.append(result)
+    finally:
+        server.stop()
+        fakes.stop()
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "startup_to_healthy_sec": round(startup, 3),
+        "phases": phases,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"load-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
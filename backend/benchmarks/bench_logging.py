@@ -0,0 +1,177 @@
+"""
+Logging cost per request under concurrency.
+
+--threads threads each serve --requests simulated requests that log
+--records INFO records (plus one WARNING) inside a metrics span, waiting
+--think-ms between records the way a request waits on Groq or Supabase,
+and the time each request spends in logging calls is recorded. Modes:
+
+  disabled        root level above INFO: the floor of a logging call
+  sync file       logging.basicConfig(filename=...) as server.py used to do
+  queue json      structured_logging.configure(): queue + writer thread
+  queue json 10%  the same with LOG_SAMPLE_RATE=0.1
+
+--slow-disk-ms adds a delay to every write, standing in for a slow or
+contended disk: the sync handler pays it inside the request (under the
+handler lock, so threads queue behind each other), the queue modes pay it
+in the writer thread. With --think-ms 0 every thread logs back to back,
+a burst that can outrun the writer and fill the queue (see "dropped").
+
+    cd backend
+    python -m benchmarks.bench_logging --threads 16 --requests 100 --think-ms 1 --slow-disk-ms 0.2
+"""
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+import statistics
+from datetime import datetime
+
+import metrics
+import structured_logging
+from benchmarks.bench_load import RESULTS_DIR
+
+
+class SlowFileHandler(logging.FileHandler):
+    """FileHandler whose writes take at least delay_sec."""
+
+    def __init__(self, path, delay_sec, formatter=None):
+        super().__init__(path)
+        self.delay_sec = delay_sec
+        if formatter:
+            self.setFormatter(formatter)
+
+    def emit(self, record):
+        super().emit(record)
+        if self.delay_sec:
+            time.sleep(self.delay_sec)
+
+
+def simulate_request(index, records, think_sec):
+    """Seconds the request spent in logging calls (its think time excluded)."""
+    token = structured_logging.bind_request(user_id=f"user-{index % 50}")
+    spent = 0.0
+    try:
+        with metrics.span("bench_request"):
+            for i in range(records):
+                if think_sec:
+                    time.sleep(think_sec)
+                started = time.perf_counter()
+                logging.info(f"Processed chunk {i} of request {index}: {i * 10}s-{i * 10 + 10}s")
+                spent += time.perf_counter() - started
+            started = time.perf_counter()
+            logging.warning(f"Request {index} retried a chunk")
+            spent += time.perf_counter() - started
+    finally:
+        structured_logging.unbind_request(token)
+    return spent
+
+
+def run(threads, requests, records, think_sec=0.0):
+    durations = []
+    lock = threading.Lock()
+
+    def worker(offset):
+        local = [simulate_request(offset + i, records, think_sec) for i in range(requests)]
+        with lock:
+            durations.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(t * requests,)) for t in range(threads)]
+    started = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return durations, time.perf_counter() - started
+
+
+def summarize(durations, elapsed, path, dropped):
+    durations = sorted(durations)
+    lines = 0
+    if path and os.path.exists(path):
+        with open(path, "rb") as f:
+            lines = sum(1 for _ in f)
+    return {
+        # Per request: time inside logging calls only
+        "p50_us": round(1e6 * statistics.median(durations), 1),
+        "p99_us": round(1e6 * durations[int(0.99 * (len(durations) - 1))], 1),
+        "max_us": round(1e6 * durations[-1], 1),
+        "requests_per_sec": round(len(durations) / elapsed),
+        "lines_written": lines,
+        "dropped": dropped,
+    }
+
+
+def dropped_total():
+    return metrics.LOG_RECORDS_DROPPED._value.get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-request logging cost: sync file handler vs queue")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per thread")
+    parser.add_argument("--records", type=int, default=20, help="INFO records per request")
+    parser.add_argument("--think-ms", type=float, default=1.0, help="Non-logging work between records")
+    parser.add_argument("--slow-disk-ms", type=float, default=0.0, help="Delay added to every write")
+    parser.add_argument("--queue-size", type=int, default=10000)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/logging-<timestamp>.json)")
+    args = parser.parse_args()
+
+    delay = args.slow_disk_ms / 1000
+    think = args.think_ms / 1000
+    root = logging.getLogger()
+    workdir = tempfile.mkdtemp(prefix="bench_logging_")
+    report = {"created_at": datetime.utcnow().isoformat(), "config": vars(args), "modes": {}}
+
+    # Warm-up outside any handler so imports and first-call costs are not counted
+    root.setLevel(logging.WARNING)
+    run(2, 10, args.records)
+
+    modes = ["disabled", "sync file", "queue json", "queue json 10%"]
+    for mode in modes:
+        path = os.path.join(workdir, mode.replace(" ", "_").replace("%", "pct") + ".log")
+        dropped_before = dropped_total()
+        if mode == "disabled":
+            path = None
+            root.setLevel(logging.WARNING + 1)
+            durations, elapsed = run(args.threads, args.requests, args.records, think)
+        elif mode == "sync file":
+            handler = SlowFileHandler(path, delay, logging.Formatter(structured_logging.TEXT_FORMAT))
+            # The request context filter stamps request_id/stage as in production
+            handler.addFilter(structured_logging.RequestContextFilter())
+            root.addHandler(handler)
+            root.setLevel(logging.INFO)
+            durations, elapsed = run(args.threads, args.requests, args.records, think)
+            root.removeHandler(handler)
+            handler.close()
+        else:
+            handler = SlowFileHandler(path, delay, structured_logging.JsonFormatter())
+            structured_logging.configure(
+                level="INFO", queue_size=args.queue_size, handler=handler,
+                sample_rate=0.1 if mode.endswith("10%") else 1.0,
+            )
+            durations, elapsed = run(args.threads, args.requests, args.records, think)
+            drain_started = time.perf_counter()
+            structured_logging.shutdown()
+            report.setdefault("drain_sec", {})[mode] = round(time.perf_counter() - drain_started, 3)
+        report["modes"][mode] = summarize(durations, elapsed, path, dropped_total() - dropped_before)
+
+    total = args.threads * args.requests
+    print(f"{total} requests on {args.threads} threads, {args.records + 1} records each, "
+          f"{args.think_ms} ms between records, {args.slow_disk_ms} ms per write")
+    print(f"{'mode':<16} {'p50 us':>9} {'p99 us':>10} {'max us':>11} {'req/s':>9} {'lines':>8} {'dropped':>8}")
+    for mode, result in report["modes"].items():
+        print(f"{mode:<16} {result['p50_us']:9.1f} {result['p99_us']:10.1f} {result['max_us']:11.1f} "
+              f"{result['requests_per_sec']:9d} {result['lines_written']:8d} {result['dropped']:8.0f}")
+    output = args.output or os.path.join(RESULTS_DIR, f"logging-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
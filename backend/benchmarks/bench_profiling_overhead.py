@@ -0,0 +1,80 @@
+"""
+Micro-benchmark: cost of the profiling hook on requests that are NOT profiled.
+
+Compares a bare Flask view against the same view wrapped in
+profiling.profiled() with sampling disabled, plus with a 1% sample rate
+(the profiled 1% included), all through the Flask test client.
+
+    cd backend
+    python -m benchmarks.bench_profiling_overhead --requests 20000
+"""
+import argparse
+import time
+
+from flask import Flask, jsonify, request
+
+import profiling
+
+
+def build_app():
+    app = Flask(__name__)
+
+    def forced():
+        return request.headers.get("X-Profile") == "1"
+
+    @app.route("/bare")
+    def bare():
+        return jsonify({"ok": True})
+
+    @app.route("/hooked")
+    @profiling.profiled("bench", forced=forced)
+    def hooked():
+        return jsonify({"ok": True})
+
+    return app
+
+
+def time_requests(client, path, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        client.get(path)
+    return (time.perf_counter() - start) / count
+
+
+def time_decision(count):
+    """Time only the should_profile() decision, outside Flask."""
+    start = time.perf_counter()
+    for _ in range(count):
+        profiling.should_profile(False)
+    return (time.perf_counter() - start) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profiling hook overhead when disabled")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--profile-folder", default="/tmp/dubmyyt_bench_profiles")
+    args = parser.parse_args()
+
+    profiling.PROFILE_FOLDER = args.profile_folder
+    client = build_app().test_client()
+    # Warm up routing/JSON paths
+    time_requests(client, "/bare", 500)
+    time_requests(client, "/hooked", 500)
+
+    profiling.PROFILE_SAMPLE_RATE = 0.0
+    bare = time_requests(client, "/bare", args.requests)
+    hooked = time_requests(client, "/hooked", args.requests)
+    decision = time_decision(args.requests * 10)
+
+    profiling.PROFILE_SAMPLE_RATE = 0.01
+    sampled = time_requests(client, "/hooked", args.requests)
+
+    print(f"bare view              {bare * 1e6:9.2f} us/request")
+    print(f"hooked, disabled       {hooked * 1e6:9.2f} us/request  "
+          f"(+{(hooked - bare) * 1e6:.2f} us, {100 * (hooked - bare) / bare:+.2f}%)")
+    print(f"should_profile() only  {decision * 1e9:9.1f} ns/call")
+    print(f"hooked, 1% sampled     {sampled * 1e6:9.2f} us/request (average incl. profiled requests)")
+
+
+if __name__ == "__main__":
+    main()
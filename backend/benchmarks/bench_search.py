@@ -0,0 +1,155 @@
+"""
+Transcript search benchmark for the SQLite FTS5 index (search_index.py).
+
+Builds an index of --videos synthetic transcripts (benchmarks.synthetic,
+--segments each) spread over --users users. One segment per video carries a
+rare "topicN" word, so queries cover both selective and very common terms.
+Reports:
+
+  bulk indexing      segments per second through SQLiteIndex.replace()
+  incremental        latency of re-indexing one video (what an upsert costs)
+  queries            p50/p95 per query type for one user, for each sort
+  scan baseline      the same queries answered without an index, by loading
+                     the user's transcript JSON and scanning every segment
+                     (what a client has to do with only get_transcript)
+
+    cd backend
+    python -m benchmarks.bench_search --videos 10000 --segments 150 --users 100
+"""
+import os
+import json
+import time
+import uuid
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+from datetime import datetime
+
+import search_index
+from benchmarks.synthetic import synthetic_segments
+from benchmarks.bench_load import RESULTS_DIR
+
+QUERIES = {
+    # A topic word of one of the measured user's videos
+    "rare word": lambda rng, videos: f"topic{rng.choice(videos)[0] % 1000}",
+    "common word": lambda rng, videos: "latency",
+    "two words": lambda rng, videos: "cache worker",
+    "phrase": lambda rng, videos: '"quick brown"',
+    "prefix": lambda rng, videos: "transl*",
+}
+
+
+def make_transcript(video_index, segment_count):
+    segments = synthetic_segments(segment_count, seed=video_index)
+    marked = segments[video_index % segment_count]
+    marked["text"] += f" topic{video_index % 1000}"
+    return segments
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def scan(transcripts, query):
+    """Unindexed search: every word of the query in the segment text."""
+    words = [word.strip('"*').lower() for word in query.split()]
+    results = []
+    for video_id, text in transcripts:
+        for segment in json.loads(text):
+            lowered = segment["text"].lower()
+            if all(word in lowered for word in words):
+                results.append((video_id, segment["start"]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full-text transcript search benchmark")
+    parser.add_argument("--videos", type=int, default=10000)
+    parser.add_argument("--segments", type=int, default=150, help="Segments per video")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=200, help="Queries per query type")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/search-<timestamp>.json)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_search_")
+    index = search_index.SQLiteIndex(os.path.join(workdir, "search_index.db"))
+    users = [str(uuid.UUID(int=random.Random(i).getrandbits(128))) for i in range(args.users)]
+    rng = random.Random(0)
+    try:
+        # The measured user's documents, kept for the scan baseline
+        user = users[0]
+        user_transcripts = []
+        indexing_sec = 0.0
+        generated = 0
+        for video_id in range(args.videos):
+            segments = make_transcript(video_id, args.segments)
+            owner = users[video_id % args.users]
+            if owner == user:
+                user_transcripts.append((video_id, json.dumps(segments)))
+            started = time.perf_counter()
+            index.replace(owner, video_id, "en", "transcript", segments)
+            indexing_sec += time.perf_counter() - started
+            generated += len(segments)
+        db_mb = sum(os.path.getsize(os.path.join(workdir, name)) for name in os.listdir(workdir)) / 2 ** 20
+        print(f"indexed {args.videos} videos / {generated} segments in {indexing_sec:.1f}s "
+              f"({generated / indexing_sec:,.0f} segments/s), {db_mb:.0f} MB on disk")
+
+        incremental = []
+        for _ in range(50):
+            video_id = rng.randrange(args.videos)
+            segments = make_transcript(video_id, args.segments)
+            started = time.perf_counter()
+            index.replace(users[video_id % args.users], video_id, "en", "transcript", segments)
+            incremental.append(time.perf_counter() - started)
+        print(f"re-index one video: p50 {1000 * percentile(incremental, 0.5):.2f} ms  "
+              f"p95 {1000 * percentile(incremental, 0.95):.2f} ms")
+
+        report = {
+            "created_at": datetime.utcnow().isoformat(),
+            "config": vars(args),
+            "segments": generated,
+            "bulk_segments_per_sec": round(generated / indexing_sec),
+            "index_mb": round(db_mb, 1),
+            "reindex_video_ms": {"p50": round(1000 * percentile(incremental, 0.5), 3),
+                                 "p95": round(1000 * percentile(incremental, 0.95), 3)},
+            "queries": {},
+        }
+        print(f"\nqueries for one user ({len(user_transcripts)} videos):")
+        for name, make_query in QUERIES.items():
+            result = {}
+            for sort in search_index.SORTS:
+                latencies, hits = [], []
+                for _ in range(args.queries):
+                    query = make_query(rng, user_transcripts)
+                    started = time.perf_counter()
+                    hits.append(len(index.search(user, query, sort=sort, limit=20)))
+                    latencies.append(time.perf_counter() - started)
+                result[sort] = {"p50_ms": round(1000 * percentile(latencies, 0.5), 3),
+                                "p95_ms": round(1000 * percentile(latencies, 0.95), 3),
+                                "mean_hits": round(statistics.mean(hits), 1)}
+            scan_latencies = []
+            for _ in range(max(3, args.queries // 20)):
+                started = time.perf_counter()
+                scan(user_transcripts, make_query(rng, user_transcripts))
+                scan_latencies.append(time.perf_counter() - started)
+            result["scan_p50_ms"] = round(1000 * percentile(scan_latencies, 0.5), 3)
+            report["queries"][name] = result
+            print(f"  {name:<12} " + "  ".join(
+                f"{sort} p50 {result[sort]['p50_ms']:6.2f} / p95 {result[sort]['p95_ms']:6.2f} ms"
+                for sort in search_index.SORTS
+            ) + f"  hits {result['recent']['mean_hits']:4.1f}  scan p50 {result['scan_p50_ms']:7.2f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"search-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Concurrent-request capacity of the gunicorn worker profiles.
+
+Starts the app under gunicorn once per GUNICORN_PROFILE (see
+gunicorn_config.py) against the local fakes, with a slow FakePostgrest so
+requests spend their time waiting on I/O as they do in production. For each
+profile it warms up --cached-videos uploads, then drives the dashboard
+request types (bench_load's "dashboard" phase: several Supabase round trips
+each, no CPU-heavy work) at each --levels concurrency and reports throughput
+and p95 latency per level.
+
+A profile's capacity is the highest level whose p95 stays within
+--slo times the p95 at the lowest level with no errors: past that point
+requests are queueing for a free worker instead of waiting on I/O.
+
+    cd backend
+    python -m benchmarks.bench_serving_profiles --levels 4 16 64 128 --workers 2
+"""
+import os
+import json
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+from benchmarks.synthetic import write_wav
+from benchmarks.bench_load import (
+    RESULTS_DIR, Fakes, GunicornServer, Traffic, app_environment, run_phase, wait_healthy
+)
+
+
+def warm_up(traffic, fakes, count):
+    for i in range(count):
+        user_id = traffic.next_user()
+        response = traffic.upload(f"cached-{i}", user_id)
+        if response.status_code != 200:
+            raise RuntimeError(f"Warm-up upload failed: {response.status_code} {response.text[:200]}")
+        row = next(r for r in fakes.postgrest.tables["video_url"]
+                   if r["user_id"] == user_id and r["video_url"].endswith(f"cached-{i}"))
+        traffic.cached_videos.append((user_id, f"cached-{i}", row["id"]))
+
+
+def run_profile(profile, args, port, audio_dir):
+    fake_args = SimpleNamespace(groq_latency=args.groq_latency, groq_429=0.0,
+                                translate_latency=0.01, supabase_latency=args.supabase_latency)
+    fakes = Fakes(fake_args, audio_dir)
+    env = dict(app_environment(fakes), GUNICORN_PROFILE=profile,
+               WEB_CONCURRENCY=str(args.workers), GUNICORN_THREADS=str(args.threads))
+    server = GunicornServer(env, port, "gunicorn_config.py")
+    levels = []
+    try:
+        wait_healthy(server.url)
+        traffic = Traffic(server.url, "es")
+        warm_up(traffic, fakes, args.cached_videos)
+        for concurrency in args.levels:
+            result = run_phase(f"{profile}@{concurrency}", traffic.dashboard, max(args.requests, concurrency * 2),
+                               concurrency, fakes, seed=concurrency)
+            levels.append(result)
+            print(f"{profile:>8} c={concurrency:<5} err={result['errors']:<4} "
+                  f"{result['throughput_rps']:8.2f} req/s  p95={result['latency_sec']['p95']:.3f}s")
+    finally:
+        server.stop()
+        fakes.stop()
+    return levels
+
+
+def capacity(levels, slo):
+    baseline = levels[0]["latency_sec"]["p95"]
+    best = None
+    for result in levels:
+        if result["errors"] or result["latency_sec"]["p95"] > baseline * slo:
+            break
+        best = result["concurrency"]
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare gunicorn worker profiles under concurrent I/O-bound load")
+    parser.add_argument("--profiles", nargs="+", default=["sync", "gthread"])
+    parser.add_argument("--levels", type=int, nargs="+", default=[4, 16, 64, 128])
+    parser.add_argument("--workers", type=int, default=2, help="WEB_CONCURRENCY for every profile")
+    parser.add_argument("--threads", type=int, default=64, help="GUNICORN_THREADS for gthread")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per level (at least 2x the level)")
+    parser.add_argument("--cached-videos", type=int, default=3)
+    parser.add_argument("--supabase-latency", type=float, default=0.05)
+    parser.add_argument("--groq-latency", type=float, default=0.2)
+    parser.add_argument("--slo", type=float, default=3.0, help="Allowed p95 growth over the lowest level")
+    parser.add_argument("--port", type=int, default=5098)
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/profiles-<timestamp>.json)")
+    args = parser.parse_args()
+
+    audio_dir = tempfile.mkdtemp(prefix="profiles_audio_")
+    write_wav(60, os.path.join(audio_dir, "template.wav"), sample_rate=16000, channels=1)
+    report = {"created_at": datetime.utcnow().isoformat(), "config": vars(args), "profiles": {}}
+    try:
+        for offset, profile in enumerate(args.profiles):
+            levels = run_profile(profile, args, args.port + offset, audio_dir)
+            report["profiles"][profile] = {"levels": levels, "capacity": capacity(levels, args.slo)}
+    finally:
+        shutil.rmtree(audio_dir, ignore_errors=True)
+
+    print(f"\nConcurrent requests served within {args.slo}x the low-load p95:")
+    for profile, result in report["profiles"].items():
+        print(f"{profile:>8}  {result['capacity'] or 'none'}")
+    output = args.output or os.path.join(RESULTS_DIR, f"profiles-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Cold-start benchmark for the backend.
+
+Measures, over --repeat fresh interpreter runs:
+
+  import_sec         total `python -X importtime -c "import server"` time
+                     (cumulative time of the server module), plus the
+                     slowest top-level imports
+  first_health_sec   time from launching `python server.py` until /health
+                     first answers 200
+
+The app is pointed at an unreachable Supabase URL so nothing leaves the
+machine; startup must not depend on it. Results are written as JSON;
+--compare prints the change against an earlier result file.
+
+    cd backend
+    python -m benchmarks.bench_startup --repeat 5
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+from datetime import datetime
+
+import requests
+
+from benchmarks.bench_load import BACKEND_DIR, RESULTS_DIR, FAKE_SUPABASE_KEY
+
+STARTUP_ENV = {
+    "SUPABASE_URL": "http://127.0.0.1:9",
+    "SUPABASE_KEY": FAKE_SUPABASE_KEY,
+    "GROQ_API_KEY": "gsk_fake",
+}
+
+
+def parse_importtime(stderr):
+    """Return (server cumulative seconds, {top-level module: cumulative seconds})."""
+    total = None
+    top_level = {}
+    for line in stderr.splitlines():
+        parts = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(parts) != 3:
+            continue
+        _, cumulative_us, raw_name = parts
+        if not cumulative_us.strip().isdigit():
+            continue  # the header line
+        name = raw_name.strip()
+        # One leading space, then two more per nesting level
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if name == "server" and depth == 0:
+            total = int(cumulative_us) / 1e6
+        elif depth == 1:
+            top_level[name] = int(cumulative_us) / 1e6
+    return total, top_level
+
+
+def measure_import(env):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import server failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_health(env, timeout=60):
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "server.py"], cwd=BACKEND_DIR, env=dict(env, PORT=str(port)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if proc.poll() is not None:
+                raise RuntimeError(f"server.py exited with {proc.returncode}")
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                    return time.perf_counter() - started
+            except requests.RequestException:
+                pass
+            time.sleep(0.01)
+        raise RuntimeError("server.py did not become healthy")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-/health")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Slowest top-level imports to list")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/startup-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    env = dict(os.environ, **STARTUP_ENV)
+    imports, healths, top_levels = [], [], []
+    for _ in range(args.repeat):
+        total, top_level = measure_import(env)
+        imports.append(total)
+        top_levels.append(top_level)
+        healths.append(measure_first_health(env))
+
+    slowest = {}
+    for name in top_levels[0]:
+        slowest[name] = statistics.median(run.get(name, 0.0) for run in top_levels)
+    slowest = dict(sorted(slowest.items(), key=lambda item: -item[1])[:args.top])
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "config": {"repeat": args.repeat},
+        "import_sec": {"median": round(statistics.median(imports), 4), "min": round(min(imports), 4)},
+        "first_health_sec": {"median": round(statistics.median(healths), 4), "min": round(min(healths), 4)},
+        "slowest_imports_sec": {name: round(value, 4) for name, value in slowest.items()},
+    }
+
+    print(f"import server      median {report['import_sec']['median']:.3f}s  min {report['import_sec']['min']:.3f}s")
+    print(f"first /health 200  median {report['first_health_sec']['median']:.3f}s  "
+          f"min {report['first_health_sec']['min']:.3f}s")
+    for name, value in report["slowest_imports_sec"].items():
+        print(f"  {name:<28} {value:.3f}s")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"startup-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ("import_sec", "first_health_sec"):
+            before, after = baseline[key]["median"], report[key]["median"]
+            print(f"{key:<18} {before:.3f}s -> {after:.3f}s ({100.0 * (after - before) / before:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Throughput benchmark for the translation engines.
+
+Translates synthetic subtitle batches (default 1, 10, 100 and 1000 segments)
+with each engine through translation_engines and reports wall time,
+segments per second and the number of upstream calls. Also prints which
+engine the "auto" router would pick per batch size and latency budget.
+
+    cd backend
+    python -m benchmarks.bench_translation_engines                       # google (via FakeTranslate) + fake
+    python -m benchmarks.bench_translation_engines --engines local google --pair en es
+    python -m benchmarks.bench_translation_engines --fake-translate-latency 0.3 --budgets 0.5 2 10
+
+The Google engine runs against an in-process FakeTranslate unless
+--real-google is given (then it uses the credentials server.py loads). The
+local engine needs a converted model under LOCAL_MT_MODEL_DIR/<src>-<tgt>.
+"""
+import os
+import json
+import time
+import argparse
+
+# server.py builds its clients at import time; no requests are made here
+os.environ.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.ZmFrZQ")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the translation engines")
+    parser.add_argument("--engines", nargs="+", default=["google", "fake"])
+    parser.add_argument("--pair", nargs=2, default=["en", "es"], metavar=("SRC", "TGT"))
+    parser.add_argument("--segments", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--budgets", type=float, nargs="+", default=[0.5, 2.0, 10.0],
+                        help="Latency budgets (seconds) to show routing decisions for")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--real-google", action="store_true", help="Use the real Google client instead of FakeTranslate")
+    parser.add_argument("--fake-translate-latency", type=float, default=0.1)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    fake_translate = None
+    if not args.real_google:
+        from benchmarks.fakes import FakeTranslate
+        fake_translate = FakeTranslate(latency=args.fake_translate_latency).start()
+        os.environ["GOOGLE_TRANSLATE_ENDPOINT"] = fake_translate.url
+
+    import server  # noqa: F401  (configures the Google engine's client)
+    import translation_engines
+    from benchmarks.synthetic import synthetic_segments
+
+    source, target = args.pair
+    results = {}
+    try:
+        for name in args.engines:
+            engine = translation_engines.get_engine(name)
+            if not engine.is_available() or not engine.supports(source, target):
+                print(f"{name:<7} skipped (not available for {source}->{target})")
+                continue
+            results[name] = {}
+            for count in args.segments:
+                texts = [seg["text"] for seg in synthetic_segments(count)]
+                calls_before = sum(fake_translate.snapshot().values()) if fake_translate else 0
+                walls = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    translated = engine.translate_many(texts, source, target)
+                    walls.append(time.perf_counter() - started)
+                    assert len(translated) == count
+                calls = (sum(fake_translate.snapshot().values()) - calls_before) / args.repeat \
+                    if fake_translate and name == "google" else None
+                best = min(walls)
+                results[name][count] = {
+                    "best_sec": round(best, 5),
+                    "segments_per_sec": round(count / best, 1) if best else None,
+                    "calls_per_batch": calls,
+                    "estimated_sec": round(engine.estimate_latency(count), 5),
+                }
+                print(f"{name:<7} {count:>6} segs  best={best:9.5f}s  {count / best:10.1f} segs/s  "
+                      f"est={engine.estimate_latency(count):9.5f}s" + (f"  calls={calls:g}" if calls is not None else ""))
+
+        print(f"\nauto routing for {source}->{target}:")
+        translation_engines.TRANSLATION_ENGINE = "auto"
+        for count in args.segments:
+            picks = []
+            for budget in args.budgets:
+                candidates = translation_engines.route(source, target, count, latency_budget=budget)
+                picks.append(f"{budget:g}s->{candidates[0].name if candidates else 'none'}")
+            print(f"  {count:>6} segs  " + "  ".join(picks))
+    finally:
+        if fake_translate:
+            fake_translate.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+WSGI entry point for load tests: the real server app, with pytubefix's
+YouTube and Playlist classes swapped for ones that stream synthetic audio
+from the local AudioServer (YouTube itself can't be faked at the HTTP level).
+A fake playlist ?list=<name> holds FAKE_PLAYLIST_SIZE videos <name>000000,
+<name>000001, ...
+
+    FAKE_AUDIO_URL=http://127.0.0.1:8765 gunicorn -c gunicorn_config.py benchmarks.fake_app:app
+"""
+import os
+from urllib.parse import urlsplit, parse_qs
+
+import requests
+
+import server
+
+FAKE_AUDIO_URL = os.getenv("FAKE_AUDIO_URL", "http://127.0.0.1:8765")
+FAKE_PLAYLIST_SIZE = int(os.getenv("FAKE_PLAYLIST_SIZE", "20"))
+
+# Watch page fetches, as pytubefix does them: once per YouTube object, on first use
+metadata_fetches = 0
+
+
+def video_id_from_url(youtube_url):
+    parts = urlsplit(youtube_url)
+    return parse_qs(parts.query).get("v", [parts.path.strip("/").split("/")[-1] or "video"])[0]
+
+
+class FakeStream:
+    mime_type = "audio/wav"
+    abr = "256kbps"
+
+    def __init__(self, url):
+        self.url = url
+
+    def download(self, output_path=None, filename=None, timeout=30, interrupt_checker=None, **kwargs):
+        path = os.path.join(output_path or ".", filename or "audio.wav")
+        with requests.get(self.url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            with open(path, "wb") as f:
+                for block in response.iter_content(64 * 1024):
+                    # Same contract as pytubefix: stop quietly and return None
+                    if interrupt_checker is not None and interrupt_checker():
+                        return None
+                    f.write(block)
+        return path
+
+
+class FakeStreamQuery:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def get_audio_only(self):
+        return self.stream
+
+    def filter(self, **kwargs):
+        return self
+
+    def first(self):
+        return self.stream
+
+    def get_lowest_resolution(self):
+        return self.stream
+
+
+class FakeYouTube:
+    def __init__(self, url, on_progress_callback=None, **kwargs):
+        self.video_id = video_id_from_url(url)
+        self._fetched = False
+
+    def _fetch(self):
+        global metadata_fetches
+        if not self._fetched:
+            self._fetched = True
+            metadata_fetches += 1
+
+    @property
+    def title(self):
+        self._fetch()
+        return f"Synthetic video {self.video_id}"
+
+    @property
+    def streams(self):
+        self._fetch()
+        return FakeStreamQuery(FakeStream(f"{FAKE_AUDIO_URL}/{self.video_id}.wav"))
+
+    def register_on_progress_callback(self, func):
+        pass
+
+
+class FakePlaylist:
+    def __init__(self, url, **kwargs):
+        self.name = parse_qs(urlsplit(url).query).get("list", ["plist"])[0][:5].ljust(5, "x")
+
+    def url_generator(self):
+        for index in range(FAKE_PLAYLIST_SIZE):
+            yield f"https://www.youtube.com/watch?v={self.name}{index:06d}"
+
+
+server.YouTube = FakeYouTube
+server.Playlist = FakePlaylist
+app = server.app
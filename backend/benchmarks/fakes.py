@@ -0,0 +1,634 @@
+"""
+Local stand-ins for the external services the backend talks to.
+
+  FakeGroq       Whisper-compatible /openai/v1/audio/transcriptions and
+                 /openai/v1/chat/completions, with configurable latency and
+                 a configurable fraction of 429 responses
+  FakeTranslate  Google Translate v2 (/language/translate/v2)
+  FakePostgrest  In-memory PostgREST (/rest/v1/<table>, /rest/v1/rpc/<fn>)
+                 covering the query features supabase-py uses
+  FakeS3         S3-compatible object storage (path-style PUT/GET/HEAD/DELETE
+                 of objects, presigned GETs), a MinIO stand-in
+  AudioServer    Static file server for synthetic audio
+
+Each fake runs a ThreadingHTTPServer on 127.0.0.1 in a daemon thread and
+counts the calls it receives per route, so benchmarks can report external
+call counts.
+"""
+import os
+import re
+import json
+import time
+import random
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+
+class FakeService:
+    """Base class: owns the HTTP server thread and the per-route call counter."""
+
+    def __init__(self, latency=0.0, hang=False):
+        self.latency = latency
+        # When set, requests block until release() is called (fault injection)
+        self.hang = hang
+        self._released = threading.Event()
+        self.calls = Counter()
+        self._calls_lock = threading.Lock()
+        self.server = None
+
+    def start(self, port=0):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes: without TCP_NODELAY a
+            # small body waits out the client's delayed ACK (~40 ms)
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _dispatch(self):
+                parts = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                service._count(f"{self.command} {service.route_name(parts.path)}")
+                if service.hang:
+                    service._released.wait()
+                elif service.latency:
+                    time.sleep(service.latency)
+                status, headers, payload = service.handle(self.command, parts.path, parts.query, self.headers, body)
+                if isinstance(payload, (dict, list, int, float, str)):
+                    payload = json.dumps(payload).encode()
+                    headers.setdefault("Content-Type", "application/json")
+                payload = payload or b""
+                try:
+                    self.send_response(status)
+                    for key, value in headers.items():
+                        self.send_header(key, value)
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    if self.command != "HEAD":
+                        self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout or cancellation); nothing to answer
+                    self.close_connection = True
+
+            do_GET = do_POST = do_PATCH = do_DELETE = do_HEAD = do_PUT = _dispatch
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self.release()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def release(self):
+        self._released.set()
+
+    def _count(self, route):
+        with self._calls_lock:
+            self.calls[route] += 1
+
+    def snapshot(self):
+        with self._calls_lock:
+            return dict(self.calls)
+
+    def route_name(self, path):
+        return path
+
+    def handle(self, method, path, query, headers, body):
+        raise NotImplementedError
+
+
+# ---------- GROQ ----------
+
+class FakeGroq(FakeService):
+    """
+    Groq/OpenAI-compatible transcription and chat endpoints.
+    Point the backend at it with GROQ_BASE_URL=<url>.
+    """
+
+    def __init__(self, latency=0.0, rate_limit_fraction=0.0, segments_per_chunk=12,
+                 chunk_seconds=60, language="english", seed=0, **kwargs):
+        super().__init__(latency=latency, **kwargs)
+        self.rate_limit_fraction = rate_limit_fraction
+        self.segments_per_chunk = segments_per_chunk
+        self.chunk_seconds = chunk_seconds
+        self.language = language
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _rate_limited(self):
+        with self._random_lock:
+            return self._random.random() < self.rate_limit_fraction
+
+    def handle(self, method, path, query, headers, body):
+        if self._rate_limited():
+            self._count("429")
+            return 429, {"retry-after": "0"}, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}
+        if path.endswith("/audio/transcriptions"):
+            return 200, {}, self._transcription(body)
+        if path.endswith("/chat/completions"):
+            return 200, {}, self._completion(body)
+        return 404, {}, {"error": {"message": f"Unknown route {path}"}}
+
+    def _transcription(self, body):
+        step = self.chunk_seconds / float(self.segments_per_chunk)
+        segments = []
+        for i in range(self.segments_per_chunk):
+            segments.append({
+                "id": i, "seek": 0,
+                "start": round(i * step, 2), "end": round((i + 1) * step, 2),
+                "text": f" Synthetic segment {i} of a benchmark chunk.",
+                "tokens": [], "temperature": 0.0, "avg_logprob": -0.2,
+                "compression_ratio": 1.2, "no_speech_prob": 0.01,
+            })
+        return {
+            "task": "transcribe", "language": self.language, "duration": self.chunk_seconds,
+            "text": "".join(s["text"] for s in segments), "segments": segments,
+            "x_groq": {"id": "req_fake"},
+        }
+
+    def _completion(self, body):
+        try:
+            prompt_chars = sum(len(m.get("content", "")) for m in json.loads(body).get("messages", []))
+        except Exception:
+            prompt_chars = 0
+        content = "## Summary\n\n- A synthetic benchmark summary."
+        return {
+            "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+            "model": "llama-3.3-70b-versatile",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_chars // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": prompt_chars // 4 + len(content) // 4},
+        }
+
+
+# ---------- GOOGLE TRANSLATE ----------
+
+class FakeTranslate(FakeService):
+    """
+    Google Translate v2 endpoint. Point the backend at it with
+    GOOGLE_TRANSLATE_ENDPOINT=<url>. Translations are deterministic:
+    "[<target>] <text>".
+    """
+
+    def handle(self, method, path, query, headers, body):
+        if not path.endswith("/language/translate/v2"):
+            return 404, {}, {"error": {"message": f"Unknown route {path}"}}
+        data = json.loads(body or b"{}")
+        values = data.get("q", [])
+        if isinstance(values, str):
+            values = [values]
+        target = data.get("target", "en")
+        return 200, {}, {"data": {"translations": [
+            {"translatedText": f"[{target}] {value}", "detectedSourceLanguage": data.get("source") or "en"}
+            for value in values
+        ]}}
+
+
+# ---------- POSTGREST ----------
+
+# Natural keys used for upserts when no on_conflict is given, mirroring the
+# unique constraints of the Supabase schema.
+DEFAULT_CONFLICT_KEYS = {
+    "video_url": ("video_url", "user_id"),
+    "transcripts": ("video_id", "language"),
+    "subtitles": ("video_id", "language"),
+    "summaries": ("video_id",),
+    "user_analytics": ("user_id",),
+    "daily_usage_stats": ("user_id", "date"),
+    "api_usage_daily": ("user_id", "date"),
+}
+
+
+def _coerce(raw, sample):
+    """Convert a filter literal to the type of the stored value it is compared with."""
+    if raw == "null":
+        return None
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, int):
+        try:
+            return int(raw)
+        except ValueError:
+            return raw
+    if isinstance(sample, float):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+
+def _split_top_level(text):
+    """Split 'a,b(c,d),e' on commas that are not inside parentheses or quotes."""
+    parts, depth, current, quoted = [], 0, "", False
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _match_operator(value, operator, raw):
+    negate = operator.startswith("not.")
+    if negate:
+        operator = operator[4:]
+    if operator == "in":
+        options = [o.strip('"') for o in _split_top_level(raw.strip("()"))]
+        result = value in [_coerce(o, value) for o in options]
+    elif operator == "is":
+        result = value is None if raw == "null" else value == (raw == "true")
+    else:
+        target = _coerce(raw, value)
+        if value is None or target is None:
+            result = operator == "eq" and value is target
+        elif operator == "eq":
+            result = value == target
+        elif operator == "neq":
+            result = value != target
+        elif operator == "gt":
+            result = value > target
+        elif operator == "gte":
+            result = value >= target
+        elif operator == "lt":
+            result = value < target
+        elif operator == "lte":
+            result = value <= target
+        elif operator in ("like", "ilike"):
+            pattern = "^" + re.escape(raw).replace("\\*", ".*").replace("%", ".*") + "$"
+            flags = re.IGNORECASE if operator == "ilike" else 0
+            result = re.match(pattern, str(value), flags) is not None
+        elif operator == "cs":
+            result = set(json.loads(raw.replace("{", "[").replace("}", "]"))) <= set(value or [])
+        else:
+            raise ValueError(f"Unsupported operator {operator}")
+    return not result if negate else result
+
+
+def _logic_predicate(expression, conjunction):
+    """Build a predicate for or=(...)/and=(...) expressions, nesting allowed."""
+    terms = []
+    for term in _split_top_level(expression.strip()[1:-1]):
+        if term.startswith(("or(", "and(")):
+            inner = term[term.index("("):]
+            terms.append(_logic_predicate(inner, term.split("(")[0]))
+        else:
+            column, operator_and_value = term.split(".", 1)
+            if operator_and_value.startswith("not."):
+                op, raw = operator_and_value[4:].split(".", 1)
+                op = "not." + op
+            else:
+                op, raw = operator_and_value.split(".", 1)
+            if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+                raw = raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+            terms.append(lambda row, c=column, o=op, r=raw: _match_operator(row.get(c), o, r))
+    if conjunction == "or":
+        return lambda row: any(t(row) for t in terms)
+    return lambda row: all(t(row) for t in terms)
+
+
+# SQL functions of backend/migrations, reimplemented over the in-memory tables.
+# Each takes (fake, payload) and returns the JSON PostgREST would.
+
+def _user_content_stats(fake, user_id):
+    tables = fake.tables
+    subtitles = [r for r in tables["subtitles"] if r.get("user_id") == user_id]
+    return {
+        "videos_processed": sum(1 for r in tables["video_url"] if r.get("user_id") == user_id),
+        "summaries_generated": sum(1 for r in tables["summaries"] if r.get("user_id") == user_id),
+        "subtitles_generated": len(subtitles),
+        "languages_used": sorted({r["language"] for r in subtitles if r.get("language")}),
+    }
+
+
+def _rpc_user_content_stats(fake, payload):
+    return [_user_content_stats(fake, payload["p_user_id"])]
+
+
+def _rpc_sync_user_analytics(fake, payload):
+    now = datetime.utcnow().isoformat()
+    for user_id in payload["p_user_ids"]:
+        stats = dict(_user_content_stats(fake, user_id), last_activity=now)
+        row = next((r for r in fake.tables["user_analytics"] if r["user_id"] == user_id), None)
+        if row is None:
+            fake._insert_row("user_analytics", dict(stats, user_id=user_id, total_processing_time=0))
+        else:
+            row.update(stats)
+    return len(payload["p_user_ids"])
+
+
+def _rpc_analytics_user_ids(fake, payload):
+    after, limit = payload.get("p_after"), payload.get("p_limit", 500)
+    users = sorted({r["user_id"] for r in fake.tables["video_url"] if after is None or r["user_id"] > after})
+    return users[:limit]
+
+
+def _rpc_record_user_activity(fake, payload):
+    user_id, activity = payload["p_user_id"], payload["p_activity_type"]
+    language, processing_time = payload.get("p_language"), payload.get("p_processing_time") or 0
+    fake._insert_row("user_activity_log", {
+        "user_id": user_id, "activity_type": activity, "video_id": payload.get("p_video_id"),
+        "language": language, "processing_time": processing_time,
+    })
+    counters = {"video_processed": ("videos_processed", "videos_count"),
+                "summary_generated": ("summaries_generated", "summaries_count"),
+                "subtitle_generated": ("subtitles_generated", "subtitles_count")}
+    total_column, daily_column = counters.get(activity, (None, None))
+
+    analytics = next((r for r in fake.tables["user_analytics"] if r["user_id"] == user_id), None)
+    if analytics is None:
+        analytics = fake._insert_row("user_analytics", {
+            "user_id": user_id, "videos_processed": 0, "summaries_generated": 0, "subtitles_generated": 0,
+            "languages_used": [], "total_processing_time": 0,
+        })
+    if total_column:
+        analytics[total_column] = analytics.get(total_column, 0) + 1
+    if language and language not in analytics["languages_used"]:
+        analytics["languages_used"] = analytics["languages_used"] + [language]
+    analytics["total_processing_time"] = analytics.get("total_processing_time", 0) + processing_time
+    analytics["last_activity"] = datetime.utcnow().isoformat()
+
+    today = datetime.utcnow().date().isoformat()
+    daily = next((r for r in fake.tables["daily_usage_stats"] if r["user_id"] == user_id and r["date"] == today), None)
+    if daily is None:
+        daily = fake._insert_row("daily_usage_stats", {
+            "user_id": user_id, "date": today, "videos_count": 0, "summaries_count": 0,
+            "subtitles_count": 0, "unique_languages": 0, "total_time": 0,
+        })
+    if daily_column:
+        daily[daily_column] += 1
+    daily["unique_languages"] = len({
+        r["language"] for r in fake.tables["user_activity_log"]
+        if r["user_id"] == user_id and r.get("language") and r["created_at"].startswith(today)
+    })
+    daily["total_time"] += processing_time
+    return None
+
+
+def _rpc_user_dashboard(fake, payload):
+    user_id, since = payload["p_user_id"], payload["p_since"]
+    analytics = next((dict(r) for r in fake.tables["user_analytics"] if r["user_id"] == user_id), None)
+    activity = sorted((r for r in fake.tables["user_activity_log"] if r["user_id"] == user_id),
+                      key=lambda r: (r["created_at"], r["id"]), reverse=True)[:10]
+    trends = sorted((r for r in fake.tables["daily_usage_stats"] if r["user_id"] == user_id and r["date"] >= since),
+                    key=lambda r: r["date"])
+    return {
+        "analytics": analytics,
+        "recent_activity": [dict(r) for r in activity],
+        "usage_trends": [dict(r) for r in trends],
+        "period_totals": {
+            "videos": sum(r["videos_count"] for r in trends),
+            "summaries": sum(r["summaries_count"] for r in trends),
+            "subtitles": sum(r["subtitles_count"] for r in trends),
+            "processing_time": sum(r["total_time"] for r in trends),
+        },
+    }
+
+
+def _rpc_record_api_usage(fake, payload):
+    user_id, values = payload["p_user_id"], payload["p_usage"]
+    today = datetime.utcnow().date().isoformat()
+    row = next((r for r in fake.tables["api_usage_daily"] if r["user_id"] == user_id and r["date"] == today), None)
+    if row is None:
+        row = fake._insert_row("api_usage_daily", {"user_id": user_id, "date": today, "requests": 0})
+    row["requests"] += 1
+    for column, value in values.items():
+        row[column] = row.get(column, 0) + value
+    return None
+
+
+DEFAULT_RPC_FUNCTIONS = {
+    "user_content_stats": _rpc_user_content_stats,
+    "sync_user_analytics": _rpc_sync_user_analytics,
+    "analytics_user_ids": _rpc_analytics_user_ids,
+    "record_user_activity": _rpc_record_user_activity,
+    "user_dashboard": _rpc_user_dashboard,
+    "record_api_usage": _rpc_record_api_usage,
+}
+
+
+class FakePostgrest(FakeService):
+    """
+    In-memory PostgREST. Supports select with column lists, the comparison
+    filters, in/is/like, or=/and= groups, order (multi-column), limit/offset,
+    count=exact (Content-Range), insert/upsert (merge-duplicates, on_conflict),
+    update, delete and RPC functions registered in `rpc_functions` (by
+    default the analytics functions of backend/migrations; pass
+    rpc_functions={} to emulate a database without them).
+    """
+
+    def __init__(self, conflict_keys=None, rpc_functions=None, **kwargs):
+        super().__init__(**kwargs)
+        self.tables = defaultdict(list)
+        self.sequences = Counter()
+        self.conflict_keys = dict(DEFAULT_CONFLICT_KEYS, **(conflict_keys or {}))
+        self.rpc_functions = dict(DEFAULT_RPC_FUNCTIONS if rpc_functions is None else rpc_functions)
+        self.lock = threading.RLock()
+
+    def route_name(self, path):
+        return path.split("/rest/v1/")[-1]
+
+    def seed(self, table, rows):
+        with self.lock:
+            return [self._insert_row(table, dict(row)) for row in rows]
+
+    def _insert_row(self, table, row):
+        self.sequences[table] += 1
+        row.setdefault("id", self.sequences[table])
+        row.setdefault("created_at", datetime.utcnow().isoformat())
+        self.tables[table].append(row)
+        return row
+
+    def handle(self, method, path, query, headers, body):
+        name = self.route_name(path)
+        params = parse_qsl(query, keep_blank_values=True)
+        prefer = headers.get("Prefer", "")
+        payload = json.loads(body) if body else None
+        with self.lock:
+            if name.startswith("rpc/"):
+                function = self.rpc_functions.get(name[4:])
+                if function is None:
+                    # What PostgREST answers for a function missing from its schema cache
+                    return 404, {}, {"code": "PGRST202", "details": None, "hint": None,
+                                     "message": f"Could not find the function public.{name[4:]} in the schema cache"}
+                return 200, {}, function(self, payload or {})
+            if method in ("GET", "HEAD"):
+                return self._select(name, params, prefer)
+            if method == "POST":
+                return self._insert(name, params, prefer, payload)
+            if method == "PATCH":
+                return self._update(name, params, payload)
+            if method == "DELETE":
+                return self._delete(name, params)
+        return 405, {}, {"message": "method not allowed"}
+
+    def _filters(self, params):
+        predicates = []
+        for key, value in params:
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                continue
+            if key in ("or", "and"):
+                predicates.append(_logic_predicate(value, key))
+                continue
+            operator, _, raw = value.partition(".")
+            if operator == "not":
+                op, _, raw = raw.partition(".")
+                operator = "not." + op
+            predicates.append(lambda row, c=key, o=operator, r=unquote(raw): _match_operator(row.get(c), o, r))
+        return predicates
+
+    def _matching(self, table, params):
+        predicates = self._filters(params)
+        return [row for row in self.tables[table] if all(p(row) for p in predicates)]
+
+    def _project(self, rows, params):
+        select = dict(params).get("select", "*")
+        if select == "*":
+            return [dict(row) for row in rows]
+        columns = [c.strip() for c in select.split(",")]
+        return [{c: row.get(c) for c in columns} for row in rows]
+
+    def _select(self, table, params, prefer):
+        rows = self._matching(table, params)
+        total = len(rows)
+        order = dict(params).get("order")
+        if order:
+            for clause in reversed(order.split(",")):
+                bits = clause.split(".")
+                desc = "desc" in bits[1:]
+                rows.sort(key=lambda r: (r.get(bits[0]) is None, r.get(bits[0])), reverse=desc)
+        offset = int(dict(params).get("offset", 0))
+        limit = dict(params).get("limit")
+        rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+        headers = {}
+        if "count=" in prefer:
+            end = offset + len(rows) - 1
+            headers["Content-Range"] = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+        return 200, headers, self._project(rows, params)
+
+    def _insert(self, table, params, prefer, payload):
+        rows = payload if isinstance(payload, list) else [payload]
+        merge = "resolution=merge-duplicates" in prefer
+        on_conflict = dict(params).get("on_conflict")
+        keys = tuple(on_conflict.split(",")) if on_conflict else self.conflict_keys.get(table)
+        written = []
+        for row in rows:
+            existing = None
+            if merge and keys and all(k in row for k in keys):
+                existing = next((r for r in self.tables[table] if all(r.get(k) == row[k] for k in keys)), None)
+            if existing is not None:
+                existing.update(row)
+                written.append(existing)
+            else:
+                written.append(self._insert_row(table, dict(row)))
+        return 201, {}, [dict(r) for r in written] if "return=representation" in prefer else b""
+
+    def _update(self, table, params, payload):
+        rows = self._matching(table, params)
+        for row in rows:
+            row.update(payload or {})
+        return 200, {}, [dict(r) for r in rows]
+
+    def _delete(self, table, params):
+        rows = self._matching(table, params)
+        self.tables[table] = [r for r in self.tables[table] if r not in rows]
+        return 200, {}, [dict(r) for r in rows]
+
+
+# ---------- S3 ----------
+
+class FakeS3(FakeService):
+    """
+    Path-style S3 object storage: /<bucket>/<key>. Signatures are not
+    checked; presigned GETs honour response-content-type and
+    response-content-disposition. Objects are kept with their
+    Content-Type and Content-Encoding in `objects` ((bucket, key) -> dict).
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.objects = {}
+        self._objects_lock = threading.Lock()
+
+    def route_name(self, path):
+        return "object"
+
+    def handle(self, method, path, query, headers, body):
+        bucket, _, key = unquote(path).lstrip("/").partition("/")
+        with self._objects_lock:
+            if method == "PUT":
+                self.objects[(bucket, key)] = {
+                    "body": body,
+                    "content_type": headers.get("Content-Type") or "binary/octet-stream",
+                    "content_encoding": headers.get("Content-Encoding"),
+                }
+                return 200, {"ETag": '"fake"'}, b""
+            if method == "DELETE":
+                self.objects.pop((bucket, key), None)
+                return 204, {}, b""
+            stored = self.objects.get((bucket, key))
+        if stored is None:
+            error = f"<Error><Code>NoSuchKey</Code><Key>{key}</Key></Error>"
+            return 404, {"Content-Type": "application/xml"}, error.encode()
+        params = dict(parse_qsl(query))
+        response_headers = {"Content-Type": params.get("response-content-type", stored["content_type"]),
+                            "ETag": '"fake"'}
+        if stored["content_encoding"]:
+            response_headers["Content-Encoding"] = stored["content_encoding"]
+        if "response-content-disposition" in params:
+            response_headers["Content-Disposition"] = params["response-content-disposition"]
+        # HEAD: the dispatcher reports the body's length but does not send it
+        return 200, response_headers, stored["body"]
+
+
+# ---------- STATIC AUDIO ----------
+
+class AudioServer(FakeService):
+    """
+    Serves files from `root` (synthetic audio standing in for YouTube streams).
+    Unknown names fall back to `default_file` when given, so every fake video
+    id resolves to some audio.
+    """
+
+    def __init__(self, root, default_file=None, **kwargs):
+        super().__init__(**kwargs)
+        self.root = root
+        self.default_file = default_file
+
+    def route_name(self, path):
+        return "audio"
+
+    def handle(self, method, path, query, headers, body):
+        file_path = os.path.join(self.root, os.path.basename(unquote(path)))
+        if not os.path.isfile(file_path) and self.default_file:
+            file_path = os.path.join(self.root, self.default_file)
+        if not os.path.isfile(file_path):
+            return 404, {}, b"not found"
+        with open(file_path, "rb") as f:
+            return 200, {"Content-Type": "audio/wav"}, f.read()
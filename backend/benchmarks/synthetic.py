@@ -0,0 +1,83 @@
+"""
+Synthetic fixtures shared by the benchmark scripts.
+
+Audio is generated with NumPy (a few tones plus noise, so encoders can't
+cheat on silence) and written as 16-bit WAV; segment lists mimic the
+verbose_json segments returned by Whisper.
+"""
+import os
+import random
+import tempfile
+import wave
+
+import numpy as np
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while our speaker explains how "
+    "subtitles translation summary video audio model chunk language network "
+    "latency throughput cache request response worker process thread"
+).split()
+
+
+def synthetic_pcm(seconds, sample_rate=44100, channels=2, seed=0):
+    """Return int16 PCM samples shaped (frames, channels)."""
+    rng = np.random.default_rng(seed)
+    frames = int(seconds * sample_rate)
+    t = np.arange(frames, dtype=np.float32) / sample_rate
+    signal = (
+        0.30 * np.sin(2 * np.pi * 220.0 * t)
+        + 0.15 * np.sin(2 * np.pi * 440.0 * t + 0.5)
+        + 0.05 * rng.standard_normal(frames).astype(np.float32)
+    )
+    pcm = (np.clip(signal, -1.0, 1.0) * 32767).astype(np.int16)
+    return np.repeat(pcm[:, None], channels, axis=1)
+
+
+def write_wav(seconds, path=None, sample_rate=44100, channels=2, seed=0, block_sec=600):
+    """
+    Write a synthetic WAV file of the given length and return its path.
+    Long files are generated in blocks so a 3 h fixture doesn't need 3 h of
+    float32 samples in memory at once.
+    """
+    if path is None:
+        handle = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+        handle.close()
+        path = handle.name
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        remaining = seconds
+        block = 0
+        while remaining > 0:
+            length = min(block_sec, remaining)
+            wav.writeframes(synthetic_pcm(length, sample_rate, channels, seed + block).tobytes())
+            remaining -= length
+            block += 1
+    return path
+
+
+def synthetic_segments(count, seed=0, avg_duration=4.0):
+    """Return a Whisper-style list of segment dicts with increasing timestamps."""
+    rng = random.Random(seed)
+    segments = []
+    start = 0.0
+    for i in range(count):
+        duration = max(0.5, rng.gauss(avg_duration, 1.0))
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 16)))
+        segments.append({
+            "id": i,
+            "start": round(start, 2),
+            "end": round(start + duration, 2),
+            "text": f" {text.capitalize()}.",
+        })
+        start += duration + rng.uniform(0.0, 0.4)
+    return segments
+
+
+def remove_quietly(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
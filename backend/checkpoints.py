@@ -0,0 +1,111 @@
+"""
+Chunk-level transcription checkpoints.
+
+Each chunk's segments are written to disk as soon as the chunk finishes, so a
+run killed by the worker timeout (or with failed chunks) resumes by
+transcribing only the chunks that are missing.
+
+Layout: CHECKPOINT_FOLDER/<source digest>/<engine>_<language>_<start ms>-<end ms>.json
+The source digest is a SHA-256 of the decoded 16 kHz PCM, so the same audio
+matches whether it was uploaded or downloaded again. The detected source
+language is kept next to the chunks (language.json) so a resumed run doesn't
+detect it again. Checkpoints live on the local disk of the instance; stale
+ones are purged after CHECKPOINT_TTL_SEC.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+
+CHECKPOINT_FOLDER = os.getenv("CHECKPOINT_FOLDER", "checkpoints")
+CHECKPOINT_TTL_SEC = int(os.getenv("CHECKPOINT_TTL_SEC", str(7 * 24 * 3600)))
+# How often open_store() sweeps expired checkpoint folders
+PURGE_INTERVAL_SEC = 3600
+
+_last_purge = 0
+_purge_lock = threading.Lock()
+
+
+def pcm_digest(pcm, block_size=1024 * 1024):
+    """SHA-256 of a PCMBuffer's samples (hashlib releases the GIL on large blocks)."""
+    digest = hashlib.sha256()
+    with open(pcm.path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CheckpointStore:
+    """Checkpoints of one audio source."""
+
+    def __init__(self, source_digest, root=CHECKPOINT_FOLDER):
+        self.path = os.path.join(root, source_digest)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _chunk_file(self, engine_name, language, start_sec, end_sec):
+        return os.path.join(self.path, f"{engine_name}_{language}_{int(start_sec * 1000)}-{int(end_sec * 1000)}.json")
+
+    def _write(self, path, data):
+        # Write then rename, so a killed worker never leaves a partial checkpoint
+        # (and recreate the folder: a concurrent run of the same audio may have cleared it)
+        os.makedirs(self.path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logging.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+
+    def load_chunk(self, engine_name, language, start_sec, end_sec):
+        """Segments of a finished chunk, or None if it still has to be transcribed."""
+        return self._read(self._chunk_file(engine_name, language, start_sec, end_sec))
+
+    def save_chunk(self, engine_name, language, start_sec, end_sec, segments):
+        self._write(self._chunk_file(engine_name, language, start_sec, end_sec), segments)
+
+    def load_language(self):
+        data = self._read(os.path.join(self.path, "language.json"))
+        return data.get("language") if data else None
+
+    def save_language(self, language):
+        self._write(os.path.join(self.path, "language.json"), {"language": language})
+
+    def clear(self):
+        """Drop the checkpoints once the full transcript is stored."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def purge_expired(root=CHECKPOINT_FOLDER, max_age=CHECKPOINT_TTL_SEC):
+    """Remove checkpoint folders not touched for max_age seconds."""
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+
+def open_store(pcm):
+    """Return the CheckpointStore for a decoded audio source."""
+    global _last_purge
+    with _purge_lock:
+        if time.time() - _last_purge > PURGE_INTERVAL_SEC:
+            _last_purge = time.time()
+            purge_expired()
+    return CheckpointStore(pcm_digest(pcm))
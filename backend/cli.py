@@ -0,0 +1,354 @@
+"""
+Command-line batch processing with the server pipeline, without Flask.
+
+Reads inputs, one per line, from files or stdin: YouTube video URLs,
+playlist or channel URLs (expanded to their videos) or local audio/video
+files. Blank lines and lines starting with # are skipped. Each input runs
+the /upload pipeline of server.py: download, decode and chunk, parallel
+transcription (resumable from checkpoints), summary and translation into
+every --language. --jobs inputs run at once.
+
+Results are cached on disk under --cache-dir (default CLI_CACHE_FOLDER),
+per video: the transcript, the summaries and each language's SRT. A rerun
+only does what is missing, so an interrupted backfill is simply started
+again. Outputs go to <--output-dir>/<video>/: original.<fmt> and
+<language>.<fmt> subtitles for every --formats (srt, vtt, json),
+summary.md, summary.<language>.md and info.json.
+
+With --user-id the results are also stored in Supabase for that user,
+like /upload does (stored transcripts, summaries and subtitles are reused
+too). Run resync_analytics.py afterwards to bring the dashboards' counters
+up to date.
+
+    cd backend
+    python cli.py urls.txt --language es,fr --jobs 4
+    cat urls.txt | python cli.py - --formats srt,vtt --action subtitles
+    python cli.py urls.txt --user-id <uuid>     # backfill Supabase
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import server
+import usage
+import downloads
+import asr_engines
+import artifact_store
+
+CLI_CACHE_FOLDER = os.getenv("CLI_CACHE_FOLDER", "cli_cache")
+CLI_OUTPUT_FOLDER = os.getenv("CLI_OUTPUT_FOLDER", "cli_output")
+# Videos taken from each playlist or channel line
+PLAYLIST_LIMIT = 5000
+
+
+class CacheEntry:
+    """Cached results of one video: <root>/<key>/transcript.json, summary*.md, subtitles/<language>.srt."""
+
+    def __init__(self, root, key):
+        self.path = os.path.join(root, key)
+
+    def _file(self, *parts):
+        return os.path.join(self.path, *parts)
+
+    def _read(self, *parts):
+        try:
+            with open(self._file(*parts), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, text, *parts):
+        path = self._file(*parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename: a killed run never leaves a truncated entry behind
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def load_transcript(self):
+        """{"language", "segments", "title"} or None."""
+        text = self._read("transcript.json")
+        return json.loads(text) if text else None
+
+    def save_transcript(self, transcript):
+        self._write(json.dumps(transcript, ensure_ascii=False), "transcript.json")
+
+    def load_summary(self, language=None):
+        return self._read(f"summary.{language}.md" if language else "summary.md")
+
+    def save_summary(self, summary, language=None):
+        self._write(summary, f"summary.{language}.md" if language else "summary.md")
+
+    def load_subtitles(self, language):
+        return self._read("subtitles", f"{language}.srt")
+
+    def save_subtitles(self, srt_text, language):
+        self._write(srt_text, "subtitles", f"{language}.srt")
+
+
+def read_inputs(sources):
+    """Non-empty, non-comment lines of the source files ("-" is stdin), in order."""
+    lines = []
+    for source in sources:
+        f = sys.stdin if source == "-" else open(source, encoding="utf-8")
+        try:
+            lines.extend(line.strip() for line in f)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def resolve_inputs(lines):
+    """
+    (key, url, path) per distinct video: the YouTube id and URL of a video,
+    or the SHA-256 and path of a local file. Playlists and channels are
+    expanded. Lines that are neither are reported and skipped.
+    """
+    inputs = []
+    seen = set()
+
+    def add(key, url, path):
+        if key not in seen:
+            seen.add(key)
+            inputs.append((key, url, path))
+
+    for line in lines:
+        if os.path.isfile(line):
+            add(server.hash_file(line), None, line)
+        elif server.youtube_video_key(line):
+            add(server.youtube_video_key(line), line, None)
+        elif "youtube.com/" in line:
+            try:
+                urls = server.expand_playlist(line, PLAYLIST_LIMIT)
+            except Exception as e:
+                print(f"skipped {line}: could not read the playlist ({e})", file=sys.stderr)
+                continue
+            for url in urls[:PLAYLIST_LIMIT]:
+                add(server.youtube_video_key(url), url, None)
+        else:
+            print(f"skipped {line}: not a YouTube URL or a file", file=sys.stderr)
+    return inputs
+
+
+def stored_subtitles(video_id, languages):
+    """{language: SRT} of the video's subtitles stored in Supabase for `languages`."""
+    query = server.get_supabase().table("subtitles").select(f"language, {server.artifact_columns('srt')}").eq(
+        "video_id", video_id).in_("language", languages).execute()
+    found = {}
+    for row in query.data or []:
+        try:
+            found[row["language"]] = server.artifact_content(row, "srt")
+        except artifact_store.ArtifactNotFound:
+            pass
+    return found
+
+
+def process(key, url, path, args, cache):
+    """
+    Run the pipeline for one input, skipping what the cache (or, with
+    --user-id, Supabase) already holds, and write its outputs. With --user-id,
+    whatever Supabase lacks is stored there too.
+    Returns (output directory, what was done).
+    """
+    entry = CacheEntry(cache, key)
+    user_id = args.user_id
+    subtitles_wanted = args.action in ("subtitles", "both")
+    summary_wanted = args.action in ("summarize", "both")
+    done = []
+    yt = None
+    video_id = None
+    stored = {"transcript": None, "summary": None, "subtitles": {}}
+    if user_id:
+        yt = server.open_youtube(url) if url else None
+        video_id = server.get_or_create_video_id(url, user_id, is_uploaded=path is not None, file_hash=key, yt=yt)
+        language, text = server.find_transcript(video_id, args.source_language)
+        if text:
+            stored["transcript"] = {"language": language, "segments": json.loads(text), "title": None}
+        if summary_wanted:
+            stored["summary"] = server.get_summary(video_id)
+        if subtitles_wanted:
+            stored["subtitles"] = stored_subtitles(video_id, args.languages)
+
+    transcript = entry.load_transcript() or stored["transcript"]
+    if transcript is None:
+        audio = path
+        if url:
+            yt = yt or server.open_youtube(url)
+            audio = server.download_audio(url, yt)
+        try:
+            segments, language, complete = server.generate_subtitles_async(
+                audio, language_hint=args.source_language, asr_engine=args.asr_engine)
+        finally:
+            if url:
+                server.cleanup_download(audio)
+        if not complete:
+            raise Exception("transcript incomplete, some chunks failed: run again to resume from the checkpoints")
+        title = server.get_youtube_title(url, yt) if url else os.path.basename(path)
+        transcript = {"language": language, "segments": segments, "title": title}
+        done.append("transcribed")
+    else:
+        usage.record(cache_hits=1, cached_audio_seconds=max((seg["end"] for seg in transcript["segments"]), default=0))
+    entry.save_transcript(transcript)
+    segments = transcript["segments"]
+    source_language = transcript["language"]
+    if user_id and stored["transcript"] is None:
+        server.upsert_transcript(video_id, source_language, segments, user_id)
+
+    summary = None
+    if summary_wanted:
+        summary = entry.load_summary() or stored["summary"]
+        if summary is None:
+            summary = server.summarize_segments(segments)
+            done.append("summarized")
+        entry.save_summary(summary)
+        if user_id and not stored["summary"]:
+            server.upsert_summary(video_id, summary, user_id)
+
+    subtitles = {}
+    summaries = {}
+    for language in args.languages:
+        if subtitles_wanted:
+            srt_text = entry.load_subtitles(language) or stored["subtitles"].get(language)
+            if srt_text is not None:
+                subtitles[language] = srt_text
+        if summary_wanted:
+            text = entry.load_summary(language)
+            if text is not None:
+                summaries[language] = text
+    missing = {language: ("both" if subtitles_wanted and summary_wanted and language not in subtitles
+                          and language not in summaries else "subtitles" if language not in subtitles else "summarize")
+               for language in args.languages
+               if (subtitles_wanted and language not in subtitles) or (summary_wanted and language not in summaries)}
+    failed = {}
+    # One translate_variants call per kind of work, so a language only missing its summary keeps its subtitles
+    for action in ("both", "subtitles", "summarize"):
+        languages = [language for language, needed in missing.items() if needed == action]
+        if not languages:
+            continue
+        for language, variant in server.translate_variants(segments, summary, languages, source_language, action).items():
+            if "error" in variant:
+                failed[language] = variant["error"]
+                continue
+            subtitles.setdefault(language, variant.get("translated_subtitles"))
+            summaries.setdefault(language, variant.get("translated_summary"))
+    if len(missing) > len(failed):
+        done.append(f"translated {','.join(language for language in missing if language not in failed)}")
+    subtitles = {language: srt_text for language, srt_text in subtitles.items() if srt_text is not None}
+    summaries = {language: text for language, text in summaries.items() if text is not None}
+    for language, srt_text in subtitles.items():
+        entry.save_subtitles(srt_text, language)
+    for language, text in summaries.items():
+        entry.save_summary(text, language)
+    if user_id:
+        server.upsert_subtitles(video_id, {language: srt_text for language, srt_text in subtitles.items()
+                                           if language not in stored["subtitles"]}, user_id)
+
+    output = os.path.join(args.output_dir, output_name(key, url, path))
+    write_outputs(output, transcript, subtitles, summary, summaries, args.formats)
+    info = {"source": url or os.path.abspath(path), "title": transcript.get("title"),
+            "source_language": source_language, "languages": args.languages, "video_id": video_id,
+            "duration_sec": max((seg["end"] for seg in segments), default=0)}
+    with open(os.path.join(output, "info.json"), "w", encoding="utf-8") as f:
+        json.dump(info, f, ensure_ascii=False, indent=2)
+    if failed:
+        # What did translate is cached and written; a rerun only retries these languages
+        raise Exception(f"translation into {', '.join(failed)} failed: {next(iter(failed.values()))}")
+    return output, done
+
+
+def output_name(key, url, path):
+    if url:
+        return key
+    stem = downloads.safe_filename(os.path.splitext(os.path.basename(path))[0], "file")
+    return f"{stem}_{key[:8]}"
+
+
+def write_outputs(output, transcript, subtitles, summary, summaries, formats):
+    os.makedirs(output, exist_ok=True)
+    # The untranslated transcript as subtitles, next to the translations
+    tracks = {"original": server.format_srt(transcript["segments"]), **subtitles}
+    for name, srt_text in tracks.items():
+        for fmt in formats:
+            with open(os.path.join(output, f"{name}.{fmt}"), "w", encoding="utf-8") as f:
+                f.write(downloads.render_subtitles(srt_text, fmt))
+    if summary is not None:
+        with open(os.path.join(output, "summary.md"), "w", encoding="utf-8") as f:
+            f.write(summary)
+    for language, text in summaries.items():
+        with open(os.path.join(output, f"summary.{language}.md"), "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Transcribe, summarize and translate many videos with the server pipeline")
+    parser.add_argument("sources", nargs="*", default=["-"],
+                        help="Files listing the inputs, one per line ('-' or nothing: stdin)")
+    parser.add_argument("--language", default="en", help="Target language(s), comma-separated")
+    parser.add_argument("--action", choices=("subtitles", "summarize", "both"), default="both")
+    parser.add_argument("--source-language", help="Spoken language (detected when omitted)")
+    parser.add_argument("--asr-engine", help=f"auto, {', '.join(asr_engines.ENGINES)} (default: ASR_ENGINE)")
+    parser.add_argument("--jobs", type=int, default=2, help="Inputs processed at once")
+    parser.add_argument("--formats", default="srt,vtt,json", help=f"Subtitle formats: {', '.join(downloads.SUBTITLE_FORMATS)}")
+    parser.add_argument("--output-dir", default=CLI_OUTPUT_FOLDER)
+    parser.add_argument("--cache-dir", default=CLI_CACHE_FOLDER)
+    parser.add_argument("--user-id", help="Also store the results in Supabase for this user")
+    parser.add_argument("--verbose", action="store_true", help="Show the pipeline's log on stderr")
+    args = parser.parse_args()
+
+    args.languages = server.parse_target_languages(args.language)
+    args.formats = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    source_language = asr_engines.language_code(args.source_language)
+    if args.source_language and not source_language:
+        parser.error(f"unsupported --source-language '{args.source_language}'")
+    args.source_language = source_language
+    if not args.languages or len(args.languages) > server.MAX_TARGET_LANGUAGES:
+        parser.error(f"give between 1 and {server.MAX_TARGET_LANGUAGES} target languages")
+    if args.asr_engine and args.asr_engine != "auto" and args.asr_engine not in asr_engines.ENGINES:
+        parser.error(f"unknown --asr-engine '{args.asr_engine}'")
+    unknown = [fmt for fmt in args.formats if fmt not in downloads.SUBTITLE_FORMATS]
+    if unknown or not args.formats:
+        parser.error(f"--formats takes {', '.join(downloads.SUBTITLE_FORMATS)}")
+    if args.user_id and not server.check_user_exists(args.user_id):
+        parser.error("--user-id must be a UUID")
+    if args.verbose:
+        # server.py logs to server.log; show the pipeline's progress here too
+        logging.getLogger().addHandler(logging.StreamHandler())
+
+    inputs = resolve_inputs(read_inputs(args.sources))
+    print(f"{len(inputs)} inputs, {args.jobs} at a time, languages {','.join(args.languages)}", file=sys.stderr)
+    started = time.perf_counter()
+    failed = 0
+    print_lock = threading.Lock()
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {executor.submit(process, key, url, path, args, args.cache_dir): url or path
+                   for key, url, path in inputs}
+        for number, future in enumerate(as_completed(futures), start=1):
+            source = futures[future]
+            try:
+                output, done = future.result()
+                line = f"[{number}/{len(inputs)}] ok     {source} -> {output} ({', '.join(done) or 'cached'})"
+            except Exception as e:
+                failed += 1
+                logging.error(f"CLI processing of {source} failed: {e}")
+                line = f"[{number}/{len(inputs)}] failed {source}: {e}"
+            with print_lock:
+                print(line, flush=True)
+
+    totals = usage.process_totals.snapshot()
+    print(f"{len(inputs) - failed} done, {failed} failed in {time.perf_counter() - started:.0f}s; "
+          f"{totals['asr_audio_seconds'] / 60:.0f} min transcribed, {totals['llm_tokens_in'] + totals['llm_tokens_out']} LLM tokens, "
+          f"{totals['translate_characters']} characters translated, about ${totals['cost_usd']:.2f}", file=sys.stderr)
+    server.audio_pool.shutdown_pool()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
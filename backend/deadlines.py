@@ -0,0 +1,174 @@
+"""
+Request deadlines and cooperative cancellation.
+
+Each /upload runs under a Deadline: REQUEST_BUDGET_SEC from the start of the
+request, cut short if the client disconnects. gunicorn_config.py sets the
+budget from the serving profile: under the sync worker timeout, or long
+enough for long videos with gthread workers, which a slow request doesn't
+get killed for. Pipeline stages narrow it further with stage(), so one slow
+stage can't eat the whole budget, and pass remaining() on as the timeout of
+their outbound calls.
+
+Code checks the current deadline at safe points (before each chunk, LLM call
+or translation batch) with check(), which raises Cancelled. Cancelled derives
+from BaseException, like asyncio.CancelledError, so the pipeline's
+"except Exception" fallbacks don't swallow it. Worker threads see the
+deadline when the context is propagated to them (contextvars.copy_context).
+"""
+import os
+import time
+import socket
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+# Default: stay below gunicorn's 120 s sync timeout so the worker answers instead of being killed
+REQUEST_BUDGET_SEC = float(os.getenv("REQUEST_BUDGET_SEC", "110"))
+
+# Upper bound for each stage, in seconds; the request deadline still applies.
+# Transcription takes whatever the request budget leaves after summary and translation.
+STAGE_BUDGETS = {
+    "download": float(os.getenv("DOWNLOAD_BUDGET_SEC", "60")),
+    "transcribe": float(os.getenv("TRANSCRIBE_BUDGET_SEC", str(max(REQUEST_BUDGET_SEC - 20, 1)))),
+    "summarize": float(os.getenv("SUMMARIZE_BUDGET_SEC", "45")),
+    "translate": float(os.getenv("TRANSLATE_BUDGET_SEC", "45")),
+}
+
+# Minimum interval between client socket probes
+DISCONNECT_POLL_SEC = 0.25
+
+
+class Cancelled(BaseException):
+    """Raised at a check point once the deadline passed or the client went away."""
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _client_socket(environ):
+    # gunicorn (sync and gthread workers) and the werkzeug dev server expose the connection
+    return environ.get("gunicorn.socket") or environ.get("werkzeug.socket")
+
+
+def client_disconnected(sock):
+    """Peek at the client socket without consuming data: EOF or a reset means it is gone."""
+    try:
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except (ConnectionError, OSError):
+        return True
+
+
+class Deadline:
+    """A point in time after which work should stop, plus an explicit cancel flag."""
+
+    def __init__(self, budget_sec=None, parent=None, client_socket=None, name="request"):
+        self.name = name
+        self.parent = parent
+        expires_at = time.monotonic() + budget_sec if budget_sec is not None else None
+        if parent is not None and parent.expires_at is not None:
+            expires_at = parent.expires_at if expires_at is None else min(expires_at, parent.expires_at)
+        self.expires_at = expires_at
+        self._client_socket = client_socket
+        self._cancel_reason = None
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Seconds left, or None when unbounded."""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def timeout(self, default):
+        """Timeout for an outbound call: the default, capped by the time left."""
+        remaining = self.remaining()
+        return default if remaining is None else max(0.1, min(default, remaining))
+
+    def cancel(self, reason):
+        with self._lock:
+            if self._cancel_reason is None:
+                self._cancel_reason = reason
+                logging.info(f"Cancelling {self.name}: {reason}")
+
+    def cancel_reason(self):
+        """Why work should stop, or None if it may continue."""
+        if self._cancel_reason:
+            return self._cancel_reason
+        if self.parent is not None:
+            reason = self.parent.cancel_reason()
+            if reason:
+                return reason
+        if self.expires_at is not None and time.monotonic() >= self.expires_at:
+            self.cancel(f"{self.name} deadline exceeded")
+        elif self._client_socket is not None:
+            now = time.monotonic()
+            if now - self._last_probe >= DISCONNECT_POLL_SEC:
+                self._last_probe = now
+                if client_disconnected(self._client_socket):
+                    self.cancel("client disconnected")
+        return self._cancel_reason
+
+    def is_cancelled(self):
+        return self.cancel_reason() is not None
+
+    def check(self):
+        reason = self.cancel_reason()
+        if reason:
+            raise Cancelled(reason)
+
+
+_NO_DEADLINE = Deadline()
+_current = contextvars.ContextVar("deadline", default=_NO_DEADLINE)
+
+
+def current():
+    """The deadline of the running request (an unbounded one outside requests)."""
+    return _current.get()
+
+
+@contextmanager
+def scope(deadline):
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def stage(name):
+    """Run a pipeline stage under min(its STAGE_BUDGETS entry, the time left)."""
+    parent = current()
+    parent.check()
+    with scope(Deadline(STAGE_BUDGETS.get(name), parent=parent, name=name)) as deadline:
+        yield deadline
+
+
+def bounded(budget_sec=None, on_cancel=None):
+    """
+    Decorator for Flask views: run the view under a request Deadline tied to
+    the client connection. on_cancel(reason) builds the response when the
+    view is cancelled.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            from flask import request
+            deadline = Deadline(
+                REQUEST_BUDGET_SEC if budget_sec is None else budget_sec,
+                client_socket=_client_socket(request.environ),
+                name=request.path
+            )
+            with scope(deadline):
+                try:
+                    return view(*args, **kwargs)
+                except Cancelled as e:
+                    logging.warning(f"{request.path} cancelled: {e.reason}")
+                    return on_cancel(e.reason)
+        return wrapper
+    return decorator
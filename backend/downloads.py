@@ -0,0 +1,197 @@
+"""
+Raw file responses for subtitle and summary downloads.
+
+Subtitles are stored as SRT and rendered on the fly into the requested
+format (srt, vtt or json). Every download response carries
+
+  - the artifact's own content type and a Content-Disposition filename,
+  - a strong ETag derived from the content hash (one per encoding, since the
+    bytes differ), answered with 304 when If-None-Match matches,
+  - Cache-Control (private: downloads are requested per user),
+  - brotli or gzip when the client accepts it and the body is large enough.
+
+Compressed bodies are kept in a small LRU keyed by ETag, so repeated
+downloads of the same file are not recompressed.
+
+Artifacts in an artifact store (artifact_store.py) are served by
+artifact_response() without loading them: a redirect to a presigned URL
+when the store has one, else the stored gzip bytes streamed as they are (or
+decompressed on the fly for clients without gzip). Their ETag is derived
+from the content key, the same hash file_response() would compute.
+"""
+import os
+import re
+import gzip
+import zlib
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import srt
+import brotli
+from flask import Response
+
+DOWNLOAD_MAX_AGE_SEC = int(os.getenv("DOWNLOAD_MAX_AGE_SEC", "300"))
+# Bodies smaller than this are sent uncompressed
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESSED_CACHE_SIZE = int(os.getenv("COMPRESSED_CACHE_SIZE", "128"))
+
+# format -> (content type, file extension)
+SUBTITLE_FORMATS = {
+    "srt": ("application/x-subrip; charset=utf-8", "srt"),
+    "vtt": ("text/vtt; charset=utf-8", "vtt"),
+    "json": ("application/json", "json"),
+}
+
+_compressed = OrderedDict()
+_compressed_lock = threading.Lock()
+
+
+def _vtt_timestamp(delta):
+    total_ms = int(round(delta.total_seconds() * 1000))
+    hours, rest = divmod(total_ms, 3600 * 1000)
+    minutes, rest = divmod(rest, 60 * 1000)
+    seconds, ms = divmod(rest, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
+
+
+def render_subtitles(srt_text, fmt):
+    """Render stored SRT text as srt, vtt or json. Returns the body as a str."""
+    if fmt == "srt":
+        return srt_text
+    cues = list(srt.parse(srt_text))
+    if fmt == "vtt":
+        blocks = ["WEBVTT\n"]
+        for cue in cues:
+            blocks.append(f"{cue.index}\n{_vtt_timestamp(cue.start)} --> {_vtt_timestamp(cue.end)}\n{cue.content}\n")
+        return "\n".join(blocks)
+    if fmt == "json":
+        return json.dumps({"segments": [
+            {"index": cue.index, "start": cue.start.total_seconds(), "end": cue.end.total_seconds(), "text": cue.content}
+            for cue in cues
+        ]}, ensure_ascii=False)
+    raise ValueError(f"Unsupported subtitle format '{fmt}'. Choose from: {', '.join(SUBTITLE_FORMATS)}")
+
+
+def safe_filename(title, fallback="video"):
+    return re.sub(r'[^\w\s-]', '', title or fallback).strip()[:50] or fallback
+
+
+def content_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def _accepted_encodings(accept_encoding):
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding, size):
+    """Return "br", "gzip" or None for a body of `size` bytes."""
+    if size < COMPRESS_MIN_BYTES:
+        return None
+    accepted = _accepted_encodings(accept_encoding)
+    wildcard = accepted.get("*", 0)
+    if accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def _compress(body, encoding, etag):
+    key = (etag, encoding)
+    with _compressed_lock:
+        if key in _compressed:
+            _compressed.move_to_end(key)
+            return _compressed[key]
+    if encoding == "br":
+        data = brotli.compress(body, quality=5)
+    else:
+        data = gzip.compress(body, compresslevel=6, mtime=0)
+    with _compressed_lock:
+        _compressed[key] = data
+        while len(_compressed) > COMPRESSED_CACHE_SIZE:
+            _compressed.popitem(last=False)
+    return data
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 prescribes for If-None-Match
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def file_response(request, body, content_type, filename, max_age=DOWNLOAD_MAX_AGE_SEC):
+    """Build a cacheable, possibly compressed, download response for `body` (str or bytes)."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = content_etag(body)
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"), len(body))
+    etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Accept-Encoding, X-User-Id",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status=304, headers=headers)
+    if encoding:
+        body = _compress(body, encoding, etag)
+        headers["Content-Encoding"] = encoding
+    return Response(body, status=200, headers=headers, content_type=content_type)
+
+
+def _gunzip_blocks(blocks):
+    decompressor = zlib.decompressobj(wbits=31)
+    for block in blocks:
+        data = decompressor.decompress(block)
+        if data:
+            yield data
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+
+def artifact_response(request, store, key, content_type, filename, max_age=DOWNLOAD_MAX_AGE_SEC):
+    """Download response for an artifact in `store`, without reading it into memory."""
+    accepted = _accepted_encodings(request.headers.get("Accept-Encoding"))
+    gzip_ok = accepted.get("gzip", accepted.get("*", 0)) > 0
+    digest = key[:32]
+    etag = f'"{digest}-gzip"' if gzip_ok else f'"{digest}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={max_age}",
+        "Vary": "Accept-Encoding, X-User-Id",
+        "Content-Disposition": f'attachment; filename="{filename}"',
+    }
+    if _etag_matches(request.headers.get("If-None-Match"), etag):
+        return Response(status=304, headers=headers)
+    url = store.presigned_url(key, filename, content_type)
+    if url:
+        # The URL expires: the redirect itself must not be cached
+        return Response(status=302, headers={"Location": url, "Cache-Control": "no-store"})
+    blocks = store.open_compressed(key)
+    if gzip_ok:
+        headers["Content-Encoding"] = "gzip"
+    else:
+        blocks = _gunzip_blocks(blocks)
+    return Response(blocks, status=200, headers=headers, content_type=content_type, direct_passthrough=True)
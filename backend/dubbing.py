@@ -0,0 +1,365 @@
+"""
+Dubbing: synthesise translated segments and mix them into one audio track.
+
+Pipeline for a list of timed segments ({"start", "end", "text"}):
+
+  1. Segments are grouped into consecutive runs of about DUB_GROUP_SEC of
+     timeline and the groups are rendered in parallel on the audio process
+     pool (audio_pool.get_pool()).
+  2. In the worker, every segment is synthesised by a TTS engine, resampled to
+     DUB_SAMPLE_RATE and time-stretched (WSOLA, pitch kept) to fit its
+     segment window, speeding up by at most DUB_MAX_STRETCH; anything still too
+     long is cut with a short fade. The group's clips are then mixed into one
+     buffer with a single vectorised overlap-add (np.bincount).
+  3. The request process adds the group buffers into the output track in
+     timeline order and streams finished samples to a raw PCM file, so only a
+     few groups are ever held in memory, however long the video.
+  4. The PCM file is encoded once (audio_pool.encode_pcm).
+
+TTS engines:
+  espeak  espeak-ng (or espeak) command line, offline. apt install espeak-ng
+  tone    deterministic synthetic "speech" (voiced tones shaped per word), for
+          tests and benchmarks; always available
+
+DUB_TTS_ENGINE picks the default engine.
+"""
+import os
+import io
+import re
+import wave
+import shutil
+import hashlib
+import logging
+import subprocess
+from collections import deque
+
+import numpy as np
+
+import audio_pool
+import deadlines
+
+DUB_TTS_ENGINE = os.getenv("DUB_TTS_ENGINE", "espeak")
+DUB_SAMPLE_RATE = int(os.getenv("DUB_SAMPLE_RATE", "22050"))
+DUB_MAX_STRETCH = float(os.getenv("DUB_MAX_STRETCH", "1.5"))
+DUB_GROUP_SEC = float(os.getenv("DUB_GROUP_SEC", "30"))
+ESPEAK_WPM = int(os.getenv("ESPEAK_WPM", "170"))
+
+# WSOLA time-stretch: Hann frames at 50% overlap, each shifted by up to
+# STRETCH_TOLERANCE samples to line up with the previous frame's waveform
+STRETCH_HOP = 256
+STRETCH_FRAME = 2 * STRETCH_HOP
+STRETCH_TOLERANCE = 128
+FADE_SEC = 0.02
+
+
+class TTSEngine:
+    """Base class. synthesize() returns float32 mono samples in [-1, 1] at self.sample_rate."""
+
+    name = "base"
+    sample_rate = DUB_SAMPLE_RATE
+
+    def is_available(self):
+        return True
+
+    def supports(self, language):
+        """True when the engine has a voice for `language`."""
+        return True
+
+    def synthesize(self, text, language):
+        raise NotImplementedError
+
+
+class EspeakEngine(TTSEngine):
+    """espeak-ng / espeak via the command line; voices are picked by language code."""
+
+    name = "espeak"
+    sample_rate = 22050
+
+    def __init__(self, wpm=ESPEAK_WPM):
+        self.wpm = wpm
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        self._voices = None
+
+    def is_available(self):
+        return self.binary is not None
+
+    def supports(self, language):
+        if self._voices is None:
+            # "Pty Language Age/Gender VoiceName File Other Languages" rows, e.g.
+            # " 5  en-us  --/M  English_(America)  gmw/en-US  (en 2)"
+            result = subprocess.run([self.binary, "--voices"], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+            voices = set()
+            for line in result.stdout.decode(errors="replace").splitlines()[1:]:
+                fields = line.split()
+                if len(fields) < 2:
+                    continue
+                voices.add(fields[1].lower())
+                voices.update(other.lower() for other in re.findall(r"\(([\w-]+) \d+\)", line))
+            self._voices = voices
+        return (language or "en").lower() in self._voices
+
+    def synthesize(self, text, language):
+        # Text on stdin: cues such as "- Yes" would be parsed as options on the command line
+        result = subprocess.run(
+            [self.binary, "--stdout", "--stdin", "-v", language or "en", "-s", str(self.wpm)],
+            input=text.encode("utf-8"), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False
+        )
+        if result.returncode != 0 or not result.stdout:
+            raise RuntimeError(f"espeak failed ({result.returncode}): {result.stderr.decode(errors='replace').strip()}")
+        with wave.open(io.BytesIO(result.stdout)) as wav:
+            self.sample_rate = wav.getframerate()
+            frames = wav.readframes(wav.getnframes())
+        return np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+class ToneEngine(TTSEngine):
+    """Synthetic speech stand-in: one voiced tone per word, at ~14 characters per second."""
+
+    name = "tone"
+    chars_per_sec = 14.0
+
+    def synthesize(self, text, language):
+        words = text.split() or [""]
+        seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+        pitch = 110.0 + seed % 90
+        lengths = np.array([max(1, len(word) + 1) for word in words], dtype=np.float64)
+        samples = np.maximum((lengths / self.chars_per_sec * self.sample_rate).astype(np.int64), 1)
+        # Per-sample word index and position within its word, without a Python loop over samples
+        word_of = np.repeat(np.arange(len(words)), samples)
+        starts = np.concatenate(([0], np.cumsum(samples)[:-1]))
+        position = np.arange(samples.sum()) - np.repeat(starts, samples)
+        envelope = np.sin(np.pi * position / np.repeat(samples, samples)) ** 2
+        t = np.arange(samples.sum()) / self.sample_rate
+        freq = pitch * (1.0 + 0.05 * (word_of % 3))
+        signal = np.sin(2 * np.pi * freq * t) + 0.3 * np.sin(4 * np.pi * freq * t)
+        return (0.3 * envelope * signal).astype(np.float32)
+
+
+ENGINES = {
+    EspeakEngine.name: EspeakEngine,
+    ToneEngine.name: ToneEngine,
+}
+
+_instances = {}
+
+
+def get_engine(name=None):
+    """Return this process's instance of a TTS engine (workers build their own)."""
+    name = name or DUB_TTS_ENGINE
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    if name not in _instances:
+        _instances[name] = ENGINES[name]()
+    return _instances[name]
+
+
+# ---------- SIGNAL PROCESSING ----------
+
+def resample(samples, source_rate, target_rate):
+    """Linear-interpolation resample (speech only; no anti-alias filter needed at these rates)."""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    count = max(1, int(round(len(samples) * target_rate / source_rate)))
+    positions = np.arange(count) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def time_stretch(samples, rate):
+    """
+    WSOLA time-stretch: play `samples` `rate` times faster (rate > 1 shortens)
+    without changing pitch. Each output frame is taken from near its nominal
+    input position, shifted to best match the natural continuation of the
+    previous frame, so waveforms overlap in phase. The shift search is one
+    matrix-vector product per frame; gathering and overlap-adding the frames
+    is vectorised.
+    """
+    if rate == 1.0 or len(samples) < 2 * STRETCH_FRAME:
+        return samples
+    hop, frame, tolerance = STRETCH_HOP, STRETCH_FRAME, STRETCH_TOLERANCE
+    out_len = int(round(len(samples) / rate))
+    count = out_len // hop + 1
+    # Padded so every candidate and continuation slice stays in bounds; index = position + tolerance
+    padded = np.pad(samples, (tolerance, int(count * hop * rate) + 2 * tolerance + 2 * frame - len(samples) + hop))
+    positions = np.zeros(count, dtype=np.int64)
+    previous = 0
+    for k in range(1, count):
+        continuation = padded[tolerance + previous + hop:tolerance + previous + hop + frame]
+        nominal = int(k * hop * rate)
+        candidates = np.lib.stride_tricks.sliding_window_view(padded[nominal:nominal + 2 * tolerance + frame], frame)
+        previous = nominal - tolerance + int(np.argmax(candidates @ continuation))
+        positions[k] = previous
+    # Periodic Hann windows at 50% overlap sum to exactly 1
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    frames = (padded[tolerance + positions[:, None] + np.arange(frame)] * window).reshape(count, 2, hop)
+    out = np.zeros((count + 1, hop), dtype=np.float32)
+    out[:count] += frames[:, 0]
+    out[1:] += frames[:, 1]
+    return out.reshape(-1)[:out_len]
+
+
+def fit_to_window(clip, window, max_stretch=DUB_MAX_STRETCH, sample_rate=DUB_SAMPLE_RATE):
+    """Speed a clip up (at most max_stretch) to fit `window` samples; cut what still doesn't fit."""
+    if window <= 0:
+        return clip[:0]
+    if len(clip) > window:
+        clip = time_stretch(clip, min(len(clip) / window, max_stretch))
+    if len(clip) > window:
+        clip = clip[:window].copy()
+        fade = min(window, int(FADE_SEC * sample_rate))
+        clip[window - fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    return clip
+
+
+def overlap_add(clips, offsets, length):
+    """Mix clips into one float32 buffer of `length` samples, clip i starting at offsets[i]."""
+    sizes = np.array([len(clip) for clip in clips], dtype=np.int64)
+    if not sizes.sum():
+        return np.zeros(length, dtype=np.float32)
+    data = np.concatenate(clips)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    positions = np.repeat(np.asarray(offsets, dtype=np.int64) - starts, sizes) + np.arange(len(data))
+    keep = (positions >= 0) & (positions < length)
+    return np.bincount(positions[keep], weights=data[keep], minlength=length).astype(np.float32)
+
+
+# ---------- WORKER FUNCTION (runs inside the audio pool) ----------
+
+def _render_group_worker(engine_name, language, group, sample_rate, max_stretch):
+    """
+    Synthesise, fit and mix one group of segments. Returns (start sample, float32
+    buffer, failed segment count); the buffer may run past the group's last
+    segment end when a clip couldn't be shortened enough.
+    """
+    engine = get_engine(engine_name)
+    group_start = int(group[0]["start"] * sample_rate)
+    clips, offsets, failed = [], [], 0
+    for segment in group:
+        start = int(segment["start"] * sample_rate)
+        window = int(segment["end"] * sample_rate) - start
+        text = (segment.get("text") or "").strip()
+        if not text:
+            continue
+        try:
+            clip = resample(engine.synthesize(text, language), engine.sample_rate, sample_rate)
+        except Exception as e:
+            logging.warning(f"TTS failed for segment at {segment['start']}s: {e}")
+            failed += 1
+            continue
+        clips.append(fit_to_window(clip, window, max_stretch, sample_rate))
+        offsets.append(start - group_start)
+    length = max([offset + len(clip) for offset, clip in zip(offsets, clips)] + [0])
+    return group_start, overlap_add(clips, offsets, length), failed
+
+
+# ---------- PUBLIC API ----------
+
+def group_segments(segments, group_sec=DUB_GROUP_SEC):
+    """Split time-sorted segments into consecutive groups spanning about group_sec seconds."""
+    groups = []
+    for segment in sorted(segments, key=lambda seg: seg["start"]):
+        if groups and segment["start"] - groups[-1][0]["start"] < group_sec:
+            groups[-1].append(segment)
+        else:
+            groups.append([segment])
+    return groups
+
+
+class _TrackWriter:
+    """
+    Accumulates group buffers in timeline order and writes finished samples as
+    int16 PCM. Groups arrive sorted by start, so everything before the newest
+    group's start can no longer change and is flushed.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.written = 0
+        self.pending = np.zeros(0, dtype=np.float32)
+
+    def flush(self, until):
+        count = min(until - self.written, len(self.pending))
+        if count > 0:
+            self._write(self.pending[:count])
+            self.pending = self.pending[count:]
+        if until > self.written:
+            # Silence between groups
+            self._write(np.zeros(until - self.written, dtype=np.float32))
+
+    def add(self, start, buffer):
+        self.flush(start)
+        offset = start - self.written
+        end = offset + len(buffer)
+        if end > len(self.pending):
+            self.pending = np.concatenate((self.pending, np.zeros(end - len(self.pending), dtype=np.float32)))
+        self.pending[offset:end] += buffer
+
+    def close(self, total):
+        self.flush(max(total, self.written + len(self.pending)))
+
+    def _write(self, samples):
+        self.file.write((np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+        self.written += len(samples)
+
+
+def render_dub(segments, output_path, language, engine=None, fmt="mp3", total_sec=None,
+               sample_rate=DUB_SAMPLE_RATE, max_stretch=DUB_MAX_STRETCH, on_progress=None):
+    """
+    Render a dubbed track for `segments` into output_path (encoded as fmt).
+    total_sec pads the track to the video's length. on_progress(done, total)
+    is called as segment groups are mixed. Checks the current deadline between
+    groups and cancels queued work when it raises. Raises RuntimeError when
+    every segment failed to synthesise. Returns a stats dict ("failed" counts
+    the segments left silent).
+    """
+    engine = get_engine(engine)
+    if not engine.is_available():
+        raise RuntimeError(f"TTS engine '{engine.name}' is not available")
+    groups = group_segments(segments)
+    if not groups:
+        raise ValueError("No segments to dub")
+    total = sum(len(group) for group in groups)
+    spoken = sum(1 for segment in segments if (segment.get("text") or "").strip())
+    pool = audio_pool.get_pool()
+    # Keep only a few groups in flight so memory stays flat for long videos
+    window = max(2, 2 * audio_pool.AUDIO_POOL_WORKERS)
+    pcm_path = output_path + ".pcm"
+    in_flight = deque()
+    done = failed = 0
+    try:
+        with open(pcm_path, "wb") as pcm_file:
+            writer = _TrackWriter(pcm_file)
+            queued = iter(groups)
+            for group in queued:
+                in_flight.append((len(group), pool.submit(
+                    _render_group_worker, engine.name, language, group, sample_rate, max_stretch)))
+                if len(in_flight) >= window:
+                    break
+            while in_flight:
+                deadlines.current().check()
+                size, future = in_flight.popleft()
+                start, buffer, group_failed = future.result()
+                writer.add(start, buffer)
+                done += size
+                failed += group_failed
+                if on_progress:
+                    on_progress(done, total)
+                group = next(queued, None)
+                if group is not None:
+                    in_flight.append((len(group), pool.submit(
+                        _render_group_worker, engine.name, language, group, sample_rate, max_stretch)))
+            if spoken and failed == spoken:
+                raise RuntimeError(f"TTS failed for all {spoken} segments with {engine.name} ({language})")
+            writer.close(int((total_sec or 0) * sample_rate))
+            nbytes = writer.written * audio_pool.SAMPLE_WIDTH
+        encoded = audio_pool.encode_pcm(audio_pool.PCMBuffer(pcm_path, nbytes, sample_rate, 1), fmt=fmt)
+        shutil.move(encoded, output_path)
+    finally:
+        for _, future in in_flight:
+            future.cancel()
+        try:
+            os.remove(pcm_path)
+        except FileNotFoundError:
+            pass
+    logging.info(f"Dubbed {done} segments ({failed} failed) with {engine.name} into {output_path}")
+    return {"segments": total, "failed": failed, "duration_sec": round(nbytes / 2 / sample_rate, 3),
+            "engine": engine.name, "format": fmt}
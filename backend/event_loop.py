@@ -0,0 +1,47 @@
+"""
+One background asyncio event loop per process, shared by all request threads.
+
+Request handlers stay synchronous (Flask under gunicorn sync or gthread
+workers) and hand their coroutines to run(), which schedules them on the
+shared loop and blocks the calling thread until they finish. That replaces a
+fresh event loop per request: the loop thread is started once, and every
+request's coroutines interleave on it.
+
+The caller's contextvars (request deadline, tracing spans) carry over to the
+coroutine, since asyncio copies the scheduling thread's context into the task.
+"""
+import os
+import asyncio
+import logging
+import threading
+
+_loop = None
+_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the shared loop, starting its thread on first use."""
+    global _loop
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="event-loop", daemon=True).start()
+                logging.info("Started shared event loop")
+                _loop = loop
+    return _loop
+
+
+def run(coro):
+    """Run a coroutine on the shared loop and return its result (or raise its exception)."""
+    return asyncio.run_coroutine_threadsafe(coro, get_loop()).result()
+
+
+def _reset_after_fork():
+    # The loop thread doesn't survive fork; a forked child starts its own on first use
+    global _loop, _lock
+    _loop = None
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
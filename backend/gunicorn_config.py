@@ -0,0 +1,63 @@
+"""
+Gunicorn configuration for the DubMyYT backend.
+
+Used by start_backend.sh:  gunicorn -c gunicorn_config.py server:app
+
+GUNICORN_PROFILE picks the worker model:
+  sync     one request at a time per worker process (the original setup)
+  gthread  GUNICORN_THREADS requests per worker process. Requests spend nearly
+           all their time waiting on Groq, Google, Supabase and YouTube, so
+           threads are cheap, and each process shares one set of pooled
+           clients and one background event loop (event_loop.py) among them.
+
+The request budget of deadlines.py (REQUEST_BUDGET_SEC, and with it the
+transcribe stage budget) follows the profile unless set explicitly: a sync
+worker is killed after `timeout`, so requests answer 10 s before it; a
+gthread worker isn't killed for one slow request, so requests get
+GTHREAD_REQUEST_BUDGET_SEC (default 1800) and long videos finish in one
+request instead of coming back with transcript_complete: false.
+"""
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+timeout = 120
+
+PROFILES = {
+    "sync": {"worker_class": "sync", "threads": 1},
+    "gthread": {"worker_class": "gthread", "threads": int(os.environ.get("GUNICORN_THREADS", 64))},
+}
+profile = os.environ.get("GUNICORN_PROFILE", "sync")
+if profile not in PROFILES:
+    raise ValueError(f"Unknown GUNICORN_PROFILE '{profile}'. Choose from: {', '.join(PROFILES)}")
+worker_class = PROFILES[profile]["worker_class"]
+threads = PROFILES[profile]["threads"]
+
+# Read by deadlines.py when the app is imported
+if profile == "sync":
+    os.environ.setdefault("REQUEST_BUDGET_SEC", str(timeout - 10))
+else:
+    os.environ.setdefault("REQUEST_BUDGET_SEC", os.environ.get("GTHREAD_REQUEST_BUDGET_SEC", "1800"))
+accesslog = "-"
+errorlog = "-"
+
+# Prometheus multiprocess mode: each worker writes its metrics to this
+# directory and /metrics merges them. Must be set before the app is imported.
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "dubmyyt_prometheus")
+)
+
+
+def on_starting(server):
+    """Start every deploy with an empty metrics directory."""
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop the live-gauge files of an exited worker."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
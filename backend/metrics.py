@@ -0,0 +1,176 @@
+"""
+Lightweight tracing and Prometheus metrics for the processing pipeline.
+
+Every pipeline stage runs inside a span (context manager or @traced
+decorator) that feeds a latency histogram and an error counter. Calls to
+Groq, Google Translate, YouTube and Supabase are additionally counted per
+dependency/operation/outcome.
+
+Under gunicorn each worker is a separate process, so metrics are written to
+PROMETHEUS_MULTIPROC_DIR (set up in gunicorn_config.py) and merged at scrape
+time. Without that variable (python server.py) the in-process registry is used.
+"""
+import os
+import time
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+
+# Latency buckets span fast DB round trips up to multi-minute transcriptions
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_DURATION = Histogram(
+    "dubmyyt_stage_duration_seconds", "Time spent in a pipeline stage",
+    ["stage"], buckets=LATENCY_BUCKETS
+)
+STAGE_ERRORS = Counter(
+    "dubmyyt_stage_errors_total", "Pipeline stage invocations that raised",
+    ["stage"]
+)
+EXTERNAL_CALLS = Counter(
+    "dubmyyt_external_calls_total", "Calls made to external services",
+    ["dependency", "operation", "outcome"]
+)
+EXTERNAL_CALL_DURATION = Histogram(
+    "dubmyyt_external_call_duration_seconds", "Latency of calls to external services",
+    ["dependency", "operation"], buckets=LATENCY_BUCKETS
+)
+BREAKER_STATE = Gauge(
+    "dubmyyt_circuit_breaker_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open",
+    ["dependency"], multiprocess_mode="max"
+)
+HTTP_REQUESTS = Counter(
+    "dubmyyt_http_requests_total", "HTTP requests served",
+    ["endpoint", "method", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "dubmyyt_http_request_duration_seconds", "HTTP request latency",
+    ["endpoint", "method"], buckets=LATENCY_BUCKETS
+)
+API_USAGE = Counter(
+    "dubmyyt_api_usage_total", "Billable usage of external APIs (see usage.FIELDS)",
+    ["quantity"]
+)
+LOG_RECORDS_DROPPED = Counter(
+    "dubmyyt_log_records_dropped_total", "Log records dropped because the log queue was full"
+)
+BATCH_ITEMS = Counter(
+    "dubmyyt_batch_items_total", "Batch videos finished, by final state (see batch.py)",
+    ["status"]
+)
+
+# Stack of stage names for the current request/thread
+_current_spans = contextvars.ContextVar("dubmyyt_spans", default=())
+
+
+def current_stage():
+    """Return the innermost active stage name, or None."""
+    spans = _current_spans.get()
+    return spans[-1] if spans else None
+
+
+@contextmanager
+def span(stage):
+    """Time a pipeline stage and record it in the stage histogram/error counter."""
+    token = _current_spans.set(_current_spans.get() + (stage,))
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.labels(stage).observe(elapsed)
+        _current_spans.reset(token)
+        logging.debug(f"stage {stage} took {elapsed:.3f}s")
+
+
+def traced(stage):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def external_call(dependency, operation):
+    """Count and time one call to an external service."""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        EXTERNAL_CALL_DURATION.labels(dependency, operation).observe(time.perf_counter() - start)
+        EXTERNAL_CALLS.labels(dependency, operation, outcome).inc()
+
+
+class _TimedTransport:
+    """httpx transport wrapper that records each PostgREST round trip, including connection errors."""
+
+    def __init__(self, transport, dependency):
+        self._transport = transport
+        self._dependency = dependency
+
+    def handle_request(self, request):
+        table = request.url.path.rstrip("/").split("/rest/v1/")[-1] or "root"
+        operation = f"{request.method} {table}"
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self._transport.handle_request(request)
+            outcome = "success" if response.status_code < 400 else "http_error"
+            return response
+        finally:
+            EXTERNAL_CALL_DURATION.labels(self._dependency, operation).observe(time.perf_counter() - start)
+            EXTERNAL_CALLS.labels(self._dependency, operation, outcome).inc()
+
+    def close(self):
+        self._transport.close()
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
+def instrument_supabase(client):
+    """
+    Wrap the PostgREST HTTP transport of a Supabase client so every table/RPC
+    call is counted and timed, labelled as "<method> <table>".
+    """
+    session = client.postgrest.session
+    if not isinstance(session._transport, _TimedTransport):
+        session._transport = _TimedTransport(session._transport, "supabase")
+    return client
+
+
+def observe_request(endpoint, method, status, elapsed):
+    """Record one served HTTP request."""
+    HTTP_REQUESTS.labels(endpoint, method, str(status)).inc()
+    HTTP_REQUEST_DURATION.labels(endpoint, method).observe(elapsed)
+
+
+def render_latest():
+    """
+    Return (payload, content_type) in Prometheus text format, merged across
+    all gunicorn workers when running in multiprocess mode.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
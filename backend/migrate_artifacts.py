@@ -0,0 +1,79 @@
+"""
+Move transcript and subtitle content written before the artifact store into it.
+
+Walks the transcripts and subtitles rows that still hold their content
+(artifact_key is null) in (video_id, language) keyset batches of
+--batch-size, writes each content to the configured store (ARTIFACT_STORE,
+deduplicated by hash) and replaces the batch's content with the keys in one
+upsert. Needs migrations/005_artifact_store.sql. Safe to rerun: moved rows
+are skipped and a content already in the store is not written again.
+
+    cd backend
+    ARTIFACT_STORE=s3 ARTIFACT_S3_BUCKET=... python migrate_artifacts.py
+    python migrate_artifacts.py --table subtitles --dry-run
+"""
+import sys
+import time
+import logging
+import argparse
+
+import pagination
+from server import get_supabase, artifacts
+
+# table -> content column
+TABLES = {"transcripts": "text", "subtitles": "srt"}
+ORDER = ("video_id", "language")
+
+
+def migrate_table(table, batch_size=200, dry_run=False):
+    """Move one table's inline content to the store. Returns (rows, bytes)."""
+    column = TABLES[table]
+    rows_moved = bytes_moved = 0
+    cursor = None
+    while True:
+        started = time.perf_counter()
+        query = get_supabase().table(table).select(f"video_id, language, user_id, {column}").is_("artifact_key", "null")
+        batch, cursor = pagination.page(query, ORDER, batch_size, cursor, desc=False)
+        updates = []
+        for row in batch:
+            if row.get(column) is None:
+                continue
+            data = row[column].encode("utf-8")
+            key = artifacts.put(data) if not dry_run else None
+            updates.append({"video_id": row["video_id"], "language": row["language"], "user_id": row["user_id"],
+                            column: None, "artifact_key": key, "artifact_size": len(data)})
+            bytes_moved += len(data)
+        if updates and not dry_run:
+            get_supabase().table(table).upsert(updates, on_conflict="video_id,language").execute()
+        rows_moved += len(updates)
+        if batch:
+            logging.info(f"{table}: {len(updates)} rows in {time.perf_counter() - started:.2f}s "
+                         f"(last {batch[-1]['video_id']}/{batch[-1]['language']})")
+        if cursor is None:
+            return rows_moved, bytes_moved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move transcript/subtitle content from table rows to the artifact store")
+    parser.add_argument("--table", choices=sorted(TABLES), help="Only this table (default: both)")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="Count the rows and bytes without moving them")
+    args = parser.parse_args()
+    # server.py logs to server.log; show the batch progress here too
+    logging.getLogger().addHandler(logging.StreamHandler())
+
+    if artifacts is None:
+        print("ARTIFACT_STORE is 'database': set it to filesystem or s3 first")
+        sys.exit(2)
+    for table in [args.table] if args.table else sorted(TABLES):
+        started = time.perf_counter()
+        try:
+            rows, size = migrate_table(table, args.batch_size, args.dry_run)
+        except Exception as e:
+            logging.error(f"Moving {table} failed: {e}")
+            sys.exit(1)
+        print(f"{table}: moved {rows} rows, {size / 2 ** 20:.1f} MB ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
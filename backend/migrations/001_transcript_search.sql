@@ -0,0 +1,67 @@
+-- Full-text search over transcript and subtitle segments (SEARCH_BACKEND=postgres).
+-- One row per segment, so a match carries its video and timestamps.
+-- 'simple' matches search_index.py's SQLite tokenizer (no stemming).
+
+create extension if not exists btree_gin;
+
+create table if not exists public.transcript_segments (
+    id bigserial primary key,
+    user_id uuid not null,
+    video_id bigint not null references public.video_url (id) on delete cascade,
+    language text not null,
+    kind text not null check (kind in ('transcript', 'subtitle')),
+    seg_index integer not null,
+    start_sec double precision,
+    end_sec double precision,
+    text text not null,
+    tsv tsvector generated always as (to_tsvector('simple', text)) stored,
+    unique (video_id, language, kind, seg_index)
+);
+
+-- (user_id, tsv) in one GIN index: a user's query never scans other users' matches
+create index if not exists transcript_segments_user_tsv
+    on public.transcript_segments using gin (user_id, tsv);
+
+-- Replace the segments of one (video, language, kind) document in a single transaction
+create or replace function public.replace_segments(
+    p_user_id uuid, p_video_id bigint, p_language text, p_kind text, p_segments jsonb
+) returns integer
+language plpgsql as $$
+declare
+    inserted integer;
+begin
+    delete from public.transcript_segments
+    where video_id = p_video_id and language = p_language and kind = p_kind;
+
+    insert into public.transcript_segments (user_id, video_id, language, kind, seg_index, start_sec, end_sec, text)
+    select p_user_id, p_video_id, p_language, p_kind,
+           (s ->> 'index')::integer, (s ->> 'start')::double precision, (s ->> 'end')::double precision, s ->> 'text'
+    from jsonb_array_elements(p_segments) as s;
+
+    get diagnostics inserted = row_count;
+    return inserted;
+end;
+$$;
+
+create or replace function public.search_segments(
+    p_user_id uuid, p_query text,
+    p_language text default null, p_kind text default null, p_video_id bigint default null,
+    p_sort text default 'recent', p_limit integer default 20, p_offset integer default 0
+) returns table (
+    video_id bigint, language text, kind text, seg_index integer,
+    start_sec double precision, end_sec double precision, text text, rank real
+)
+language sql stable as $$
+    select s.video_id, s.language, s.kind, s.seg_index, s.start_sec, s.end_sec, s.text,
+           case when p_sort = 'relevance' then ts_rank(s.tsv, q.query) end as rank
+    from public.transcript_segments s,
+         websearch_to_tsquery('simple', p_query) as q (query)
+    where s.user_id = p_user_id
+      and s.tsv @@ q.query
+      and (p_language is null or s.language = p_language)
+      and (p_kind is null or s.kind = p_kind)
+      and (p_video_id is null or s.video_id = p_video_id)
+    -- 'recent' skips ranking: newest video first, then by timestamp
+    order by rank desc nulls last, s.video_id desc, s.seg_index
+    limit least(p_limit, 100) offset p_offset;
+$$;
@@ -0,0 +1,14 @@
+-- Indexes behind keyset pagination (/user-activity, /videos) and the batched
+-- feature lookups of /videos. Each page is an index range scan that starts
+-- right after the cursor, however deep the page is.
+
+create index if not exists user_activity_log_user_created_id
+    on public.user_activity_log (user_id, created_at desc, id desc);
+
+create index if not exists video_url_user_id_id
+    on public.video_url (user_id, id desc);
+
+-- video_id = any(...) lookups for a page of videos
+create index if not exists transcripts_video_id on public.transcripts (video_id);
+create index if not exists subtitles_video_id on public.subtitles (video_id);
+create index if not exists summaries_video_id on public.summaries (video_id);
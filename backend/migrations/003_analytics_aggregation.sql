@@ -0,0 +1,169 @@
+-- Analytics aggregation in the database.
+--
+-- Before this migration the backend downloaded every video/summary/subtitle
+-- row of a user to len() them (sync), and updated the counters with
+-- read-modify-write round trips (track_user_activity). The functions below
+-- do both where the data lives. server.py falls back to the client-side
+-- path while they are missing, so this can be applied after a deploy.
+
+-- ---------- INDEXES ----------
+create index if not exists video_url_user_id on public.video_url (user_id);
+create index if not exists summaries_user_id on public.summaries (user_id);
+create index if not exists subtitles_user_id_language on public.subtitles (user_id, language);
+create index if not exists subtitles_video_id_language on public.subtitles (video_id, language);
+create index if not exists transcripts_video_id_language on public.transcripts (video_id, language);
+
+-- The counters are upserted on (user_id) and (user_id, date). The old
+-- read-then-insert path could race and leave duplicate daily rows: merge
+-- them into the oldest row first.
+with merged as (
+    select user_id, date, min(id) as keep_id,
+           sum(videos_count) as videos_count, sum(summaries_count) as summaries_count,
+           sum(subtitles_count) as subtitles_count, max(unique_languages) as unique_languages,
+           sum(total_time) as total_time
+    from public.daily_usage_stats
+    group by user_id, date
+    having count(*) > 1
+)
+update public.daily_usage_stats d
+set videos_count = m.videos_count, summaries_count = m.summaries_count, subtitles_count = m.subtitles_count,
+    unique_languages = m.unique_languages, total_time = m.total_time
+from merged m
+where d.id = m.keep_id;
+
+delete from public.daily_usage_stats d
+using public.daily_usage_stats keep
+where d.user_id = keep.user_id and d.date = keep.date and d.id > keep.id;
+
+create unique index if not exists daily_usage_stats_user_date on public.daily_usage_stats (user_id, date);
+create unique index if not exists user_analytics_user on public.user_analytics (user_id);
+
+-- ---------- AGGREGATES ----------
+create or replace function public.user_content_stats(p_user_id uuid)
+returns table (videos_processed bigint, summaries_generated bigint, subtitles_generated bigint, languages_used text[])
+language sql stable as $$
+    select (select count(*) from public.video_url where user_id = p_user_id),
+           (select count(*) from public.summaries where user_id = p_user_id),
+           (select count(*) from public.subtitles where user_id = p_user_id),
+           (select coalesce(array_agg(distinct language order by language) filter (where language is not null), '{}')
+            from public.subtitles where user_id = p_user_id);
+$$;
+
+-- Recompute the analytics row of every user in the batch from their content.
+-- total_processing_time is kept: it cannot be derived from the content rows.
+create or replace function public.sync_user_analytics(p_user_ids uuid[])
+returns integer
+language plpgsql as $$
+declare
+    synced integer;
+begin
+    insert into public.user_analytics as a
+        (user_id, videos_processed, summaries_generated, subtitles_generated, languages_used, total_processing_time, last_activity)
+    select u.user_id, s.videos_processed, s.summaries_generated, s.subtitles_generated, s.languages_used, 0, now()
+    from unnest(p_user_ids) as u (user_id)
+    cross join lateral public.user_content_stats(u.user_id) as s
+    on conflict (user_id) do update set
+        videos_processed = excluded.videos_processed,
+        summaries_generated = excluded.summaries_generated,
+        subtitles_generated = excluded.subtitles_generated,
+        languages_used = excluded.languages_used,
+        last_activity = excluded.last_activity;
+    get diagnostics synced = row_count;
+    return synced;
+end;
+$$;
+
+-- Users with videos, in user_id order after p_after (keyset batches for the
+-- bulk re-sync). Reads video_url_user_id in order and stops after p_limit users.
+create or replace function public.analytics_user_ids(p_after uuid default null, p_limit integer default 500)
+returns setof uuid
+language sql stable as $$
+    select distinct user_id
+    from public.video_url
+    where p_after is null or user_id > p_after
+    order by user_id
+    limit p_limit;
+$$;
+
+-- ---------- COUNTERS ----------
+-- One activity: log it and bump the user's and today's counters atomically
+-- (replaces up to six round trips of select + insert/update).
+create or replace function public.record_user_activity(
+    p_user_id uuid, p_activity_type text, p_video_id bigint default null,
+    p_language text default null, p_processing_time integer default 0
+) returns void
+language plpgsql as $$
+declare
+    v_today date := (now() at time zone 'utc')::date;
+    v_videos integer := (p_activity_type = 'video_processed')::integer;
+    v_summaries integer := (p_activity_type = 'summary_generated')::integer;
+    v_subtitles integer := (p_activity_type = 'subtitle_generated')::integer;
+begin
+    insert into public.user_activity_log (user_id, activity_type, video_id, language, processing_time)
+    values (p_user_id, p_activity_type, p_video_id, p_language, p_processing_time);
+
+    insert into public.user_analytics as a
+        (user_id, videos_processed, summaries_generated, subtitles_generated, languages_used, total_processing_time, last_activity)
+    values (p_user_id, v_videos, v_summaries, v_subtitles,
+            case when p_language is null then '{}'::text[] else array[p_language] end,
+            p_processing_time, now())
+    on conflict (user_id) do update set
+        videos_processed = a.videos_processed + v_videos,
+        summaries_generated = a.summaries_generated + v_summaries,
+        subtitles_generated = a.subtitles_generated + v_subtitles,
+        languages_used = case
+            when p_language is null or p_language = any(a.languages_used) then a.languages_used
+            else array_append(a.languages_used, p_language)
+        end,
+        total_processing_time = a.total_processing_time + p_processing_time,
+        last_activity = now();
+
+    insert into public.daily_usage_stats as d
+        (user_id, date, videos_count, summaries_count, subtitles_count, unique_languages, total_time)
+    values (p_user_id, v_today, v_videos, v_summaries, v_subtitles, (p_language is not null)::integer, p_processing_time)
+    on conflict (user_id, date) do update set
+        videos_count = d.videos_count + v_videos,
+        summaries_count = d.summaries_count + v_summaries,
+        subtitles_count = d.subtitles_count + v_subtitles,
+        unique_languages = (
+            select count(distinct l.language)
+            from public.user_activity_log l
+            where l.user_id = p_user_id and l.language is not null
+              and l.created_at >= v_today and l.created_at < v_today + 1
+        ),
+        total_time = d.total_time + p_processing_time;
+end;
+$$;
+
+-- ---------- DASHBOARD ----------
+-- Analytics, the last 10 activities, daily trends since p_since and their
+-- totals, in one round trip.
+create or replace function public.user_dashboard(p_user_id uuid, p_since date)
+returns json
+language sql stable as $$
+    select json_build_object(
+        'analytics', (select row_to_json(a) from public.user_analytics a where a.user_id = p_user_id),
+        'recent_activity', coalesce((
+            select json_agg(l)
+            from (select * from public.user_activity_log
+                  where user_id = p_user_id
+                  order by created_at desc, id desc
+                  limit 10) l
+        ), '[]'::json),
+        'usage_trends', coalesce((
+            select json_agg(d order by d.date)
+            from public.daily_usage_stats d
+            where d.user_id = p_user_id and d.date >= p_since
+        ), '[]'::json),
+        'period_totals', (
+            select json_build_object(
+                'videos', coalesce(sum(videos_count), 0),
+                'summaries', coalesce(sum(summaries_count), 0),
+                'subtitles', coalesce(sum(subtitles_count), 0),
+                'processing_time', coalesce(sum(total_time), 0)
+            )
+            from public.daily_usage_stats
+            where user_id = p_user_id and date >= p_since
+        )
+    );
+$$;
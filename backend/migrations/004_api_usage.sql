@@ -0,0 +1,126 @@
+-- External API usage and cost per user and day.
+--
+-- server.py adds every request's usage (see usage.py for the quantities)
+-- to the user's row of the day with record_api_usage, and /admin/usage
+-- reads it back through api_usage_report. Both fall back to plain table
+-- reads and writes while the functions are missing.
+
+-- ---------- TABLE ----------
+create table if not exists public.api_usage_daily (
+    user_id uuid not null,
+    date date not null,
+    requests integer not null default 0,
+    asr_calls integer not null default 0,
+    asr_audio_seconds numeric not null default 0,
+    bytes_uploaded bigint not null default 0,
+    llm_calls integer not null default 0,
+    llm_tokens_in bigint not null default 0,
+    llm_tokens_out bigint not null default 0,
+    translate_calls integer not null default 0,
+    translate_characters bigint not null default 0,
+    retries integer not null default 0,
+    cache_hits integer not null default 0,
+    cached_audio_seconds numeric not null default 0,
+    cost_usd numeric not null default 0,
+    saved_usd numeric not null default 0,
+    primary key (user_id, date)
+);
+
+-- The report reads a date range across all users
+create index if not exists api_usage_daily_date on public.api_usage_daily (date);
+
+-- ---------- COUNTERS ----------
+-- Add one request's usage (a JSON object keyed by column) to the user's row of today.
+create or replace function public.record_api_usage(p_user_id uuid, p_usage jsonb)
+returns void
+language sql as $$
+    insert into public.api_usage_daily as d (
+        user_id, date, requests, asr_calls, asr_audio_seconds, bytes_uploaded,
+        llm_calls, llm_tokens_in, llm_tokens_out, translate_calls, translate_characters,
+        retries, cache_hits, cached_audio_seconds, cost_usd, saved_usd
+    )
+    values (
+        p_user_id, (now() at time zone 'utc')::date, 1,
+        coalesce((p_usage->>'asr_calls')::integer, 0),
+        coalesce((p_usage->>'asr_audio_seconds')::numeric, 0),
+        coalesce((p_usage->>'bytes_uploaded')::bigint, 0),
+        coalesce((p_usage->>'llm_calls')::integer, 0),
+        coalesce((p_usage->>'llm_tokens_in')::bigint, 0),
+        coalesce((p_usage->>'llm_tokens_out')::bigint, 0),
+        coalesce((p_usage->>'translate_calls')::integer, 0),
+        coalesce((p_usage->>'translate_characters')::bigint, 0),
+        coalesce((p_usage->>'retries')::integer, 0),
+        coalesce((p_usage->>'cache_hits')::integer, 0),
+        coalesce((p_usage->>'cached_audio_seconds')::numeric, 0),
+        coalesce((p_usage->>'cost_usd')::numeric, 0),
+        coalesce((p_usage->>'saved_usd')::numeric, 0)
+    )
+    on conflict (user_id, date) do update set
+        requests = d.requests + 1,
+        asr_calls = d.asr_calls + excluded.asr_calls,
+        asr_audio_seconds = d.asr_audio_seconds + excluded.asr_audio_seconds,
+        bytes_uploaded = d.bytes_uploaded + excluded.bytes_uploaded,
+        llm_calls = d.llm_calls + excluded.llm_calls,
+        llm_tokens_in = d.llm_tokens_in + excluded.llm_tokens_in,
+        llm_tokens_out = d.llm_tokens_out + excluded.llm_tokens_out,
+        translate_calls = d.translate_calls + excluded.translate_calls,
+        translate_characters = d.translate_characters + excluded.translate_characters,
+        retries = d.retries + excluded.retries,
+        cache_hits = d.cache_hits + excluded.cache_hits,
+        cached_audio_seconds = d.cached_audio_seconds + excluded.cached_audio_seconds,
+        cost_usd = d.cost_usd + excluded.cost_usd,
+        saved_usd = d.saved_usd + excluded.saved_usd;
+$$;
+
+-- ---------- REPORT ----------
+-- Usage per day, per user (the 50 costliest) and in total since p_since,
+-- optionally for one user, in one round trip.
+create or replace function public.api_usage_report(p_since date, p_user_id uuid default null)
+returns json
+language sql stable as $$
+    with rows as (
+        select * from public.api_usage_daily
+        where date >= p_since and (p_user_id is null or user_id = p_user_id)
+    ),
+    days as (
+        select date, sum(requests) as requests, sum(asr_calls) as asr_calls,
+               sum(asr_audio_seconds) as asr_audio_seconds, sum(bytes_uploaded) as bytes_uploaded,
+               sum(llm_calls) as llm_calls, sum(llm_tokens_in) as llm_tokens_in,
+               sum(llm_tokens_out) as llm_tokens_out, sum(translate_calls) as translate_calls,
+               sum(translate_characters) as translate_characters, sum(retries) as retries,
+               sum(cache_hits) as cache_hits, sum(cached_audio_seconds) as cached_audio_seconds,
+               sum(cost_usd) as cost_usd, sum(saved_usd) as saved_usd
+        from rows group by date
+    ),
+    users as (
+        select user_id, sum(requests) as requests, sum(asr_calls) as asr_calls,
+               sum(asr_audio_seconds) as asr_audio_seconds, sum(bytes_uploaded) as bytes_uploaded,
+               sum(llm_calls) as llm_calls, sum(llm_tokens_in) as llm_tokens_in,
+               sum(llm_tokens_out) as llm_tokens_out, sum(translate_calls) as translate_calls,
+               sum(translate_characters) as translate_characters, sum(retries) as retries,
+               sum(cache_hits) as cache_hits, sum(cached_audio_seconds) as cached_audio_seconds,
+               sum(cost_usd) as cost_usd, sum(saved_usd) as saved_usd
+        from rows group by user_id
+        order by sum(cost_usd) desc
+        limit 50
+    )
+    select json_build_object(
+        'days', coalesce((select json_agg(d order by d.date) from days d), '[]'::json),
+        'users', coalesce((select json_agg(u order by u.cost_usd desc) from users u), '[]'::json),
+        'totals', (
+            select json_build_object(
+                'requests', coalesce(sum(requests), 0), 'asr_calls', coalesce(sum(asr_calls), 0),
+                'asr_audio_seconds', coalesce(sum(asr_audio_seconds), 0),
+                'bytes_uploaded', coalesce(sum(bytes_uploaded), 0),
+                'llm_calls', coalesce(sum(llm_calls), 0), 'llm_tokens_in', coalesce(sum(llm_tokens_in), 0),
+                'llm_tokens_out', coalesce(sum(llm_tokens_out), 0),
+                'translate_calls', coalesce(sum(translate_calls), 0),
+                'translate_characters', coalesce(sum(translate_characters), 0),
+                'retries', coalesce(sum(retries), 0), 'cache_hits', coalesce(sum(cache_hits), 0),
+                'cached_audio_seconds', coalesce(sum(cached_audio_seconds), 0),
+                'cost_usd', coalesce(sum(cost_usd), 0), 'saved_usd', coalesce(sum(saved_usd), 0)
+            )
+            from rows
+        )
+    );
+$$;
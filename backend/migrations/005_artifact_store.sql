@@ -0,0 +1,31 @@
+-- Transcript and subtitle content in an artifact store (artifact_store.py).
+--
+-- With ARTIFACT_STORE=filesystem or s3 the backend writes the content to the
+-- store and keeps only its SHA-256 (artifact_key) and size in these rows;
+-- text/srt are left null. Rows written before keep their content and are
+-- still read from the columns. Apply this before switching ARTIFACT_STORE,
+-- then move the existing content with: python migrate_artifacts.py
+
+alter table public.transcripts add column if not exists artifact_key text;
+alter table public.transcripts add column if not exists artifact_size integer;
+alter table public.transcripts alter column text drop not null;
+
+alter table public.subtitles add column if not exists artifact_key text;
+alter table public.subtitles add column if not exists artifact_size integer;
+alter table public.subtitles alter column srt drop not null;
+
+-- Either the content or a key, never neither
+alter table public.transcripts drop constraint if exists transcripts_content_present;
+alter table public.transcripts add constraint transcripts_content_present
+    check (text is not null or artifact_key is not null) not valid;
+alter table public.subtitles drop constraint if exists subtitles_content_present;
+alter table public.subtitles add constraint subtitles_content_present
+    check (srt is not null or artifact_key is not null) not valid;
+
+-- migrate_artifacts.py walks the rows still holding content in (video_id, language) order
+create index if not exists transcripts_inline_content on public.transcripts (video_id, language) where artifact_key is null;
+create index if not exists subtitles_inline_content on public.subtitles (video_id, language) where artifact_key is null;
+
+-- Finding the rows that reference a key (sweeping unreferenced artifacts)
+create index if not exists transcripts_artifact_key on public.transcripts (artifact_key) where artifact_key is not null;
+create index if not exists subtitles_artifact_key on public.subtitles (artifact_key) where artifact_key is not null;
@@ -0,0 +1,30 @@
+-- Bulk ingest progress (POST /batch, batch.py).
+--
+-- The worker process running a batch writes its items' state here in
+-- batched upserts, so GET /batch/<id> can be answered by any worker. Until
+-- this migration is applied, progress is only visible from the process
+-- running the batch.
+
+create table if not exists public.batches (
+    id uuid primary key,
+    user_id uuid not null,
+    options jsonb not null default '{}'::jsonb,
+    total integer not null,
+    created_at timestamptz not null default now(),
+    finished_at timestamptz
+);
+
+create index if not exists batches_user_id on public.batches (user_id, created_at desc);
+
+create table if not exists public.batch_items (
+    batch_id uuid not null references public.batches (id) on delete cascade,
+    position integer not null,
+    url text not null,
+    video_id bigint references public.video_url (id) on delete set null,
+    title text,
+    status text not null default 'queued',
+    stage text,
+    error text,
+    updated_at timestamptz not null default now(),
+    primary key (batch_id, position)
+);
@@ -0,0 +1,71 @@
+"""
+Keyset (cursor) pagination for Supabase listings.
+
+Offset pagination (.range(offset, ...)) makes Postgres produce and throw
+away every row before the page, so deep pages get slower as a history grows.
+A keyset page instead continues strictly after the last row returned,
+which an index on (user_id, <sort columns>) serves directly however deep
+the page is:
+
+    ORDER BY created_at DESC, id DESC
+    WHERE created_at < :t OR (created_at = :t AND id < :id)
+
+The cursor handed to clients is that last row's sort key, base64url-encoded
+JSON. Clients treat it as opaque and pass it back as ?cursor=.
+"""
+import json
+import base64
+
+
+def encode_cursor(row, columns):
+    """Cursor pointing just after `row` in an ordering on `columns`."""
+    raw = json.dumps([row.get(column) for column in columns], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    """Sort key values of a cursor. Raises ValueError when it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(values, list) or len(values) != len(columns) or any(v is None for v in values):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _literal(value):
+    # Quoted, so timestamps (':' and '.') survive PostgREST's or=() syntax
+    return '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def keyset_filter(columns, values, desc=True):
+    """
+    PostgREST or=() expression selecting the rows after `values` in an
+    ordering on `columns` (all descending or all ascending).
+    """
+    operator = "lt" if desc else "gt"
+    terms = []
+    for i, column in enumerate(columns):
+        equal = [f"{previous}.eq.{_literal(value)}" for previous, value in zip(columns[:i], values[:i])]
+        strict = f"{column}.{operator}.{_literal(values[i])}"
+        terms.append(f"and({','.join(equal + [strict])})" if equal else strict)
+    return ",".join(terms)
+
+
+def page(query, columns, limit, cursor=None, desc=True):
+    """
+    Run a select with keyset pagination. Returns (rows, next_cursor), where
+    next_cursor is None on the last page. One extra row is fetched to know
+    whether another page exists.
+    """
+    if cursor:
+        query = query.or_(keyset_filter(columns, decode_cursor(cursor, columns), desc))
+    for column in columns:
+        query = query.order(column, desc=desc)
+    rows = query.limit(limit + 1).execute().data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], columns)
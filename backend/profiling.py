@@ -0,0 +1,230 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when an admin sends `X-Profile: 1` (see
+is_admin_request in server.py) or when it is picked by PROFILE_SAMPLE_RATE.
+Profiled requests run under cProfile, a wall-clock stack sampler and
+tracemalloc; the collapsed stacks (flamegraph.pl / speedscope compatible),
+the cProfile top list and the top allocation sites are written to
+PROFILE_FOLDER for retrieval through the admin endpoints.
+
+When a request is not selected the only cost is one header lookup and one
+random() call.
+"""
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import random
+import pstats
+import cProfile
+import logging
+import threading
+import functools
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_FOLDER = os.getenv("PROFILE_FOLDER", "profiles")
+PROFILE_MAX_STORED = int(os.getenv("PROFILE_MAX_STORED", "50"))
+PROFILE_TOP_N = 30
+
+# tracemalloc is process-wide, so concurrent profiled requests share it
+_tracemalloc_users = 0
+_tracemalloc_lock = threading.Lock()
+
+
+def _start_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+        _tracemalloc_users += 1
+
+
+def _stop_tracemalloc():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+    return snapshot
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples the Python stacks of the profiled request thread and of any thread
+    started while the profile is running (e.g. chunk transcription workers).
+    """
+
+    def __init__(self, target_ident, interval):
+        super().__init__(name="request-profiler", daemon=True)
+        self.target_ident = target_ident
+        self.interval = interval
+        self.preexisting = set(sys._current_frames()) - {target_ident}
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident or ident in self.preexisting:
+                    continue
+                if ident not in names:
+                    thread = threading._active.get(ident)
+                    names[ident] = thread.name if thread else str(ident)
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names[ident])
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Context manager that profiles the calling thread and stores the result."""
+
+    def __init__(self, name, metadata=None):
+        self.name = name
+        self.metadata = metadata or {}
+        self.profile_id = f"{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def __enter__(self):
+        _start_tracemalloc()
+        self.sampler = _StackSampler(threading.get_ident(), PROFILE_SAMPLE_INTERVAL)
+        self.sampler.start()
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.disable()
+        duration = time.perf_counter() - self.started
+        self.sampler.stop()
+        snapshot = _stop_tracemalloc()
+        try:
+            self._store(duration, snapshot, exc)
+        except Exception as e:
+            logging.error(f"Failed to store profile {self.profile_id}: {e}")
+        return False
+
+    def _store(self, duration, snapshot, exc):
+        stats_output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stats_output)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP_N)
+
+        allocations = []
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            for stat in snapshot.statistics("lineno")[:PROFILE_TOP_N]:
+                frame = stat.traceback[0]
+                allocations.append({
+                    "site": f"{frame.filename}:{frame.lineno}",
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                })
+
+        record = {
+            "id": self.profile_id,
+            "name": self.name,
+            "created_at": datetime.utcnow().isoformat(),
+            "duration_sec": round(duration, 4),
+            "error": str(exc) if exc else None,
+            "samples": self.sampler.samples,
+            "sample_interval_sec": PROFILE_SAMPLE_INTERVAL,
+            "collapsed_stacks": [f"{stack} {count}" for stack, count in self.sampler.stacks.most_common()],
+            "cprofile_top": stats_output.getvalue(),
+            "top_allocations": allocations,
+            **self.metadata,
+        }
+        os.makedirs(PROFILE_FOLDER, exist_ok=True)
+        with open(os.path.join(PROFILE_FOLDER, f"{self.profile_id}.json"), "w") as f:
+            json.dump(record, f)
+        _prune_profiles()
+        logging.info(f"Stored profile {self.profile_id} for {self.name} ({duration:.2f}s)")
+
+
+def _prune_profiles():
+    """Keep only the PROFILE_MAX_STORED most recent profiles on disk."""
+    files = sorted(f for f in os.listdir(PROFILE_FOLDER) if f.endswith(".json"))
+    for stale in files[:-PROFILE_MAX_STORED]:
+        try:
+            os.remove(os.path.join(PROFILE_FOLDER, stale))
+        except OSError:
+            pass
+
+
+def should_profile(forced=False):
+    """Decide whether the current request is profiled."""
+    if forced:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def profiled(name, forced=None, metadata=None):
+    """
+    Decorator for a Flask view: run it under RequestProfiler when selected and
+    add an X-Profile-Id header to the response.
+
+    forced:   zero-arg callable, True when the caller explicitly asked for a profile
+    metadata: zero-arg callable returning extra fields to store with the profile
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not should_profile(forced() if forced else False):
+                return view(*args, **kwargs)
+            from flask import make_response
+            with RequestProfiler(name, metadata() if metadata else None) as profiler:
+                response = make_response(view(*args, **kwargs))
+            response.headers["X-Profile-Id"] = profiler.profile_id
+            return response
+        return wrapper
+    return decorator
+
+
+def list_profiles():
+    """Return summaries of the stored profiles, newest first."""
+    if not os.path.isdir(PROFILE_FOLDER):
+        return []
+    summaries = []
+    for filename in sorted(os.listdir(PROFILE_FOLDER), reverse=True):
+        if not filename.endswith(".json"):
+            continue
+        record = load_profile(filename[:-len(".json")])
+        if record:
+            summaries.append({k: v for k, v in record.items()
+                              if k not in ("collapsed_stacks", "cprofile_top", "top_allocations")})
+    return summaries
+
+
+def load_profile(profile_id):
+    """Return a stored profile by id, or None."""
+    if not profile_id or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+        return None
+    path = os.path.join(PROFILE_FOLDER, f"{profile_id}.json")
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,275 @@
+"""
+Timeouts, circuit breakers and bulkheads for external dependencies.
+
+Every outbound call goes through protected(dependency, operation), which
+  - takes a slot in the dependency's bulkhead (a bounded semaphore), so a
+    hanging dependency can hold at most max_concurrent worker threads,
+  - asks the dependency's circuit breaker for permission, failing fast with
+    DependencyUnavailable while the breaker is open,
+  - records the outcome in the breaker and in the metrics.
+
+Timeouts, bulkhead sizes and bulkhead waits per dependency come from
+<NAME>_TIMEOUT_SEC, <NAME>_MAX_CONCURRENT and <NAME>_BULKHEAD_WAIT_SEC (see
+DEPENDENCIES); call sites pass timeout(dependency) to their client, capped by
+the request deadline. Breaker state is reported by /health.
+
+Breaker: closed -> open once at least BREAKER_MIN_CALLS calls in the last
+BREAKER_WINDOW_SEC seconds failed at BREAKER_ERROR_RATE or more; open ->
+half-open after BREAKER_OPEN_SEC, when one trial call is let through; a
+success closes the breaker, a failure opens it again.
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import metrics
+import deadlines
+
+BREAKER_WINDOW_SEC = float(os.getenv("BREAKER_WINDOW_SEC", "30"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_OPEN_SEC = float(os.getenv("BREAKER_OPEN_SEC", "15"))
+
+
+def _dependency(name, timeout, max_concurrent, bulkhead_wait):
+    prefix = name.upper()
+    return {
+        "timeout": float(os.getenv(f"{prefix}_TIMEOUT_SEC", str(timeout))),
+        "max_concurrent": int(os.getenv(f"{prefix}_MAX_CONCURRENT", str(max_concurrent))),
+        # How long a call waits for a bulkhead slot before it is rejected
+        "bulkhead_wait": float(os.getenv(f"{prefix}_BULKHEAD_WAIT_SEC", str(bulkhead_wait))),
+    }
+
+
+DEPENDENCIES = {
+    # Transcription chunks queue for a slot rather than fail
+    "groq": _dependency("groq", 60, 16, 30),
+    "google_translate": _dependency("google_translate", 10, 16, 1),
+    "supabase": _dependency("supabase", 10, 32, 1),
+    "youtube": _dependency("youtube", 30, 8, 1),
+}
+
+
+class DependencyUnavailable(Exception):
+    """Raised instead of calling a dependency whose breaker is open or whose bulkhead is full."""
+
+    def __init__(self, dependency, reason):
+        super().__init__(f"{dependency} unavailable: {reason}")
+        self.dependency = dependency
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding time window."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, window_sec=BREAKER_WINDOW_SEC, min_calls=BREAKER_MIN_CALLS,
+                 error_rate=BREAKER_ERROR_RATE, open_sec=BREAKER_OPEN_SEC):
+        self.name = name
+        self.window_sec = window_sec
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.open_sec = open_sec
+        self.state = self.CLOSED
+        self.opened_at = None
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _prune(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_sec:
+            self._outcomes.popleft()
+
+    def allow(self):
+        """True if a call may go ahead now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.open_sec:
+                    return False
+                self._set_state(self.HALF_OPEN)
+            # Half-open: a single trial call at a time
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record(self, ok):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                self._outcomes.clear()
+                if ok:
+                    self._set_state(self.CLOSED)
+                else:
+                    self._open(now)
+                return
+            self._outcomes.append((now, ok))
+            self._prune(now)
+            failures = sum(1 for _, outcome in self._outcomes if not outcome)
+            if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.error_rate):
+                self._open(now)
+
+    def release_trial(self):
+        """Give back a half-open trial slot without an outcome (e.g. the call was cancelled)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def _open(self, now):
+        self.opened_at = now
+        self._set_state(self.OPEN)
+
+    def _set_state(self, state):
+        if state != self.state:
+            logging.warning(f"Circuit breaker {self.name}: {self.state} -> {state}")
+            self.state = state
+            metrics.BREAKER_STATE.labels(self.name).set({self.CLOSED: 0, self.HALF_OPEN: 1, self.OPEN: 2}[state])
+
+    def snapshot(self):
+        with self._lock:
+            now = time.monotonic()
+            self._prune(now)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            return {
+                "state": self.state,
+                "calls_in_window": len(self._outcomes),
+                "failures_in_window": failures,
+                "open_for_sec": round(max(0.0, self.open_sec - (now - self.opened_at)), 1)
+                if self.state == self.OPEN else 0,
+            }
+
+
+class Bulkhead:
+    """Caps the number of concurrent calls to one dependency."""
+
+    def __init__(self, name, max_concurrent):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, wait):
+        if not self._slots.acquire(timeout=wait):
+            return False
+        with self._lock:
+            self._in_use += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self._in_use -= 1
+        self._slots.release()
+
+    def in_use(self):
+        with self._lock:
+            return self._in_use
+
+
+_breakers = {name: CircuitBreaker(name) for name in DEPENDENCIES}
+_bulkheads = {name: Bulkhead(name, config["max_concurrent"]) for name, config in DEPENDENCIES.items()}
+
+
+def timeout(dependency):
+    """Configured per-call timeout for a dependency, in seconds."""
+    return DEPENDENCIES[dependency]["timeout"]
+
+
+def breaker(dependency):
+    return _breakers[dependency]
+
+
+class _Outcome:
+    """Lets the caller mark a call that returned normally as failed (e.g. an HTTP 5xx)."""
+
+    def __init__(self):
+        self.ok = True
+
+    def fail(self):
+        self.ok = False
+
+
+@contextmanager
+def guard(dependency, operation):
+    """Run one outbound call inside the dependency's bulkhead and circuit breaker."""
+    circuit = _breakers[dependency]
+    bulkhead = _bulkheads[dependency]
+    if not circuit.allow():
+        metrics.EXTERNAL_CALLS.labels(dependency, operation, "rejected").inc()
+        raise DependencyUnavailable(dependency, "circuit open")
+    if not bulkhead.acquire(deadlines.current().timeout(DEPENDENCIES[dependency]["bulkhead_wait"])):
+        circuit.release_trial()
+        metrics.EXTERNAL_CALLS.labels(dependency, operation, "rejected").inc()
+        raise DependencyUnavailable(dependency, "too many concurrent calls")
+    outcome = _Outcome()
+    recorded = False
+    try:
+        yield outcome
+        circuit.record(outcome.ok)
+        recorded = True
+    except Exception:
+        circuit.record(False)
+        recorded = True
+        raise
+    finally:
+        if not recorded:
+            # Cancelled (BaseException): says nothing about the dependency's health
+            circuit.release_trial()
+        bulkhead.release()
+
+
+@contextmanager
+def protected(dependency, operation):
+    """guard() plus the external call metrics; the usual wrapper for an outbound call."""
+    with guard(dependency, operation) as outcome, metrics.external_call(dependency, operation):
+        yield outcome
+
+
+class _GuardedTransport:
+    """httpx transport wrapper that routes every PostgREST request through protected()."""
+
+    def __init__(self, transport, dependency):
+        self._transport = transport
+        self._dependency = dependency
+
+    def handle_request(self, request):
+        # Timing and counting stay with metrics' transport wrapper, inside this one
+        table = request.url.path.rstrip("/").split("/rest/v1/")[-1] or "root"
+        with guard(self._dependency, f"{request.method} {table}") as outcome:
+            response = self._transport.handle_request(request)
+            # 4xx are the caller's fault; only 5xx count against the dependency
+            if response.status_code >= 500:
+                outcome.fail()
+            return response
+
+    def close(self):
+        self._transport.close()
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
+def protect_supabase(client):
+    """Put the Supabase client's PostgREST transport behind the supabase breaker and bulkhead."""
+    session = client.postgrest.session
+    if not isinstance(session._transport, _GuardedTransport):
+        session._transport = _GuardedTransport(session._transport, "supabase")
+    return client
+
+
+def status():
+    """Breaker and bulkhead state per dependency, for /health."""
+    return {
+        name: dict(_breakers[name].snapshot(),
+                   in_flight=_bulkheads[name].in_use(),
+                   max_concurrent=_bulkheads[name].max_concurrent,
+                   timeout_sec=DEPENDENCIES[name]["timeout"])
+        for name in DEPENDENCIES
+    }
@@ -0,0 +1,58 @@
+"""
+Bulk re-sync of user_analytics from the stored content, for every user.
+
+Walks the users with videos in user_id order (analytics_user_ids, keyset
+batches of --batch-size) and recomputes each batch's counters in the
+database with sync_user_analytics: one round trip per batch, nothing but
+user ids transferred. Needs migrations/003_analytics_aggregation.sql.
+
+    cd backend
+    python resync_analytics.py --batch-size 500
+    python resync_analytics.py --after <user_id>   # resume after a failure
+"""
+import sys
+import time
+import logging
+import argparse
+
+from server import get_supabase
+
+
+def resync(batch_size=500, after=None, dry_run=False):
+    """Re-sync every user after `after`. Returns (users, batches)."""
+    users = batches = 0
+    while True:
+        started = time.perf_counter()
+        batch = get_supabase().rpc("analytics_user_ids", {"p_after": after, "p_limit": batch_size}).execute().data or []
+        if not batch:
+            return users, batches
+        if not dry_run:
+            get_supabase().rpc("sync_user_analytics", {"p_user_ids": batch}).execute()
+        users += len(batch)
+        batches += 1
+        after = batch[-1]
+        logging.info(f"Batch {batches}: {len(batch)} users in {time.perf_counter() - started:.2f}s (last {after})")
+        if len(batch) < batch_size:
+            return users, batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute user_analytics for all users in batches")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--after", help="Only users whose id sorts after this one")
+    parser.add_argument("--dry-run", action="store_true", help="List the batches without syncing")
+    args = parser.parse_args()
+    # server.py logs to server.log; show the batch progress here too
+    logging.getLogger().addHandler(logging.StreamHandler())
+
+    started = time.perf_counter()
+    try:
+        users, batches = resync(args.batch_size, args.after, args.dry_run)
+    except Exception as e:
+        logging.error(f"Re-sync failed: {e}")
+        sys.exit(1)
+    print(f"Re-synced {users} users in {batches} batches ({time.perf_counter() - started:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
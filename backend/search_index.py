@@ -0,0 +1,220 @@
+"""
+Full-text search over users' transcript and subtitle segments.
+
+Each stored transcript (segments JSON) and subtitle (SRT) is split into its
+segments, and every segment is indexed with its timestamps, so a search
+returns where in which video a phrase was said rather than whole documents.
+
+Two backends, chosen with SEARCH_BACKEND:
+
+  sqlite    (default) an FTS5 index in a local file (SEARCH_INDEX_PATH).
+            The owner is an indexed column, so a user's query intersects
+            posting lists instead of filtering every user's matches.
+  postgres  the transcript_segments table in Supabase, a tsvector column
+            with a GIN index (migrations/001_transcript_search.sql), read
+            and written through the search_segments/replace_segments RPCs.
+
+Both tokenize without stemming ('simple' / unicode61), so a query matches
+the same segments whichever backend serves it. The index is updated
+incrementally: replace() swaps the segments of one (video, language, kind)
+document whenever that document is upserted.
+"""
+import os
+import re
+import sqlite3
+import logging
+import threading
+
+import srt
+
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "sqlite")
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", "search_index.db")
+SEARCH_MAX_LIMIT = 100
+KINDS = ("transcript", "subtitle")
+# "recent": newest video first, then by timestamp. "relevance": BM25 /
+# ts_rank, which has to score every match of the user, so it costs more on
+# common words.
+SORTS = ("recent", "relevance")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    video_id INTEGER NOT NULL,
+    language TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    seg_index INTEGER NOT NULL,
+    start_sec REAL,
+    end_sec REAL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_document ON segments (video_id, language, kind);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    text, owner, content='segments', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS segments_ai AFTER INSERT ON segments BEGIN
+    INSERT INTO segments_fts (rowid, text, owner) VALUES (new.id, new.text, new.owner);
+END;
+CREATE TRIGGER IF NOT EXISTS segments_ad AFTER DELETE ON segments BEGIN
+    INSERT INTO segments_fts (segments_fts, rowid, text, owner) VALUES ('delete', old.id, old.text, old.owner);
+END;
+"""
+
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def segments_from_srt(srt_text):
+    """Segments ({start, end, text}) of an SRT document."""
+    return [
+        {"start": cue.start.total_seconds(), "end": cue.end.total_seconds(), "text": cue.content}
+        for cue in srt.parse(srt_text or "")
+    ]
+
+
+def _rows(segments):
+    """(seg_index, start, end, text) for the non-empty segments, keeping their original index."""
+    return [
+        (index, segment.get("start"), segment.get("end"), segment["text"].strip())
+        for index, segment in enumerate(segments)
+        if segment.get("text") and segment["text"].strip()
+    ]
+
+
+def _owner_token(user_id):
+    # One bareword token per user (unicode61 would split a UUID at the hyphens)
+    return "u" + str(user_id).replace("-", "").lower()
+
+
+def to_match_query(query):
+    """
+    FTS5 MATCH expression for a user query: every word must match, "quoted
+    text" matches as a phrase and a trailing * makes a word a prefix (the
+    postgres backend's websearch_to_tsquery ignores the *). Returns
+    None when the query has no terms. User input never reaches FTS5 syntax
+    unquoted.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(query or ""):
+        prefix = False
+        if word:
+            prefix = word.endswith("*") and len(word.rstrip("*")) > 0
+            phrase = word.rstrip("*")
+        phrase = phrase.strip()
+        if phrase:
+            terms.append('"' + phrase.replace('"', '""') + '"' + ("*" if prefix else ""))
+    if not terms:
+        return None
+    return " AND ".join(terms)
+
+
+def _result(video_id, language, kind, index, start, end, text):
+    return {"video_id": video_id, "language": language, "kind": kind, "index": index,
+            "start": start, "end": end, "text": text}
+
+
+class SQLiteIndex:
+    """FTS5 index in a local SQLite file, one connection per thread."""
+
+    name = "sqlite"
+
+    def __init__(self, path=SEARCH_INDEX_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def replace(self, user_id, video_id, language, kind, segments):
+        """Replace the indexed segments of one document. Returns how many were indexed."""
+        rows = _rows(segments)
+        owner = _owner_token(user_id)
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM segments WHERE video_id = ? AND language = ? AND kind = ?",
+                         (video_id, language, kind))
+            conn.executemany(
+                "INSERT INTO segments (owner, video_id, language, kind, seg_index, start_sec, end_sec, text) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(owner, video_id, language, kind) + row for row in rows]
+            )
+        return len(rows)
+
+    def search(self, user_id, query, language=None, kind=None, video_id=None, sort="recent", limit=20, offset=0):
+        match = to_match_query(query)
+        if match is None:
+            return []
+        sql = [
+            "SELECT s.video_id, s.language, s.kind, s.seg_index, s.start_sec, s.end_sec, s.text",
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid",
+            "WHERE segments_fts MATCH ?",
+        ]
+        params = [f'owner : "{_owner_token(user_id)}" AND text : ({match})']
+        for column, value in (("language", language), ("kind", kind), ("video_id", video_id)):
+            if value is not None:
+                sql.append(f"AND s.{column} = ?")
+                params.append(value)
+        if sort == "relevance":
+            # bm25 weights: rank on the text only, the owner column just filters
+            sql.append("ORDER BY bm25(segments_fts, 1.0, 0.0), s.video_id DESC, s.seg_index")
+        else:
+            sql.append("ORDER BY s.video_id DESC, s.seg_index")
+        sql.append("LIMIT ? OFFSET ?")
+        params += [min(limit, SEARCH_MAX_LIMIT), offset]
+        return [_result(*row) for row in self._connection().execute(" ".join(sql), params)]
+
+
+class PostgresIndex:
+    """transcript_segments in Supabase (tsvector + GIN), through RPCs."""
+
+    name = "postgres"
+
+    def __init__(self, client_factory):
+        self.client_factory = client_factory
+
+    def replace(self, user_id, video_id, language, kind, segments):
+        segments = [{"index": index, "start": start, "end": end, "text": text}
+                    for index, start, end, text in _rows(segments)]
+        # One round trip: the function deletes and inserts in a single transaction
+        response = self.client_factory().rpc("replace_segments", {
+            "p_user_id": str(user_id), "p_video_id": video_id, "p_language": language,
+            "p_kind": kind, "p_segments": segments,
+        }).execute()
+        return response.data if isinstance(response.data, int) else len(segments)
+
+    def search(self, user_id, query, language=None, kind=None, video_id=None, sort="recent", limit=20, offset=0):
+        if to_match_query(query) is None:
+            return []
+        response = self.client_factory().rpc("search_segments", {
+            "p_user_id": str(user_id), "p_query": query, "p_language": language, "p_kind": kind,
+            "p_video_id": video_id, "p_sort": sort, "p_limit": min(limit, SEARCH_MAX_LIMIT), "p_offset": offset,
+        }).execute()
+        return [
+            _result(row["video_id"], row["language"], row["kind"], row["seg_index"],
+                    row["start_sec"], row["end_sec"], row["text"])
+            for row in response.data or []
+        ]
+
+
+def open_index(backend=SEARCH_BACKEND, client_factory=None):
+    """The configured index. Nothing is opened or queried until first use."""
+    if backend == "postgres":
+        if client_factory is None:
+            raise ValueError("The postgres search backend needs a Supabase client factory")
+        return PostgresIndex(client_factory)
+    if backend != "sqlite":
+        logging.warning(f"Unknown SEARCH_BACKEND '{backend}', using sqlite")
+    return SQLiteIndex()
@@ -1,30 +1,53 @@
 import os
 # import yt_dlp  # COMMENTED OUT - REPLACED WITH PYTUBEFIX
-from pytubefix import YouTube
-from pytubefix.cli import on_progress
 import tempfile
-from flask import Flask, request, jsonify
+import shutil
+from flask import Flask, request, jsonify, g, Response, send_file
 from flask_cors import CORS
-from google.cloud import translate_v2 as translate
-from groq import Groq
 from dotenv import load_dotenv
 import srt
 from datetime import timedelta
-from pydub import AudioSegment
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
-from supabase import create_client, Client
 import hashlib
+import itertools
 import json
 import logging
 import re
 from datetime import datetime, timedelta as dt_timedelta
 import base64
-import requests
+import audio_pool
+import asr_engines
+import translation_engines
+import checkpoints
+import deadlines
+import contextvars
+import threading
+import queue
+import metrics
+import resilience
+import event_loop
+import downloads
+import dubbing
+import batch
+import search_index
+import artifact_store
+import pagination
+import transcript_slices
+import profiling
+import structured_logging
+import usage
+import hmac
+import time
 
 # ---------- ENV & API KEYS ----------
 # Load environment variables
 load_dotenv(override=True)
+
+# ---------- LOGGING ----------
+# Records go through a queue to a writer thread as JSON lines (LOG_* in .env)
+structured_logging.configure()
+
 groq_key = os.getenv('GROQ_API_KEY', '').split(',')[0].strip()
 
 # Set Google Application Credentials - handle both file path and JSON string
@@ -42,16 +65,15 @@ if google_creds_json:
         missing_fields = [field for field in required_fields if field not in creds_data]
         
         if missing_fields:
-            print(f"Error: Missing required fields in credentials: {missing_fields}")
+            logging.error(f"Missing required fields in Google credentials: {missing_fields}")
             google_creds_json = None
         else:
-            print("Google credentials JSON validated successfully")
+            logging.info("Google credentials JSON validated successfully")
     except json.JSONDecodeError as e:
-        print(f"Error: Invalid JSON in GOOGLE_APPLICATION_CREDENTIALS_JSON: {e}")
-        print("Using local file fallback...")
+        logging.error(f"Invalid JSON in GOOGLE_APPLICATION_CREDENTIALS_JSON, using local file fallback: {e}")
         google_creds_json = None
     except Exception as e:
-        print(f"Error processing Google credentials: {e}")
+        logging.error(f"Error processing Google credentials: {e}")
         google_creds_json = None
         
 if not google_creds_json:
@@ -60,9 +82,9 @@ if not google_creds_json:
     google_creds_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), google_creds_file)
     if os.path.exists(google_creds_path):
         google_creds_file_path = google_creds_path
-        print(f"Google credentials loaded from file: {google_creds_path}")
+        logging.info(f"Google credentials loaded from file: {google_creds_path}")
     else:
-        print(f"Warning: Google credentials file not found at {google_creds_path}")
+        logging.warning(f"Google credentials file not found at {google_creds_path}")
         google_creds_file_path = None
 
 # Initialize Flask app
@@ -72,7 +94,8 @@ app = Flask(__name__)
 CORS(app, 
      origins="*",  # Allow all origins for tunneling
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     allow_headers=["Content-Type", "Authorization", "X-User-Id"],
+     allow_headers=["Content-Type", "Authorization", "X-User-Id", "X-Admin-Token", "X-Profile", "X-Request-Id"],
+     expose_headers=["X-Profile-Id", "Content-Disposition", "ETag", "X-Request-Id"],
      supports_credentials=True
 )
 
@@ -80,39 +103,121 @@ UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
-# Initialize Google Translate client with error handling
-translate_client = None
-try:
-    # For JSON string credentials, use direct client initialization
-    if google_creds_json:
-        # Parse credentials and create client directly without environment variables
-        creds_data = json.loads(google_creds_json)
-        translate_client = translate.Client.from_service_account_info(creds_data)
-        print("Google Translate client initialized successfully from JSON credentials")
-    elif google_creds_file_path and os.path.exists(google_creds_file_path):
-        # For file-based credentials (local development)
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = google_creds_file_path
-        translate_client = translate.Client()
-        print("Google Translate client initialized successfully from file credentials")
-    else:
-        print("Google credentials not available - translate features will be disabled")
-        
-except json.JSONDecodeError as e:
-    print(f"Error parsing Google credentials JSON: {e}")
-    print("Translation features will be disabled - app will continue running")
-    translate_client = None
-except Exception as e:
-    print(f"Error initializing Google Translate client: {e}")
-    print("Translation features will be disabled - app will continue running")
-    translate_client = None
+# ---------- CLIENTS ----------
+# The SDKs are imported and the clients built on first use rather than at
+# import, so a cold start reaches /health quickly. prewarm_clients() builds
+# them in the background once the first health check has passed.
+
+class LazyClient:
+    """Builds a client once, on first get(), safely across request threads."""
+
+    def __init__(self, name, build):
+        self.name = name
+        self._build = build
+        self._client = None
+        self._built = False
+        self._lock = threading.Lock()
+
+    def get(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    started = time.perf_counter()
+                    self._client = self._build()
+                    self._built = True
+                    logging.info(f"Built {self.name} client in {time.perf_counter() - started:.3f}s")
+        return self._client
+
+
+def YouTube(*args, **kwargs):
+    """pytubefix.YouTube, imported on first use."""
+    from pytubefix import YouTube as PytubeYouTube
+    return PytubeYouTube(*args, **kwargs)
+
+
+def Playlist(url):
+    """pytubefix.Playlist (or Channel, for a channel URL), imported on first use."""
+    if re.search(r"youtube\.com/(@|channel/|c/|user/)", url):
+        from pytubefix import Channel
+        return Channel(url)
+    from pytubefix import Playlist as PytubePlaylist
+    return PytubePlaylist(url)
+
+
+def _build_groq_client():
+    # One client for the process: its httpx pool keeps connections to Groq open across requests
+    from groq import Groq
+    return usage.instrument_groq(Groq(api_key=groq_key))
+
+
+def _build_translate_client():
+    """Google Translate client, or None when credentials are missing or invalid."""
+    from google.cloud import translate_v2 as translate
+    try:
+        # Local emulator / fake endpoint (benchmarks): no credentials needed
+        if os.getenv("GOOGLE_TRANSLATE_ENDPOINT"):
+            from google.auth.credentials import AnonymousCredentials
+            translate_client = translate.Client(
+                credentials=AnonymousCredentials(),
+                client_options={"api_endpoint": os.getenv("GOOGLE_TRANSLATE_ENDPOINT")}
+            )
+            logging.info(f"Google Translate client using endpoint {os.getenv('GOOGLE_TRANSLATE_ENDPOINT')}")
+            return translate_client
+        # For JSON string credentials, use direct client initialization
+        if google_creds_json:
+            # Parse credentials and create client directly without environment variables
+            creds_data = json.loads(google_creds_json)
+            translate_client = translate.Client.from_service_account_info(creds_data)
+            logging.info("Google Translate client initialized successfully from JSON credentials")
+            return translate_client
+        if google_creds_file_path and os.path.exists(google_creds_file_path):
+            # For file-based credentials (local development)
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = google_creds_file_path
+            translate_client = translate.Client()
+            logging.info("Google Translate client initialized successfully from file credentials")
+            return translate_client
+        logging.warning("Google credentials not available - translate features will be disabled")
+    except json.JSONDecodeError as e:
+        logging.error(f"Error parsing Google credentials JSON, translation features will be disabled: {e}")
+    except Exception as e:
+        logging.error(f"Error initializing Google Translate client, translation features will be disabled: {e}")
+    return None
+
 
 # ---------- SUPABASE CONFIG ----------
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY") 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# ---------- LOGGING ----------
-logging.basicConfig(filename="server.log", level=logging.INFO)
+
+def _build_supabase():
+    from supabase import create_client, ClientOptions
+    debug_supabase_config()
+    return resilience.protect_supabase(metrics.instrument_supabase(create_client(
+        SUPABASE_URL, SUPABASE_KEY,
+        options=ClientOptions(postgrest_client_timeout=resilience.timeout("supabase"))
+    )))
+
+
+_groq = LazyClient("groq", _build_groq_client)
+_translate = LazyClient("google_translate", _build_translate_client)
+_supabase = LazyClient("supabase", _build_supabase)
+
+
+def get_groq_client():
+    return _groq.get()
+
+
+def get_translate_client():
+    return _translate.get()
+
+
+def get_supabase():
+    return _supabase.get()
+
+
+translation_engines.get_engine("google").client_factory = get_translate_client
+search = search_index.open_index(client_factory=get_supabase)
+artifacts = artifact_store.open_store()
 
 # ---------- CORS PREFLIGHT HANDLER ----------
 @app.before_request
@@ -120,11 +225,51 @@ def handle_preflight():
     if request.method == "OPTIONS":
         response = jsonify()
         response.headers.add("Access-Control-Allow-Origin", "*")
-        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization,X-User-Id")
+        response.headers.add("Access-Control-Allow-Headers", "Content-Type,Authorization,X-User-Id,X-Admin-Token,X-Profile,X-Request-Id")
         response.headers.add("Access-Control-Allow-Methods", "GET,PUT,POST,DELETE,OPTIONS")
         response.headers.add("Access-Control-Allow-Credentials", "true")
         return response
 
+# ---------- REQUEST CONTEXT ----------
+@app.before_request
+def bind_request_context():
+    # Every record logged while serving the request carries its id and user
+    g.log_context = structured_logging.bind_request(
+        request.headers.get("X-Request-Id"), request.headers.get("X-User-Id")
+    )
+    # External API usage of the request (usage.record() adds to it)
+    g.usage, g.usage_context = usage.bind()
+
+@app.after_request
+def echo_request_id(response):
+    request_id = structured_logging.current_request_id()
+    if request_id:
+        response.headers["X-Request-Id"] = request_id
+    return response
+
+@app.teardown_request
+def unbind_request_context(exc):
+    usage_token = g.pop("usage_context", None)
+    if usage_token is not None:
+        usage.unbind(usage_token)
+        account_request_usage(g.pop("usage"), get_user_id())
+    token = g.pop("log_context", None)
+    if token is not None:
+        structured_logging.unbind_request(token)
+
+# ---------- REQUEST METRICS ----------
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.get("request_start")
+    if start is not None:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe_request(endpoint, request.method, response.status_code, time.perf_counter() - start)
+    return response
+
 # ---------- RATE LIMITING ----------
 rate_limit_cache = {}
 
@@ -152,74 +297,84 @@ def rate_limit(user_id, limit=10, window_sec=60):
 
 # ---------- AUDIO CHUNKING UTILS ----------
 
+@metrics.traced("preprocess_audio")
 def preprocess_audio(input_path):
-    """Convert input audio to 16kHz mono FLAC for Whisper."""
-    audio = AudioSegment.from_file(input_path)
-    audio = audio.set_frame_rate(16000).set_channels(1)
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".flac")
-    audio.export(temp_file.name, format="flac")
-    return temp_file.name
+    """Convert input audio to 16kHz mono FLAC for Whisper (runs in the audio process pool)."""
+    with audio_pool.decode_pcm(input_path) as pcm:
+        return audio_pool.encode_pcm(pcm, fmt="flac")
 
+@metrics.traced("split_audio_chunks")
 def split_audio_chunks(input_path, chunk_duration=60):
     """
     Split audio into chunks of chunk_duration seconds.
     Returns list of (chunk_path, index, chunk_start_sec).
+    Decoding and chunk encoding run in parallel in the audio process pool.
     """
-    audio = AudioSegment.from_file(input_path)
-    chunks = []
-    for i in range(0, len(audio), chunk_duration * 1000):
-        chunk = audio[i:i + chunk_duration * 1000]
-        temp_chunk = tempfile.NamedTemporaryFile(delete=False, suffix=".flac")
-        chunk.export(temp_chunk.name, format="flac")
-        chunk_start_sec = i // 1000
-        chunk_index = len(chunks)
-        chunks.append((temp_chunk.name, chunk_index, chunk_start_sec))
-    return chunks
+    with audio_pool.decode_pcm(input_path) as pcm:
+        return audio_pool.encode_chunks(pcm, chunk_duration=chunk_duration, fmt="flac")
 
-def transcribe_chunk_sync(chunk_path, language_hint="en", chunk_start_sec=0):
+@metrics.traced("transcribe_chunk_sync")
+def transcribe_chunk_sync(chunk_path, language_hint="en", chunk_start_sec=0, engine=None, on_success=None):
     """
-    Synchronous transcription for a single chunk.
+    Synchronous transcription for a single chunk with the given ASR engine (Groq by default).
     Adjust segment start/end times by chunk_start_sec.
+    on_success(segments) is called only when the engine succeeded (failures return []).
     """
-    client = Groq(api_key=groq_key)
+    engine = engine or asr_engines.get_engine("groq")
+    # Don't start a chunk for a request that was cancelled while this one was queued
+    deadlines.current().check()
     try:
-        with open(chunk_path, "rb") as file:
-            result = client.audio.transcriptions.create(
-                file=(chunk_path, file.read()),
-                model="whisper-large-v3-turbo",
-                response_format="verbose_json",
-                language=language_hint
-            )
-            # Adjust segment times
-            for seg in result.segments:
-                seg['start'] += chunk_start_sec
-                seg['end'] += chunk_start_sec
-            return result.segments
+        segments = engine.transcribe(chunk_path, language_hint, chunk_start_sec)
     except Exception as e:
-        logging.error(f"Transcription failed for {chunk_path}: {e}")
+        logging.error(f"Transcription failed for {chunk_path} ({engine.name}): {e}")
         return []
+    if on_success:
+        on_success(segments)
+    return segments
 
-async def transcribe_chunk(chunk_path, index, chunk_start_sec, language_hint="en", executor=None):
+async def transcribe_chunk(chunk_path, index, chunk_start_sec, language_hint="en", executor=None, engine=None, on_success=None):
     """
     Async wrapper for transcribing a chunk using ThreadPoolExecutor.
     """
     loop = asyncio.get_event_loop()
-    segments = await loop.run_in_executor(executor, transcribe_chunk_sync, chunk_path, language_hint, chunk_start_sec)
+    # Carry the request's deadline (and tracing span) into the worker thread
+    context = contextvars.copy_context()
+    segments = await loop.run_in_executor(executor, context.run, transcribe_chunk_sync, chunk_path, language_hint, chunk_start_sec, engine, on_success)
     return (index, segments)
 
-async def transcribe_all_chunks(chunk_infos, language_hint="en"):
+async def transcribe_all_chunks(chunk_infos, language_hint="en", engine=None, on_chunk_done=None):
     """
     Transcribe all chunks concurrently using asyncio and ThreadPoolExecutor.
+    The executor is sized by the engine (local CPU engines cap it at their worker count).
+    on_chunk_done(chunk_info, segments) runs as each chunk succeeds (used for checkpoints).
+    If the request deadline passes or the client disconnects, queued chunks are
+    cancelled (chunks already in flight finish and are still checkpointed) and
+    deadlines.Cancelled is raised.
     Returns list of (index, segments).
     """
-    executor = ThreadPoolExecutor()
+    deadline = deadlines.current()
+    executor = ThreadPoolExecutor(max_workers=engine.max_concurrency if engine else None)
     tasks = [
-        transcribe_chunk(chunk_path, idx, chunk_start_sec, language_hint, executor)
+        asyncio.ensure_future(transcribe_chunk(
+            chunk_path, idx, chunk_start_sec, language_hint, executor, engine,
+            (lambda segments, info=(chunk_path, idx, chunk_start_sec): on_chunk_done(info, segments))
+            if on_chunk_done else None))
         for chunk_path, idx, chunk_start_sec in chunk_infos
     ]
-    results = await asyncio.gather(*tasks)
-    executor.shutdown(wait=True)
-    return results
+    try:
+        pending = set(tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=deadlines.DISCONNECT_POLL_SEC)
+            if pending and deadline.is_cancelled():
+                for task in pending:
+                    task.cancel()
+                break
+        # Settle (and retrieve) every task, including the ones just cancelled
+        await asyncio.gather(*tasks, return_exceptions=True)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    deadline.check()
+    return [task.result() for task in tasks]
 
 def merge_transcriptions(transcriptions):
     """
@@ -420,37 +575,59 @@ def download_audio(youtube_url):
 """
 
 # PYTUBEFIX IMPLEMENTATION
-def download_audio(youtube_url):
+class YouTubeError(Exception):
+    """A video that can't be fetched (bad URL, unavailable, private, ...), with a message for the user."""
+
+def youtube_error(error):
+    """Map a pytubefix error to a user-friendly YouTubeError, or None when it isn't about the video."""
+    message = str(error).lower()
+    if "regex_search" in message or "could not find match" in message:
+        return YouTubeError("This is not a valid YouTube video URL. Please check the URL and try again.")
+    if "unavailable" in message:
+        return YouTubeError("This video is unavailable, private, or has been removed. Please check the URL and try again.")
+    if "age" in message and "restricted" in message:
+        return YouTubeError("This video is age-restricted and cannot be downloaded. Please try a different video.")
+    if "live" in message:
+        return YouTubeError("Live streams cannot be downloaded. Please try a regular video.")
+    if "private" in message:
+        return YouTubeError("This video is private and cannot be accessed. Please try a different video.")
+    if "region" in message or "blocked" in message:
+        return YouTubeError("This video is blocked in your region. Please try a different video.")
+    return None
+
+def open_youtube(youtube_url):
+    """The pytubefix YouTube object of a URL. Raises YouTubeError for a malformed URL."""
+    try:
+        return YouTube(youtube_url)
+    except Exception as e:
+        logging.error(f"Invalid YouTube URL {youtube_url}: {e}")
+        raise youtube_error(e) or YouTubeError(f"Invalid YouTube URL: {e}")
+
+@metrics.traced("download_audio")
+def download_audio(youtube_url, yt=None):
     """
-    Download audio from YouTube using pytubefix library.
-    
-    pytubefix offers several advantages over yt-dlp:
-    - Simpler API and more reliable for audio-only downloads
-    - Better handling of YouTube's anti-bot measures
-    - Native Python implementation with built-in progress tracking
-    - More consistent file handling and naming
-    
-    Returns:
-        str: Path to the downloaded audio file (.m4a format)
+    Download the audio of a YouTube video with pytubefix and convert it to
+    MP3 in the audio process pool. Returns the path of the .mp3 (or of the
+    original file if conversion failed).
+
+    Each call downloads into its own directory under UPLOAD_FOLDER so
+    concurrent requests never overwrite each other's files; the caller removes
+    it with cleanup_download().
+
+    Pass the video's YouTube object (open_youtube()) as `yt` when the caller
+    also needs its title: one metadata fetch then serves both. Problems with
+    the video itself raise YouTubeError with a user-friendly message.
     """
+    download_dir = tempfile.mkdtemp(prefix="download_", dir=UPLOAD_FOLDER)
     try:
-        # Clean up any existing files in upload folder
-        for file in os.listdir(UPLOAD_FOLDER):
-            file_path = os.path.join(UPLOAD_FOLDER, file)
-            try:
-                if os.path.isfile(file_path):
-                    os.unlink(file_path)
-            except Exception as e:
-                logging.warning(f"Error cleaning uploads: {e}")
-
         logging.info(f"Starting YouTube download with pytubefix for URL: {youtube_url}")
         
         # Create YouTube object with progress callback
-        yt = YouTube(youtube_url, on_progress_callback=on_progress)
+        yt = yt or open_youtube(youtube_url)
+        yt.register_on_progress_callback(structured_logging.ProgressLogger("YouTube download"))
         
         # Log video title for debugging
         logging.info(f"Video title: {yt.title}")
-        print(f"Downloading: {yt.title}")
         
         # Get the highest quality audio-only stream
         # This will download .m4a format which is compatible with our transcription pipeline
@@ -472,10 +649,16 @@ def download_audio(youtube_url):
         
         # Download the audio file
         logging.info(f"Downloading audio stream: {audio_stream.mime_type}, {audio_stream.abr}")
-        downloaded_file = audio_stream.download(
-            output_path=UPLOAD_FOLDER,
-            filename=output_filename
-        )
+        deadline = deadlines.current()
+        with resilience.protected("youtube", "download"):
+            downloaded_file = audio_stream.download(
+                output_path=download_dir,
+                filename=output_filename,
+                timeout=int(deadline.timeout(resilience.timeout("youtube"))),
+                interrupt_checker=deadline.is_cancelled
+            )
+        # pytubefix returns None when interrupt_checker stopped the download
+        deadline.check()
         
         logging.info(f"Download completed: {downloaded_file}")
         
@@ -486,12 +669,11 @@ def download_audio(youtube_url):
             needs_conversion = False
         
         if needs_conversion:
-            mp3_file = os.path.join(UPLOAD_FOLDER, "downloaded_audio.mp3")
+            mp3_file = os.path.join(download_dir, "downloaded_audio.mp3")
             try:
-                # Convert audio to mp3 using pydub (auto-detects format)
+                # Convert audio to mp3 in the audio process pool (ffmpeg auto-detects format)
                 logging.info(f"Converting audio to MP3...")
-                audio = AudioSegment.from_file(downloaded_file)
-                audio.export(mp3_file, format="mp3", bitrate="192k")
+                audio_pool.transcode(downloaded_file, mp3_file, fmt="mp3", bitrate="192k")
                 
                 # Clean up the original file
                 os.remove(downloaded_file)
@@ -504,23 +686,20 @@ def download_audio(youtube_url):
         
         return downloaded_file
         
+    except (deadlines.Cancelled, YouTubeError):
+        shutil.rmtree(download_dir, ignore_errors=True)
+        raise
     except Exception as e:
-        error_msg = str(e)
-        logging.error(f"pytubefix download failed: {error_msg}")
-        
+        shutil.rmtree(download_dir, ignore_errors=True)
+        logging.error(f"pytubefix download failed: {e}")
         # Provide user-friendly error messages
-        if "unavailable" in error_msg.lower():
-            raise Exception("This video is unavailable, private, or has been removed. Please check the URL and try again.")
-        elif "age" in error_msg.lower() and "restricted" in error_msg.lower():
-            raise Exception("This video is age-restricted and cannot be downloaded. Please try a different video.")
-        elif "live" in error_msg.lower():
-            raise Exception("Live streams cannot be downloaded. Please try a regular video.")
-        elif "private" in error_msg.lower():
-            raise Exception("This video is private and cannot be accessed. Please try a different video.")
-        elif "region" in error_msg.lower() or "blocked" in error_msg.lower():
-            raise Exception("This video is blocked in your region. Please try a different video.")
-        else:
-            raise Exception(f"Failed to download video: {error_msg}")
+        raise youtube_error(e) or Exception(f"Failed to download video: {e}")
+
+def cleanup_download(audio_path):
+    """Remove the per-request directory created by download_audio."""
+    download_dir = os.path.dirname(audio_path)
+    if os.path.basename(download_dir).startswith("download_"):
+        shutil.rmtree(download_dir, ignore_errors=True)
 
 def get_youtube_title(youtube_url):
     """
@@ -533,85 +712,165 @@ def get_youtube_title(youtube_url):
     """
     try:
         # Create YouTube object for metadata extraction only
-        yt = YouTube(youtube_url)
-        return yt.title or 'Untitled YouTube Video'
+        with resilience.protected("youtube", "metadata"):
+            yt = YouTube(youtube_url)
+            return yt.title or 'Untitled YouTube Video'
         
     except Exception as e:
         # Log error but don't fail the entire process for missing title
         logging.error(f"Failed to fetch YouTube title with pytubefix: {e}")
         return 'YouTube Video'  # Generic fallback title
 
-def generate_subtitles_async(filename, language_hint="en"):
-    """
-    Optimized transcription using a single Groq API key.
-    Splits audio into chunks, transcribes in parallel using asyncio.
-    Returns all segments in order.
-    """
-    processed_file = preprocess_audio(filename)
-    chunk_infos = split_audio_chunks(processed_file, chunk_duration=60)
-    # Run async transcription
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    transcriptions = loop.run_until_complete(transcribe_all_chunks(chunk_infos, language_hint))
-    loop.close()
-    all_segments = merge_transcriptions(transcriptions)
-    cleanup_temp_files(chunk_infos)
+# Used when the caller gives no source language and detection fails
+DEFAULT_SOURCE_LANGUAGE = os.getenv("DEFAULT_SOURCE_LANGUAGE", "en")
+
+@metrics.traced("detect_language")
+def detect_language_chunk(chunk_info, engine):
+    """
+    Transcribe the first chunk without a language hint and return
+    ((index, segments), language). The segments are None if detection failed,
+    so the chunk is transcribed again with the fallback language.
+    """
+    chunk_path, idx, chunk_start_sec = chunk_info
     try:
-        os.remove(processed_file)
+        segments, language = engine.detect_and_transcribe(chunk_path, chunk_start_sec)
     except Exception as e:
-        logging.warning(f"Failed to delete processed file {processed_file}: {e}")
-    return all_segments
+        logging.error(f"Language detection failed for {chunk_path} ({engine.name}): {e}")
+        return None, DEFAULT_SOURCE_LANGUAGE
+    return (idx, segments), language or DEFAULT_SOURCE_LANGUAGE
+
+@metrics.traced("generate_subtitles")
+def generate_subtitles_async(filename, language_hint=None, asr_engine=None):
+    """
+    Optimized transcription with a pluggable ASR engine.
+    Splits audio into chunks, transcribes in parallel on the shared event loop.
+    asr_engine names an engine ("groq", "local", "auto"); None applies the ASR_ENGINE policy.
+    Without a language_hint the first chunk is transcribed alone to detect the
+    language, and the remaining chunks run in parallel with that hint.
+    Every finished chunk is checkpointed, so a rerun on the same audio only
+    transcribes the chunks that are still missing.
+    Returns (all segments in order, source language code, complete) where
+    complete is False if any chunk failed.
+    """
+    chunk_duration = 60
+    # Decode/resample once, then encode the missing chunks straight from the shared PCM
+    with audio_pool.decode_pcm(filename) as pcm:
+        engine = asr_engines.select_engine(asr_engine, duration_sec=pcm.duration_sec)
+        store = checkpoints.open_store(pcm)
+        bounds = audio_pool.chunk_bounds(pcm, chunk_duration)
+        language_hint = language_hint or store.load_language()
+        done = {}
+        if language_hint:
+            for idx, start_sec, end_sec in bounds:
+                segments = store.load_chunk(engine.name, language_hint, start_sec, end_sec)
+                if segments is not None:
+                    done[idx] = segments
+        chunk_infos = audio_pool.encode_chunks(pcm, chunk_duration=chunk_duration, fmt="flac", skip=done)
+    usage.record(cache_hits=len(done),
+                 cached_audio_seconds=sum(end_sec - start_sec for idx, start_sec, end_sec in bounds if idx in done))
+    logging.info(f"Transcribing {len(chunk_infos)} of {len(bounds)} chunks with the {engine.name} ASR engine "
+                 f"({len(done)} from checkpoints)")
+
+    end_of_chunk = {idx: end_sec for idx, _, end_sec in bounds}
+
+    def checkpoint(chunk_info, segments):
+        _, idx, start_sec = chunk_info
+        done[idx] = segments
+        try:
+            store.save_chunk(engine.name, language_hint, start_sec, end_of_chunk[idx], segments)
+        except Exception as e:
+            logging.warning(f"Could not checkpoint chunk {idx}: {e}")
 
+    remaining = chunk_infos
+    if not language_hint and chunk_infos:
+        try:
+            deadlines.current().check()
+        except deadlines.Cancelled:
+            cleanup_temp_files(chunk_infos)
+            raise
+        first, language_hint = detect_language_chunk(chunk_infos[0], engine)
+        logging.info(f"Detected source language: {language_hint}")
+        if first:
+            store.save_language(language_hint)
+            checkpoint(chunk_infos[0], first[1])
+            remaining = chunk_infos[1:]
+
+    # Run async transcription on the process-wide loop
+    try:
+        event_loop.run(transcribe_all_chunks(remaining, language_hint, engine, on_chunk_done=checkpoint))
+    finally:
+        cleanup_temp_files(chunk_infos)
+
+    all_segments = merge_transcriptions(list(done.items()))
+    complete = len(done) == len(bounds)
+    if complete:
+        store.clear()
+    else:
+        logging.warning(f"Transcript incomplete: {len(bounds) - len(done)} of {len(bounds)} chunks failed")
+    return all_segments, language_hint, complete
+
+@metrics.traced("groq_summarize")
 def groq_summarize(prompt):
     """Summarize text using Groq LLM."""
-    client = Groq(api_key=groq_key)
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[
-            {
-                "role": "system",
-                "content": """You are a helpful assistant that summarizes all of the text covering
+    deadline = deadlines.current()
+    deadline.check()
+    timeout = deadline.timeout(resilience.timeout("groq"))
+    # No SDK retries when the deadline already caps this attempt
+    client = get_groq_client()
+    if timeout < resilience.timeout("groq"):
+        client = client.with_options(max_retries=0)
+    with resilience.protected("groq", "chat.completions"):
+        completion = client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {
+                    "role": "system",
+                    "content": """You are a helpful assistant that summarizes all of the text covering
                  all the important points. Return the summary in Markdown format.
                  Give the summary directly without any additional text or explanation."""
-            },
-            {
-                "role": "user",
-                "content": prompt
-            }
-        ],
-        temperature=0.3,
-        max_tokens=1024,
-        top_p=1
-    )
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            temperature=0.3,
+            max_tokens=1024,
+            top_p=1,
+            timeout=timeout
+        )
+    if completion.usage:
+        usage.record(llm_calls=1, llm_tokens_in=completion.usage.prompt_tokens,
+                     llm_tokens_out=completion.usage.completion_tokens)
     return completion.choices[0].message.content
 
-def format_srt(segments, target_language=None):
-    """Format segments as SRT subtitles, optionally translating."""
-    subtitles = []
-    for i, seg in enumerate(segments):
-        start = timedelta(seconds=seg['start'])
-        end = timedelta(seconds=seg['end'])
-        text = seg['text'].strip()
-
-        if target_language:
-            text = translate_text(text, target_language)
+def summarize_segments(segments):
+    """Summary of a transcript's segments."""
+    text_to_summarize = "\n".join(seg['text'] for seg in segments)
+    return groq_summarize(f"Please summarize the following text concisely:\n\n{text_to_summarize}")
 
-        subtitles.append(srt.Subtitle(index=i+1, start=start, end=end, content=text))
+@metrics.traced("format_srt")
+def format_srt(segments, target_language=None, source_language=None):
+    """
+    Format segments as SRT subtitles, optionally translating (one batched call
+    for all segments, routed within the time left to the current stage).
+    """
+    texts = [seg['text'].strip() for seg in segments]
+    if target_language:
+        texts = translation_engines.translate_many(
+            texts, source_language, target_language, latency_budget=deadlines.current().remaining())
 
+    subtitles = [
+        srt.Subtitle(index=i+1, start=timedelta(seconds=seg['start']), end=timedelta(seconds=seg['end']), content=text)
+        for i, (seg, text) in enumerate(zip(segments, texts))
+    ]
     return srt.compose(subtitles)
 
-def translate_text(text, target_language):
-    """Translate text using Google Translate API."""
-    if not translate_client:
-        print("Warning: Google Translate client not available, returning original text")
-        return text
-    
-    try:
-        result = translate_client.translate(text, target_language=target_language, format_="text")
-        return result["translatedText"]
-    except Exception as e:
-        print(f"Error translating text: {e}")
-        return text
+@metrics.traced("translate_text")
+def translate_text(text, target_language, source_language=None):
+    """Translate a single text with the routed translation engine, within the current stage's time left."""
+    return translation_engines.translate_many(
+        [text], source_language, target_language, latency_budget=deadlines.current().remaining())[0]
 
 def get_user_id():
     """
@@ -619,6 +878,19 @@ def get_user_id():
     """
     return request.headers.get("X-User-Id")
 
+def is_admin_request():
+    """
+    True when the request carries the X-Admin-Token matching ADMIN_TOKEN.
+    Admin features are disabled entirely when ADMIN_TOKEN is not set.
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    provided = request.headers.get("X-Admin-Token", "")
+    return bool(admin_token) and hmac.compare_digest(provided.encode(), admin_token.encode())
+
+def profile_requested():
+    """True when an admin explicitly asked for this request to be profiled."""
+    return request.headers.get("X-Profile") == "1" and is_admin_request()
+
 def hash_file(filepath):
     """
     Return SHA256 hash of file for unique identification.
@@ -629,19 +901,21 @@ def hash_file(filepath):
             sha256.update(chunk)
     return sha256.hexdigest()
 
-def get_youtube_title(youtube_url):
+def get_youtube_title(youtube_url, yt=None):
     """
     Fetch YouTube video title using pytubefix.
     
     This function extracts video metadata without downloading the actual video.
+    A YouTube object that already fetched it (download_audio's) is reused as `yt`.
     
     Returns:
         str: Video title or fallback title if extraction fails
     """
     try:
         # Create YouTube object for metadata extraction only
-        yt = YouTube(youtube_url)
-        return yt.title or 'Untitled YouTube Video'
+        with resilience.protected("youtube", "metadata"):
+            yt = yt or YouTube(youtube_url)
+            return yt.title or 'Untitled YouTube Video'
         
     except Exception as e:
         # Log error but don't fail the entire process for missing title
@@ -686,10 +960,11 @@ def get_youtube_title(youtube_url):
         return 'YouTube Video'  # Generic fallback title
 """
 
-def get_or_create_video_id(video_url, user_id, is_uploaded=False, file_hash=None):
+def get_or_create_video_id(video_url, user_id, is_uploaded=False, file_hash=None, yt=None):
     """
     Check if Video_url row exists for user/video.
-    If not, upsert and return id. Also fetch YouTube title if it's a YouTube URL.
+    If not, upsert and return id. Also fetch YouTube title if it's a YouTube URL
+    (from `yt`, the YouTube object of the download, when given).
     """
     
     if is_uploaded:
@@ -697,18 +972,18 @@ def get_or_create_video_id(video_url, user_id, is_uploaded=False, file_hash=None
         title = "Uploaded File"
     else:
         # Fetch YouTube title
-        title = get_youtube_title(video_url)
+        title = get_youtube_title(video_url, yt)
     
     try:
         # Upsert to avoid duplicates
-        query = supabase.table("video_url").select("id").eq("video_url", video_url).eq("user_id", user_id).execute()
+        query = get_supabase().table("video_url").select("id").eq("video_url", video_url).eq("user_id", user_id).execute()
         if query.data:
             # Update title if it's still "Untitled"
             existing_id = query.data[0]["id"]
-            supabase.table("video_url").update({"title": title}).eq("id", existing_id).execute()
+            get_supabase().table("video_url").update({"title": title}).eq("id", existing_id).execute()
             return existing_id
         # Insert new row with fetched title
-        insert = supabase.table("video_url").upsert({
+        insert = get_supabase().table("video_url").upsert({
             "video_url": video_url,
             "user_id": user_id,
             "title": title
@@ -718,33 +993,107 @@ def get_or_create_video_id(video_url, user_id, is_uploaded=False, file_hash=None
         logging.error(f"Database error in get_or_create_video_id: {str(e)}")
         raise e
 
+def index_for_search(video_id, language, kind, document, user_id):
+    """
+    Replace the search index entries of a stored transcript (segments) or
+    subtitle (SRT text). The stored document is the source of truth: an
+    indexing failure is logged and fixed by the next upsert or
+    /sync-user-data, it never fails the request.
+    """
+    try:
+        segments = search_index.segments_from_srt(document) if kind == "subtitle" else document
+        search.replace(user_id, video_id, language, kind, segments)
+    except Exception as e:
+        logging.error(f"Failed to index {kind} {video_id}/{language} for search: {e}")
+
+def reindex_user_search(user_id):
+    """
+    Rebuild a user's search index entries from their stored transcripts and
+    subtitles (data written before search existed, or a fresh local index).
+    Returns the number of documents indexed.
+    """
+    documents = 0
+    transcripts = get_supabase().table("transcripts").select(f"video_id, language, {artifact_columns('text')}").eq("user_id", user_id).execute()
+    for row in transcripts.data or []:
+        try:
+            segments = json.loads(artifact_content(row, "text"))
+        except (TypeError, ValueError, artifact_store.ArtifactNotFound):
+            continue
+        index_for_search(row["video_id"], row["language"], "transcript", segments, user_id)
+        documents += 1
+    subtitles = get_supabase().table("subtitles").select(f"video_id, language, {artifact_columns('srt')}").eq("user_id", user_id).execute()
+    for row in subtitles.data or []:
+        try:
+            srt_text = artifact_content(row, "srt")
+        except artifact_store.ArtifactNotFound:
+            continue
+        index_for_search(row["video_id"], row["language"], "subtitle", srt_text, user_id)
+        documents += 1
+    return documents
+
+def artifact_fields(column, content):
+    """
+    Row fields that store `content` (transcript JSON or SRT text) for
+    `column`: the content itself, or with an artifact store only its key
+    and size, the content going to the store (deduplicated by hash).
+    """
+    if artifacts is None:
+        return {column: content}
+    data = content.encode("utf-8")
+    return {column: None, "artifact_key": artifacts.put(data), "artifact_size": len(data)}
+
+def artifact_columns(column):
+    """Columns to select to read back what artifact_fields() stored."""
+    return f"{column}, artifact_key" if artifacts is not None else column
+
+def artifact_content(row, column):
+    """Content of a transcripts/subtitles row, read from the store when the row has an artifact_key."""
+    if row.get("artifact_key"):
+        return artifacts.get_text(row["artifact_key"])
+    return row.get(column)
+
 def upsert_transcript(video_id, language, segments, user_id):
     """
     Insert or update transcript for video/language.
     Store as JSON. Always include user_id.
     """
-    supabase.table("transcripts").upsert({
+    get_supabase().table("transcripts").upsert({
         "video_id": video_id,
         "language": language,
-        "text": json.dumps(segments),
+        **artifact_fields("text", json.dumps(segments)),
         "user_id": user_id
     }).execute()
+    index_for_search(video_id, language, "transcript", segments, user_id)
+    timelines.invalidate(video_id, language)
 
 def get_transcript(video_id, language):
     """
     Check for existing transcript for video/language.
     """
-    query = supabase.table("transcripts").select("text").eq("video_id", video_id).eq("language", language).execute()
+    query = get_supabase().table("transcripts").select(artifact_columns("text")).eq("video_id", video_id).eq("language", language).execute()
     if query.data:
-        return query.data[0]["text"]
+        return artifact_content(query.data[0], "text")
     return None
 
+def find_transcript(video_id, language=None):
+    """
+    Find a stored transcript for the video, in the given language or, when the
+    language is unknown, in whatever language it was detected as.
+    Returns (language, text) or (language, None).
+    """
+    if language:
+        return language, get_transcript(video_id, language)
+    query = get_supabase().table("transcripts").select(f"language, {artifact_columns('text')}").eq("video_id", video_id).limit(1).execute()
+    if query.data:
+        return query.data[0]["language"], artifact_content(query.data[0], "text")
+    return None, None
+
 def upsert_summary(video_id, summary, user_id):
     """
     Insert or update summary for video.
     Always include user_id.
     """
-    supabase.table("summaries").upsert({
+    get_supabase().table("summaries").upsert({
         "video_id": video_id,
         "summary": summary,
         "user_id": user_id
@@ -755,18 +1104,27 @@ def upsert_subtitle(video_id, language, srt, user_id):
     Insert or update subtitle for video/language.
     Always include user_id.
     """
-    supabase.table("subtitles").upsert({
-        "video_id": video_id,
-        "language": language,
-        "srt": srt,
-        "user_id": user_id
-    }).execute()
+    upsert_subtitles(video_id, {language: srt}, user_id)
+
+def upsert_subtitles(video_id, srt_by_language, user_id):
+    """
+    Insert or update subtitles for several languages of a video in one request.
+    """
+    if not srt_by_language:
+        return
+    get_supabase().table("subtitles").upsert([
+        {"video_id": video_id, "language": language, **artifact_fields("srt", srt), "user_id": user_id}
+        for language, srt in srt_by_language.items()
+    ]).execute()
+    for language, srt_text in srt_by_language.items():
+        index_for_search(video_id, language, "subtitle", srt_text, user_id)
+        timelines.invalidate(video_id, language)
 
 def get_summary(video_id):
     """
     Check for existing summary for video.
     """
-    query = supabase.table("summaries").select("summary").eq("video_id", video_id).execute()
+    query = get_supabase().table("summaries").select("summary").eq("video_id", video_id).execute()
     if query.data:
         return query.data[0]["summary"]
     return None
@@ -778,15 +1136,37 @@ def set_supabase_auth_context(user_id):
     pass
 
 # ---------- ANALYTICS FUNCTIONS ----------
+# Aggregation and counters run as SQL functions (migrations/003_analytics_aggregation.sql).
+# Until that migration is applied, each call falls back to the client-side path.
+_missing_rpcs = set()
+
+def _is_missing_function(error):
+    # PostgREST answers PGRST202 (404) when the function does not exist
+    return getattr(error, "code", None) == "PGRST202" or (
+        "function" in str(error).lower() and "not found" in str(error).lower()
+    )
+
+def call_rpc(name, params, fallback):
+    """Run a Supabase SQL function, or fallback() while it is not deployed."""
+    if name not in _missing_rpcs:
+        try:
+            return get_supabase().rpc(name, params).execute().data
+        except Exception as e:
+            if not _is_missing_function(e):
+                raise
+            logging.warning(f"SQL function {name} is missing (apply backend/migrations); using the client-side fallback")
+            _missing_rpcs.add(name)
+    return fallback()
+
 
 def initialize_user_analytics(user_id):
     """
     Initialize analytics entry for a new user if it doesn't exist.
     """
     try:
-        query = supabase.table("user_analytics").select("user_id").eq("user_id", user_id).execute()
+        query = get_supabase().table("user_analytics").select("user_id").eq("user_id", user_id).execute()
         if not query.data:
-            supabase.table("user_analytics").insert({
+            get_supabase().table("user_analytics").insert({
                 "user_id": user_id,
                 "videos_processed": 0,
                 "summaries_generated": 0,
@@ -805,37 +1185,50 @@ def track_user_activity(user_id, activity_type, video_id=None, language=None, pr
     activity_type: 'video_processed', 'summary_generated', 'subtitle_generated'
     """
     try:
-        # Initialize user analytics if not exists
-        initialize_user_analytics(user_id)
-        
-        # Log the activity
-        supabase.table("user_activity_log").insert({
-            "user_id": user_id,
-            "activity_type": activity_type,
-            "video_id": video_id,
-            "language": language,
-            "processing_time": processing_time
-        }).execute()
-        
-        # Update user analytics
-        update_user_analytics(user_id, activity_type, language, processing_time)
-        
-        # Update daily stats
-        update_daily_usage_stats(user_id, activity_type, language, processing_time)
-        
+        # One round trip: log and bump both counters in a transaction
+        call_rpc("record_user_activity", {
+            "p_user_id": user_id,
+            "p_activity_type": activity_type,
+            "p_video_id": video_id,
+            "p_language": language,
+            "p_processing_time": processing_time
+        }, lambda: track_user_activity_client_side(user_id, activity_type, video_id, language, processing_time))
     except Exception as e:
         logging.error(f"Error tracking user activity: {e}")
 
+def track_user_activity_client_side(user_id, activity_type, video_id=None, language=None, processing_time=0):
+    """
+    track_user_activity without the record_user_activity SQL function:
+    separate read-modify-write round trips for the log and each counter.
+    """
+    # Initialize user analytics if not exists
+    initialize_user_analytics(user_id)
+    
+    # Log the activity
+    get_supabase().table("user_activity_log").insert({
+        "user_id": user_id,
+        "activity_type": activity_type,
+        "video_id": video_id,
+        "language": language,
+        "processing_time": processing_time
+    }).execute()
+    
+    # Update user analytics
+    update_user_analytics(user_id, activity_type, language, processing_time)
+    
+    # Update daily stats
+    update_daily_usage_stats(user_id, activity_type, language, processing_time)
+
 def update_user_analytics(user_id, activity_type, language=None, processing_time=0):
     """
     Update user analytics counters and metadata.
     """
     try:
         # Get current analytics
-        query = supabase.table("user_analytics").select("*").eq("user_id", user_id).execute()
+        query = get_supabase().table("user_analytics").select("*").eq("user_id", user_id).execute()
         if not query.data:
             initialize_user_analytics(user_id)
-            query = supabase.table("user_analytics").select("*").eq("user_id", user_id).execute()
+            query = get_supabase().table("user_analytics").select("*").eq("user_id", user_id).execute()
         
         current_data = query.data[0]
         languages_used = current_data.get("languages_used", [])
@@ -860,7 +1253,7 @@ def update_user_analytics(user_id, activity_type, language=None, processing_time
             update_data["subtitles_generated"] = current_data.get("subtitles_generated", 0) + 1
         
         # Update the record
-        supabase.table("user_analytics").update(update_data).eq("user_id", user_id).execute()
+        get_supabase().table("user_analytics").update(update_data).eq("user_id", user_id).execute()
         
     except Exception as e:
         logging.error(f"Error updating user analytics: {e}")
@@ -873,14 +1266,15 @@ def update_daily_usage_stats(user_id, activity_type, language=None, processing_t
         today = datetime.utcnow().date().isoformat()
         
         # Get or create daily stats
-        query = supabase.table("daily_usage_stats").select("*").eq("user_id", user_id).eq("date", today).execute()
+        query = get_supabase().table("daily_usage_stats").select("*").eq("user_id", user_id).eq("date", today).execute()
         
         if query.data:
             # Update existing record
             current_data = query.data[0]
-            languages_today = set(current_data.get("unique_languages", 0))
-            if language:
-                languages_today.add(language)
+            # unique_languages is a count: recount today's languages from the log,
+            # as record_user_activity does (this activity is already logged)
+            log_query = get_supabase().table("user_activity_log").select("language").eq("user_id", user_id).gte("created_at", today).execute()
+            languages_today = {row["language"] for row in log_query.data or [] if row.get("language")}
             
             update_data = {
                 "total_time": current_data.get("total_time", 0) + processing_time,
@@ -894,7 +1288,7 @@ def update_daily_usage_stats(user_id, activity_type, language=None, processing_t
             elif activity_type == "subtitle_generated":
                 update_data["subtitles_count"] = current_data.get("subtitles_count", 0) + 1
             
-            supabase.table("daily_usage_stats").update(update_data).eq("id", current_data["id"]).execute()
+            get_supabase().table("daily_usage_stats").update(update_data).eq("id", current_data["id"]).execute()
         else:
             # Create new daily record
             insert_data = {
@@ -907,30 +1301,85 @@ def update_daily_usage_stats(user_id, activity_type, language=None, processing_t
                 "total_time": processing_time
             }
             
-            supabase.table("daily_usage_stats").insert(insert_data).execute()
+            get_supabase().table("daily_usage_stats").insert(insert_data).execute()
             
     except Exception as e:
         logging.error(f"Error updating daily usage stats: {e}")
 
+# Summed per user and day in api_usage_daily (migrations/004_api_usage.sql)
+API_USAGE_COLUMNS = usage.FIELDS + ("cost_usd", "saved_usd")
+API_USAGE_REPORT_USERS = 50
+
+def account_request_usage(request_usage, user_id):
+    """Log a finished request's external API usage and add it to the user's daily totals."""
+    if not request_usage:
+        return
+    values = request_usage.snapshot()
+    logging.info(f"API usage: {json.dumps(values)}")
+    if check_user_exists(user_id):
+        record_api_usage(user_id, values)
+
+def record_api_usage(user_id, values):
+    """Add one request's usage (a usage.Usage snapshot) to the user's row of the day."""
+    try:
+        call_rpc("record_api_usage", {"p_user_id": user_id, "p_usage": values},
+                 lambda: record_api_usage_client_side(user_id, values))
+    except Exception as e:
+        logging.error(f"Error recording API usage: {e}")
+
+def record_api_usage_client_side(user_id, values):
+    """record_api_usage without the SQL function: read-modify-write of the day's row."""
+    today = datetime.utcnow().date().isoformat()
+    query = get_supabase().table("api_usage_daily").select("*").eq("user_id", user_id).eq("date", today).execute()
+    if query.data:
+        row = query.data[0]
+        update_data = {column: (row.get(column) or 0) + values[column] for column in API_USAGE_COLUMNS}
+        update_data["requests"] = (row.get("requests") or 0) + 1
+        get_supabase().table("api_usage_daily").update(update_data).eq("user_id", user_id).eq("date", today).execute()
+    else:
+        insert_data = {column: values[column] for column in API_USAGE_COLUMNS}
+        get_supabase().table("api_usage_daily").insert(dict(insert_data, user_id=user_id, date=today, requests=1)).execute()
+
+def get_api_usage_report(since, user_id=None):
+    """Usage per day and per user (costliest first) since `since`, with totals."""
+    return call_rpc("api_usage_report", {"p_since": since, "p_user_id": user_id},
+                    lambda: get_api_usage_report_client_side(since, user_id))
+
+def get_api_usage_report_client_side(since, user_id=None):
+    """api_usage_report without the SQL function: fetch the daily rows and sum them here."""
+    query = get_supabase().table("api_usage_daily").select("*").gte("date", since)
+    if user_id:
+        query = query.eq("user_id", user_id)
+    rows = query.execute().data or []
+    columns = API_USAGE_COLUMNS + ("requests",)
+    days, users, totals = {}, {}, dict.fromkeys(columns, 0)
+    for row in rows:
+        day = days.setdefault(row["date"], dict.fromkeys(columns, 0))
+        user = users.setdefault(row["user_id"], dict.fromkeys(columns, 0))
+        for column in columns:
+            value = row.get(column) or 0
+            day[column] += value
+            user[column] += value
+            totals[column] += value
+    return {
+        "days": [dict(day, date=date) for date, day in sorted(days.items())],
+        "users": sorted((dict(user, user_id=uid) for uid, user in users.items()),
+                        key=lambda user: user["cost_usd"], reverse=True)[:API_USAGE_REPORT_USERS],
+        "totals": totals,
+    }
+
 def get_user_dashboard_data(user_id):
     """
     Get comprehensive dashboard data for a user.
     """
     try:
-        dashboard_data = {}
-        
-        # Get user analytics
-        analytics_query = supabase.table("user_analytics").select("*").eq("user_id", user_id).execute()
-        dashboard_data["analytics"] = analytics_query.data[0] if analytics_query.data else {}
-        
-        # Get recent activity (last 10 activities)
-        activity_query = supabase.table("user_activity_log").select("*").eq("user_id", user_id).order("created_at", desc=True).limit(10).execute()
-        dashboard_data["recent_activity"] = activity_query.data or []
-        
-        # Get last 30 days usage trends
+        # Last 30 days usage trends, with their totals
         thirty_days_ago = (datetime.utcnow() - dt_timedelta(days=30)).date().isoformat()
-        trends_query = supabase.table("daily_usage_stats").select("*").eq("user_id", user_id).gte("date", thirty_days_ago).order("date", desc=False).execute()
-        dashboard_data["usage_trends"] = trends_query.data or []
+        dashboard_data = call_rpc(
+            "user_dashboard", {"p_user_id": user_id, "p_since": thirty_days_ago},
+            lambda: get_user_dashboard_data_client_side(user_id, thirty_days_ago)
+        )
+        dashboard_data["analytics"] = dashboard_data.get("analytics") or {}
         
         # Calculate achievements
         analytics = dashboard_data["analytics"]
@@ -942,7 +1391,7 @@ def get_user_dashboard_data(user_id):
             achievements.append({"name": "Video Pro", "description": "Processed 10 videos", "icon": "🏆"})
         if analytics.get("videos_processed", 0) >= 50:
             achievements.append({"name": "Video Master", "description": "Processed 50 videos", "icon": "👑"})
-        if len(analytics.get("languages_used", [])) >= 5:
+        if len(analytics.get("languages_used") or []) >= 5:
             achievements.append({"name": "Polyglot", "description": "Used 5+ languages", "icon": "🌍"})
         if analytics.get("summaries_generated", 0) >= 25:
             achievements.append({"name": "Summary Expert", "description": "Generated 25 summaries", "icon": "📝"})
@@ -955,56 +1404,78 @@ def get_user_dashboard_data(user_id):
         logging.error(f"Error getting dashboard data: {e}")
         return {}
 
+def get_user_dashboard_data_client_side(user_id, since):
+    """
+    The user_dashboard SQL function's result, assembled from three queries.
+    """
+    dashboard_data = {}
+    
+    # Get user analytics
+    analytics_query = get_supabase().table("user_analytics").select("*").eq("user_id", user_id).execute()
+    dashboard_data["analytics"] = analytics_query.data[0] if analytics_query.data else {}
+    
+    # Get recent activity (last 10 activities)
+    activity_query = get_supabase().table("user_activity_log").select("*").eq("user_id", user_id).order("created_at", desc=True).limit(10).execute()
+    dashboard_data["recent_activity"] = activity_query.data or []
+    
+    trends_query = get_supabase().table("daily_usage_stats").select("*").eq("user_id", user_id).gte("date", since).order("date", desc=False).execute()
+    trends = trends_query.data or []
+    dashboard_data["usage_trends"] = trends
+    dashboard_data["period_totals"] = {
+        "videos": sum(day.get("videos_count") or 0 for day in trends),
+        "summaries": sum(day.get("summaries_count") or 0 for day in trends),
+        "subtitles": sum(day.get("subtitles_count") or 0 for day in trends),
+        "processing_time": sum(day.get("total_time") or 0 for day in trends)
+    }
+    return dashboard_data
+
 def sync_existing_user_data(user_id):
     """
     Sync existing user data with analytics tables.
-    This populates analytics based on existing video_url, summaries, and subtitles data.
+    This populates analytics based on existing video_url, summaries, and subtitles data,
+    counted in the database (sync_user_analytics) rather than downloaded.
     """
     try:
-        # Count existing videos for user
-        video_query = supabase.table("video_url").select("id").eq("user_id", user_id).execute()
-        video_count = len(video_query.data) if video_query.data else 0
-        
-        # Count existing summaries for user
-        summary_query = supabase.table("summaries").select("id").eq("user_id", user_id).execute()
-        summary_count = len(summary_query.data) if summary_query.data else 0
-        
-        # Count existing subtitles and collect languages for user
-        subtitle_query = supabase.table("subtitles").select("language").eq("user_id", user_id).execute()
-        subtitle_count = len(subtitle_query.data) if subtitle_query.data else 0
-        languages_used = list(set([s["language"] for s in subtitle_query.data if s.get("language")])) if subtitle_query.data else []
-        
-        # Initialize or update user analytics with existing data
-        analytics_query = supabase.table("user_analytics").select("user_id").eq("user_id", user_id).execute()
-        
-        if analytics_query.data:
-            # Update existing analytics
-            supabase.table("user_analytics").update({
-                "videos_processed": video_count,
-                "summaries_generated": summary_count,
-                "subtitles_generated": subtitle_count,
-                "languages_used": languages_used,
-                "last_activity": datetime.utcnow().isoformat()
-            }).eq("user_id", user_id).execute()
-        else:
-            # Create new analytics entry
-            supabase.table("user_analytics").insert({
-                "user_id": user_id,
-                "videos_processed": video_count,
-                "summaries_generated": summary_count,
-                "subtitles_generated": subtitle_count,
-                "languages_used": languages_used,
-                "total_processing_time": 0,
-                "last_activity": datetime.utcnow().isoformat()
-            }).execute()
-        
-        logging.info(f"Synced analytics for user {user_id}: {video_count} videos, {summary_count} summaries, {subtitle_count} subtitles")
+        call_rpc("sync_user_analytics", {"p_user_ids": [user_id]},
+                 lambda: sync_user_analytics_client_side(user_id))
+        logging.info(f"Synced analytics for user {user_id}")
         return True
         
     except Exception as e:
         logging.error(f"Error syncing user data for {user_id}: {e}")
         return False
 
+def count_user_rows(table, user_id):
+    """Row count for a user from the Content-Range header, without transferring the rows."""
+    return get_supabase().table(table).select("user_id", count="exact").eq("user_id", user_id).limit(1).execute().count or 0
+
+def sync_user_analytics_client_side(user_id):
+    """
+    sync_user_analytics without the SQL function: exact counts, plus the
+    subtitle languages (the only column that has to be read).
+    """
+    video_count = count_user_rows("video_url", user_id)
+    summary_count = count_user_rows("summaries", user_id)
+    subtitle_count = count_user_rows("subtitles", user_id)
+    subtitle_query = get_supabase().table("subtitles").select("language").eq("user_id", user_id).execute()
+    languages_used = sorted({s["language"] for s in subtitle_query.data or [] if s.get("language")})
+    
+    analytics = {
+        "videos_processed": video_count,
+        "summaries_generated": summary_count,
+        "subtitles_generated": subtitle_count,
+        "languages_used": languages_used,
+        "last_activity": datetime.utcnow().isoformat()
+    }
+    analytics_query = get_supabase().table("user_analytics").select("user_id").eq("user_id", user_id).execute()
+    if analytics_query.data:
+        # Update existing analytics
+        get_supabase().table("user_analytics").update(analytics).eq("user_id", user_id).execute()
+    else:
+        # Create new analytics entry
+        get_supabase().table("user_analytics").insert(dict(analytics, user_id=user_id, total_processing_time=0)).execute()
+    return 1
+
 # ---------- DEBUG FUNCTION ----------
 
 def debug_supabase_config():
@@ -1029,35 +1500,112 @@ def debug_supabase_config():
             key_type = "JWT (decode error)"
     
     logging.info(f"Supabase key type: {key_type}")
-    print(f"Supabase key type: {key_type}")
     
     if "anon" in key_type:
-        print("WARNING: You're using the anon key. Switch to service_role key for server-side applications.")
-        logging.warning("Using anon key instead of service_role key")
+        logging.warning("Using anon key instead of service_role key. Switch to service_role key for server-side applications.")
     elif "service_role" in key_type:
-        print("Using service_role key - correct for server-side applications")
-
-# Call debug function on startup
-debug_supabase_config()
+        logging.info("Using service_role key - correct for server-side applications")
 
 # ---------- API ROUTE ----------
+
+# Upper bound on target languages per /upload and on concurrent translations
+MAX_TARGET_LANGUAGES = int(os.getenv("MAX_TARGET_LANGUAGES", "10"))
+TRANSLATION_FANOUT_WORKERS = int(os.getenv("TRANSLATION_FANOUT_WORKERS", "5"))
+
+def parse_target_languages(value):
+    """
+    Normalize the "language" field of /upload: a single code, a list of codes
+    or a comma-separated string. Returns the codes in order without duplicates
+    (none for a missing field: no translation).
+    """
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    languages = []
+    for language in value:
+        language = str(language).strip()
+        if language and language not in languages:
+            languages.append(language)
+    return languages
+
+def translate_variants(segments, summarized_text, languages, source_language, action):
+    """
+    Produce the translated subtitles and/or summary for every target language.
+    Languages are translated concurrently. Returns {language: {...}}; a
+    language no engine could translate gets {"error": ...} instead, so the
+    source text is never passed off as its translation.
+    """
+    def translate_one(language):
+        variant = {}
+        try:
+            if action in ("subtitles", "both"):
+                variant["translated_subtitles"] = format_srt(segments, language, source_language)
+            if action in ("summarize", "both"):
+                variant["translated_summary"] = translate_text(summarized_text, language, source_language)
+        except translation_engines.TranslationUnavailable as e:
+            logging.error(f"Translating into {language} failed: {e}")
+            return {"error": str(e)}
+        return variant
+
+    if len(languages) == 1:
+        return {languages[0]: translate_one(languages[0])}
+    with ThreadPoolExecutor(max_workers=min(len(languages), TRANSLATION_FANOUT_WORKERS)) as executor:
+        # Each thread gets its own copy of the request context (deadline, tracing span)
+        futures = [executor.submit(contextvars.copy_context().run, translate_one, language) for language in languages]
+        try:
+            return {language: future.result() for language, future in zip(languages, futures)}
+        except deadlines.Cancelled:
+            for future in futures:
+                future.cancel()
+            raise
+
+
 @app.route("/upload", methods=["POST"])
+@profiling.profiled(
+    "upload",
+    forced=profile_requested,
+    metadata=lambda: {"user_id": get_user_id(), "youtube_url": (request.get_json(silent=True) or {}).get("youtube_url")}
+)
+@deadlines.bounded(on_cancel=lambda reason: (jsonify({"error": f"Request cancelled: {reason}"}), 504))
 def upload():
     """
     Accepts file or YouTube URL, processes transcription, subtitles, summary, and translation.
     Uses Supabase to avoid redundant work and manage user video history.
-    """
-    target_language = request.json.get("language") if request.json else request.form.get("language", "en")
+    "language" may be a list: the video is processed once and every variant is
+    returned under "results", keyed by language. Form uploads default to "en";
+    a JSON body without "language" gets no translation.
+    """
+    requested_language = request.json.get("language") if request.json else request.form.get("language", "en")
+    # A list (or comma-separated string) fans out to several languages in one run
+    multi_language = isinstance(requested_language, list) or "," in str(requested_language or "")
+    target_languages = parse_target_languages(requested_language)
+    target_language = target_languages[0] if target_languages else None
     action = request.json.get("action") if request.json else request.form.get("action", "both")
+    asr_engine = request.json.get("asr_engine") if request.json else request.form.get("asr_engine")
+    # Optional spoken-language override; detected from the audio when absent
+    requested_source = request.json.get("source_language") if request.json else request.form.get("source_language")
+    source_language = asr_engines.language_code(requested_source)
     user_id = get_user_id()
     video_url = None
+    yt = None
     file_hash = None
     is_uploaded = False
+    downloaded_file = None
 
     # Validate user_id
     if not check_user_exists(user_id):
         return jsonify({"error": "Missing or invalid user_id. Please set X-User-Id header with your UUID."}), 400
     
+    if (requested_language is not None and not target_languages) or len(target_languages) > MAX_TARGET_LANGUAGES:
+        return jsonify({"error": f"Provide between 1 and {MAX_TARGET_LANGUAGES} target languages"}), 400
+
+    if requested_source and not source_language:
+        return jsonify({"error": f"Unsupported source_language '{requested_source}'"}), 400
+
+    if asr_engine and asr_engine != "auto" and asr_engine not in asr_engines.ENGINES:
+        return jsonify({"error": f"Unknown asr_engine '{asr_engine}'. Choose from: auto, {', '.join(asr_engines.ENGINES)}"}), 400
+
     # Rate limiting
     if not rate_limit(user_id):
         return jsonify({"error": "Rate limit exceeded. Please wait before making more requests."}), 429
@@ -1069,7 +1617,10 @@ def upload():
         # Step 1: Identify video and get video_id
         if request.json and "youtube_url" in request.json:
             video_url = request.json["youtube_url"]
-            mp3_file = download_audio(video_url)
+            # One YouTube object: its metadata fetch serves the download and the title
+            yt = open_youtube(video_url)
+            with deadlines.stage("download"):
+                mp3_file = downloaded_file = download_audio(video_url, yt)
         elif "file" in request.files:
             file = request.files["file"]
             file_path = os.path.join(app.config["UPLOAD_FOLDER"], file.filename)
@@ -1080,33 +1631,40 @@ def upload():
         else:
             return jsonify({"error": "No valid input provided"}), 400
 
-        video_id = get_or_create_video_id(video_url, user_id, is_uploaded, file_hash)
+        video_id = get_or_create_video_id(video_url, user_id, is_uploaded, file_hash, yt)
         response_data = {}
 
         # Track video processing
         track_user_activity(user_id, "video_processed", video_id)
 
-        # Step 2: Check for transcript in Supabase (always use original language for transcription)
-        original_language = "en"  # Default to English for transcription
-        transcript_text = get_transcript(video_id, original_language)
+        # Step 2: Check for transcript in Supabase, keyed by the (requested or detected) source language
+        original_language, transcript_text = find_transcript(video_id, source_language)
+        transcript_complete = True
         if transcript_text:
             try:
                 segments = json.loads(transcript_text)
             except Exception as e:
                 logging.error(f"Failed to parse transcript JSON: {e}")
                 segments = []
+            usage.record(cache_hits=1, cached_audio_seconds=max((seg["end"] for seg in segments), default=0))
         else:
-            segments = generate_subtitles_async(mp3_file, language_hint=original_language)
-            upsert_transcript(video_id, original_language, segments, user_id)
+            with deadlines.stage("transcribe"):
+                segments, original_language, transcript_complete = generate_subtitles_async(
+                    mp3_file, language_hint=source_language, asr_engine=asr_engine)
+            # Only a full transcript is stored; a partial one is resumed from checkpoints next time
+            if transcript_complete:
+                upsert_transcript(video_id, original_language, segments, user_id)
 
         # Step 3: Check for summary in Supabase
         summary_text = get_summary(video_id)
         if summary_text:
             summarized_text = summary_text
+            usage.record(cache_hits=1)
         else:
-            text_to_summarize = "\n".join(seg['text'] for seg in segments)
-            summarized_text = groq_summarize(f"Please summarize the following text concisely:\n\n{text_to_summarize}")
-            upsert_summary(video_id, summarized_text, user_id)
+            with deadlines.stage("summarize"):
+                summarized_text = summarize_segments(segments)
+            if transcript_complete:
+                upsert_summary(video_id, summarized_text, user_id)
             # Track summary generation
             track_user_activity(user_id, "summary_generated", video_id, target_language)
 
@@ -1114,44 +1672,90 @@ def upload():
         processing_end_time = datetime.utcnow()
         processing_duration = int((processing_end_time - processing_start_time).total_seconds())
 
-        # Step 4: Prepare response and track activities
-        if action == "subtitles":
-            original_srt = format_srt(segments)
-            translated_srt = format_srt(segments, target_language)
-            response_data.update({
-                "original_subtitles": original_srt,
-                "translated_subtitles": translated_srt,
-                "target_language": target_language
-            })
-            # Store subtitles in DB and track activity
-            upsert_subtitle(video_id, target_language, translated_srt, user_id)
-            track_user_activity(user_id, "subtitle_generated", video_id, target_language, processing_duration)
-        elif action == "summarize":
-            translated_summary = translate_text(summarized_text, target_language)
+        # Step 4: Translate into every target language and track activities
+        # (translation is a no-op for targets equal to the source language)
+        response_data["source_language"] = original_language
+        if not transcript_complete:
+            response_data["transcript_complete"] = False
+        if action not in ("subtitles", "summarize"):
+            action = "both"
+        variants = {}
+        if target_languages:
+            with deadlines.stage("translate"):
+                variants = translate_variants(segments, summarized_text, target_languages, original_language, action)
+        translated_languages = [language for language in target_languages if "error" not in variants[language]]
+        failed_languages = [language for language in target_languages if "error" in variants[language]]
+        if failed_languages:
+            response_data["failed_languages"] = failed_languages
+        if action in ("subtitles", "both"):
+            response_data["original_subtitles"] = format_srt(segments)
+            # Store all subtitle variants in one batched upsert (failed languages are retried next time)
+            if transcript_complete:
+                upsert_subtitles(video_id, {
+                    language: variants[language]["translated_subtitles"] for language in translated_languages
+                }, user_id)
+            for language in translated_languages:
+                track_user_activity(user_id, "subtitle_generated", video_id, language, processing_duration)
+        if action in ("summarize", "both"):
+            response_data["original_summary"] = summarized_text
+        if transcript_complete:
+            # Raw, cacheable copies of what was just stored (see /download-*)
+            response_data["video_id"] = video_id
+            response_data["downloads"] = {"summary": f"/download-summary/{video_id}"}
+            if action in ("subtitles", "both"):
+                response_data["downloads"]["subtitles"] = {
+                    language: f"/download-subtitle/{video_id}/{language}" for language in translated_languages
+                }
+
+        if multi_language:
             response_data.update({
-                "original_summary": summarized_text,
-                "translated_summary": translated_summary,
-                "target_language": target_language
+                "target_languages": target_languages,
+                "results": variants
             })
         else:
-            original_srt = format_srt(segments)
-            translated_srt = format_srt(segments, target_language)
-            translated_summary = translate_text(summarized_text, target_language)
-            response_data.update({
-                "original_subtitles": original_srt,
-                "translated_subtitles": translated_srt,
-                "original_summary": summarized_text,
-                "translated_summary": translated_summary,
-                "target_language": target_language
-            })
-            # Store subtitles in DB and track activity
-            upsert_subtitle(video_id, target_language, translated_srt, user_id)
-            track_user_activity(user_id, "subtitle_generated", video_id, target_language, processing_duration)
+            response_data.update(variants.get(target_language, {}))
+            response_data["target_language"] = target_language
+            if failed_languages:
+                # The transcript and summary are stored; only the translation has to be retried
+                return jsonify(response_data), 502
 
         return jsonify(response_data)
+    except YouTubeError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Exception in upload: {e}")
         return jsonify({"error": str(e)}), 500
+    finally:
+        if downloaded_file:
+            cleanup_download(downloaded_file)
+
+VIDEO_LIST_MAX_LIMIT = 100
+
+def get_video_features(video_ids):
+    """
+    Transcript languages, summary flag and subtitle languages for a batch of
+    videos: three `in` queries, run concurrently, however many videos there
+    are. Returns {video_id: {"available_languages", "has_summary", "available_subtitles"}}.
+    """
+    features = {video_id: {"available_languages": [], "has_summary": False, "available_subtitles": []}
+                for video_id in video_ids}
+    if not video_ids:
+        return features
+    queries = {
+        "transcripts": lambda: get_supabase().table("transcripts").select("video_id, language").in_("video_id", video_ids).execute(),
+        "summaries": lambda: get_supabase().table("summaries").select("video_id").in_("video_id", video_ids).execute(),
+        "subtitles": lambda: get_supabase().table("subtitles").select("video_id, language").in_("video_id", video_ids).execute(),
+    }
+    with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+        futures = {name: executor.submit(contextvars.copy_context().run, query) for name, query in queries.items()}
+        results = {name: future.result().data or [] for name, future in futures.items()}
+    for row in results["transcripts"]:
+        features[row["video_id"]]["available_languages"].append(row["language"])
+    for row in results["summaries"]:
+        features[row["video_id"]]["has_summary"] = True
+    for row in results["subtitles"]:
+        features[row["video_id"]]["available_subtitles"].append(row["language"])
+    return features
 
 @app.route("/video-details/<int:video_id>", methods=["GET"])
 def get_video_details(video_id):
@@ -1165,66 +1769,101 @@ def get_video_details(video_id):
     
     try:
         # Get video info
-        video_query = supabase.table("video_url").select("*").eq("id", video_id).eq("user_id", user_id).execute()
+        video_query = get_supabase().table("video_url").select("*").eq("id", video_id).eq("user_id", user_id).execute()
         if not video_query.data:
             return jsonify({"error": "Video not found"}), 404
         
-        video_info = video_query.data[0]
-        
-        # Get available transcripts
-        transcripts_query = supabase.table("transcripts").select("language").eq("video_id", video_id).execute()
-        available_languages = [t["language"] for t in transcripts_query.data] if transcripts_query.data else []
-        
-        # Get summary
-        summary_query = supabase.table("summaries").select("summary").eq("video_id", video_id).execute()
-        has_summary = bool(summary_query.data)
-        
-        # Get subtitles with languages
-        subtitles_query = supabase.table("subtitles").select("language").eq("video_id", video_id).execute()
-        available_subtitles = [s["language"] for s in subtitles_query.data] if subtitles_query.data else []
+        return jsonify({"video_info": video_query.data[0], **get_video_features([video_id])[video_id]})
         
+    except Exception as e:
+        logging.error(f"Error getting video details: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/videos", methods=["GET"])
+def list_videos():
+    """
+    List the user's processed videos, newest first, each with the same
+    features /video-details returns. Keyset-paginated: pass the response's
+    next_cursor as ?cursor= for the next page (limit max 100).
+    One query for the page plus three batched feature queries, whatever the page size.
+    """
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id"}), 400
+
+    cursor = request.args.get("cursor")
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), VIDEO_LIST_MAX_LIMIT)
+        if cursor:
+            pagination.decode_cursor(cursor, ("id",))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        query = get_supabase().table("video_url").select("*").eq("user_id", user_id)
+        videos, next_cursor = pagination.page(query, ("id",), limit, cursor)
+        features = get_video_features([video["id"] for video in videos])
         return jsonify({
-            "video_info": video_info,
-            "available_languages": available_languages,
-            "has_summary": has_summary,
-            "available_subtitles": available_subtitles
+            "videos": [{"video_info": video, **features[video["id"]]} for video in videos],
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         })
-        
+
     except Exception as e:
-        logging.error(f"Error getting video details: {e}")
+        logging.error(f"Error listing videos: {e}")
         return jsonify({"error": str(e)}), 500
 
+# Video titles only name download files, so a few minutes of staleness is fine
+VIDEO_TITLE_TTL_SEC = 600
+_video_titles = {}
+_video_titles_lock = threading.Lock()
+
+def get_video_title(video_id):
+    """Title of a video for download filenames, cached per process."""
+    now = time.monotonic()
+    with _video_titles_lock:
+        cached = _video_titles.get(video_id)
+        if cached and now - cached[1] < VIDEO_TITLE_TTL_SEC:
+            return cached[0]
+    video_query = get_supabase().table("video_url").select("title").eq("id", video_id).execute()
+    title = video_query.data[0]["title"] if video_query.data else None
+    with _video_titles_lock:
+        if len(_video_titles) >= 4096:
+            _video_titles.clear()
+        _video_titles[video_id] = (title, now)
+    return title
+
 @app.route("/download-subtitle/<int:video_id>/<language>", methods=["GET"])
 def download_subtitle(video_id, language):
     """
-    Download subtitle file for a specific video and language.
+    Download the subtitle file for a video and language as a raw file.
+    ?format=srt (default), vtt or json. Supports conditional GET and gzip/br.
     """
     user_id = get_user_id()
     
     if not check_user_exists(user_id):
         return jsonify({"error": "Missing or invalid user_id"}), 400
+
+    fmt = request.args.get("format", "srt").lower()
+    if fmt not in downloads.SUBTITLE_FORMATS:
+        return jsonify({"error": f"Unsupported format '{fmt}'. Choose from: {', '.join(downloads.SUBTITLE_FORMATS)}"}), 400
     
     try:
         # Get subtitle content
-        subtitle_query = supabase.table("subtitles").select("srt").eq("video_id", video_id).eq("language", language).execute()
+        subtitle_query = get_supabase().table("subtitles").select(artifact_columns("srt")).eq("video_id", video_id).eq("language", language).execute()
         if not subtitle_query.data:
             return jsonify({"error": "Subtitle not found"}), 404
-        
-        # Get video title for filename
-        video_query = supabase.table("video_url").select("title").eq("id", video_id).execute()
-        video_title = video_query.data[0]["title"] if video_query.data else "video"
-        
-        # Clean title for filename
-        clean_title = re.sub(r'[^\w\s-]', '', video_title).strip()[:50]
-        
-        subtitle_content = subtitle_query.data[0]["srt"]
-        filename = f"{clean_title}_{language}_subtitles.srt"
-        
-        return jsonify({
-            "content": subtitle_content,
-            "filename": filename,
-            "content_type": "text/srt"
-        })
+
+        row = subtitle_query.data[0]
+        content_type, extension = downloads.SUBTITLE_FORMATS[fmt]
+        filename = f"{downloads.safe_filename(get_video_title(video_id))}_{language}_subtitles.{extension}"
+        if fmt == "srt" and row.get("artifact_key"):
+            # Stored as is: redirect to the store or stream it without loading it
+            return downloads.artifact_response(request, artifacts, row["artifact_key"], content_type, filename)
+        body = downloads.render_subtitles(artifact_content(row, "srt"), fmt)
+        return downloads.file_response(request, body, content_type, filename)
         
     except Exception as e:
         logging.error(f"Error downloading subtitle: {e}")
@@ -1233,7 +1872,8 @@ def download_subtitle(video_id, language):
 @app.route("/download-summary/<int:video_id>", methods=["GET"])
 def download_summary(video_id):
     """
-    Download summary file for a specific video.
+    Download the summary of a video as a raw Markdown/text file.
+    Supports conditional GET and gzip/br.
     """
     user_id = get_user_id()
     
@@ -1241,29 +1881,69 @@ def download_summary(video_id):
         return jsonify({"error": "Missing or invalid user_id"}), 400
     
     try:
-        # Get summary content
-        summary_query = supabase.table("summaries").select("summary").eq("video_id", video_id).execute()
-        if not summary_query.data:
+        summary_text = get_summary(video_id)
+        if summary_text is None:
             return jsonify({"error": "Summary not found"}), 404
+
+        filename = f"{downloads.safe_filename(get_video_title(video_id))}_summary.txt"
+        return downloads.file_response(request, summary_text, "text/plain; charset=utf-8", filename)
         
-        # Get video title for filename
-        video_query = supabase.table("video_url").select("title").eq("id", video_id).execute()
-        video_title = video_query.data[0]["title"] if video_query.data else "video"
-        
-        # Clean title for filename
-        clean_title = re.sub(r'[^\w\s-]', '', video_title).strip()[:50]
-        
-        summary_content = summary_query.data[0]["summary"]
-        filename = f"{clean_title}_summary.txt"
-        
+    except Exception as e:
+        logging.error(f"Error downloading summary: {e}")
+        return jsonify({"error": str(e)}), 500
+
+SLICE_DEFAULT_WINDOW_SEC = 30
+timelines = transcript_slices.TimelineCache()
+
+def load_timeline_segments(video_id, language):
+    """Segments for a slice: the transcript in that language, else its subtitle cues."""
+    transcript_text = get_transcript(video_id, language)
+    if transcript_text:
+        try:
+            return json.loads(transcript_text)
+        except ValueError as e:
+            logging.error(f"Failed to parse transcript JSON for {video_id}/{language}: {e}")
+    subtitle_query = get_supabase().table("subtitles").select(artifact_columns("srt")).eq("video_id", video_id).eq("language", language).execute()
+    if subtitle_query.data:
+        return search_index.segments_from_srt(artifact_content(subtitle_query.data[0], "srt"))
+    return None
+
+@app.route("/transcript-slice/<int:video_id>/<language>", methods=["GET"])
+def transcript_slice(video_id, language):
+    """
+    Segments of a video's transcript that overlap the window [start, end)
+    (seconds; end defaults to start + 30). Served from a cached time index,
+    so players can poll around the playhead without pulling the whole file.
+    """
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id"}), 400
+
+    try:
+        start = float(request.args.get("start", 0))
+        end = float(request.args.get("end", start + SLICE_DEFAULT_WINDOW_SEC))
+    except ValueError:
+        return jsonify({"error": "start and end must be numbers of seconds"}), 400
+    if not (0 <= start < end < float("inf")):
+        return jsonify({"error": "Expected 0 <= start < end"}), 400
+
+    try:
+        timeline = timelines.get(video_id, language, lambda: load_timeline_segments(video_id, language))
+        if timeline is None:
+            return jsonify({"error": "Transcript not found"}), 404
         return jsonify({
-            "content": summary_content,
-            "filename": filename,
-            "content_type": "text/plain"
+            "video_id": video_id,
+            "language": language,
+            "start": start,
+            "end": end,
+            "segments": timeline.slice(start, end),
+            "total_segments": len(timeline),
+            "duration": timeline.duration
         })
-        
+
     except Exception as e:
-        logging.error(f"Error downloading summary: {e}")
+        logging.error(f"Error slicing transcript: {e}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/user-dashboard", methods=["GET"])
@@ -1299,7 +1979,7 @@ def get_user_analytics():
         initialize_user_analytics(user_id)
         
         # Get analytics data
-        query = supabase.table("user_analytics").select("*").eq("user_id", user_id).execute()
+        query = get_supabase().table("user_analytics").select("*").eq("user_id", user_id).execute()
         analytics_data = query.data[0] if query.data else {}
         
         return jsonify(analytics_data)
@@ -1308,32 +1988,46 @@ def get_user_analytics():
         logging.error(f"Error getting user analytics: {e}")
         return jsonify({"error": str(e)}), 500
 
+ACTIVITY_ORDER = ("created_at", "id")
+
 @app.route("/user-activity", methods=["GET"])
 def get_user_activity():
     """
-    Get user activity log with pagination.
+    Get user activity log, newest first, with keyset pagination: pass the
+    response's next_cursor as ?cursor= for the next page. ?page= (offset
+    pagination) still works for existing clients but gets slower with depth.
     """
     user_id = get_user_id()
     
     if not check_user_exists(user_id):
         return jsonify({"error": "Missing or invalid user_id"}), 400
     
+    cursor = request.args.get("cursor")
     try:
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
-        limit = min(int(request.args.get('limit', 20)), 100)  # Max 100 per page
-        offset = (page - 1) * limit
-        
-        # Get activity log
-        query = supabase.table("user_activity_log").select("*").eq("user_id", user_id).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-        
-        activity_data = query.data or []
-        
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)  # Max 100 per page
+        page = int(request.args["page"]) if "page" in request.args and not cursor else None
+        if cursor:
+            pagination.decode_cursor(cursor, ACTIVITY_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        query = get_supabase().table("user_activity_log").select("*").eq("user_id", user_id)
+        if page is not None:
+            offset = (max(page, 1) - 1) * limit
+            activity_data = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute().data or []
+            return jsonify({
+                "activities": activity_data,
+                "page": page,
+                "limit": limit,
+                "has_more": len(activity_data) == limit
+            })
+        activity_data, next_cursor = pagination.page(query, ACTIVITY_ORDER, limit, cursor)
         return jsonify({
             "activities": activity_data,
-            "page": page,
             "limit": limit,
-            "has_more": len(activity_data) == limit
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None
         })
         
     except Exception as e:
@@ -1356,7 +2050,7 @@ def get_usage_trends():
         start_date = (datetime.utcnow() - dt_timedelta(days=days)).date().isoformat()
         
         # Get trends data
-        query = supabase.table("daily_usage_stats").select("*").eq("user_id", user_id).gte("date", start_date).order("date", desc=False).execute()
+        query = get_supabase().table("daily_usage_stats").select("*").eq("user_id", user_id).gte("date", start_date).order("date", desc=False).execute()
         
         trends_data = query.data or []
         
@@ -1386,12 +2080,14 @@ def sync_user_data():
         
         if success:
             # Get updated analytics to return
-            query = supabase.table("user_analytics").select("*").eq("user_id", user_id).execute()
+            query = get_supabase().table("user_analytics").select("*").eq("user_id", user_id).execute()
             analytics_data = query.data[0] if query.data else {}
+            search_documents = reindex_user_search(user_id)
             
             return jsonify({
                 "message": "User data synced successfully",
-                "analytics": analytics_data
+                "analytics": analytics_data,
+                "search_documents_indexed": search_documents
             })
         else:
             return jsonify({"error": "Failed to sync user data"}), 500
@@ -1400,11 +2096,609 @@ def sync_user_data():
         logging.error(f"Error in sync user data endpoint: {e}")
         return jsonify({"error": str(e)}), 500
 
+# ---------- SEARCH ----------
+@app.route("/search", methods=["GET"])
+def search_transcripts():
+    """
+    Find where a phrase was said across the user's transcripts and subtitles.
+    Query params: q (required), language, kind (transcript|subtitle),
+    video_id, sort (recent|relevance), limit (max 100), offset. Results are
+    matching segments with their video, language and timestamps.
+    """
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id"}), 400
+
+    query = (request.args.get("q") or "").strip()
+    if search_index.to_match_query(query) is None:
+        return jsonify({"error": "Missing search query 'q'"}), 400
+    kind = request.args.get("kind")
+    if kind and kind not in search_index.KINDS:
+        return jsonify({"error": f"Invalid kind '{kind}'. Choose from: {', '.join(search_index.KINDS)}"}), 400
+    sort = request.args.get("sort", "recent")
+    if sort not in search_index.SORTS:
+        return jsonify({"error": f"Invalid sort '{sort}'. Choose from: {', '.join(search_index.SORTS)}"}), 400
+    try:
+        limit = min(max(int(request.args.get("limit", 20)), 1), search_index.SEARCH_MAX_LIMIT)
+        offset = max(int(request.args.get("offset", 0)), 0)
+        video_id = int(request.args["video_id"]) if request.args.get("video_id") else None
+    except ValueError:
+        return jsonify({"error": "limit, offset and video_id must be integers"}), 400
+
+    try:
+        with metrics.span("search"):
+            results = search.search(user_id, query, language=request.args.get("language") or None,
+                                    kind=kind or None, video_id=video_id, sort=sort, limit=limit, offset=offset)
+        return jsonify({
+            "query": query,
+            "results": results,
+            "limit": limit,
+            "offset": offset,
+            "has_more": len(results) == limit
+        })
+    except Exception as e:
+        logging.error(f"Error searching transcripts: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# ---------- DUBBING ----------
+DUB_FOLDER = os.getenv("DUB_FOLDER", "dubs")
+DUB_BUDGET_SEC = float(os.getenv("DUB_BUDGET_SEC", "1800"))
+DUB_FORMATS = {"mp3": "audio/mpeg", "ogg": "audio/ogg", "wav": "audio/wav"}
+
+def get_dub_segments(video_id, language):
+    """
+    Timed segments to dub into `language`: the stored subtitles for that
+    language, or else the stored transcript translated now. None if neither exists.
+    """
+    subtitle_query = get_supabase().table("subtitles").select(artifact_columns("srt")).eq("video_id", video_id).eq("language", language).execute()
+    if subtitle_query.data:
+        return [
+            {"start": cue.start.total_seconds(), "end": cue.end.total_seconds(), "text": cue.content}
+            for cue in srt.parse(artifact_content(subtitle_query.data[0], "srt"))
+        ]
+    source_language, transcript_text = find_transcript(video_id)
+    if not transcript_text:
+        return None
+    segments = json.loads(transcript_text)
+    texts = translation_engines.translate_many(
+        [seg["text"].strip() for seg in segments], source_language, language,
+        latency_budget=deadlines.current().remaining())
+    return [{"start": seg["start"], "end": seg["end"], "text": text} for seg, text in zip(segments, texts)]
+
+# Language codes as stored with subtitles ("es", "pt-BR", "zh-Hans"); also keeps the URL segment path-safe
+DUB_LANGUAGE = re.compile(r"^[A-Za-z]{2,3}(?:-[A-Za-z0-9]{2,8})?$")
+
+def dub_path(video_id, language, engine_name, fmt):
+    return os.path.join(DUB_FOLDER, f"{video_id}_{language}_{engine_name}.{fmt}")
+
+def dub_incomplete_marker(path):
+    """Marks a dub with silent (failed) segments: served, but rendered again on the next POST /dub."""
+    return f"{path}.incomplete"
+
+def user_owns_video(video_id, user_id):
+    query = get_supabase().table("video_url").select("id").eq("id", video_id).eq("user_id", user_id).execute()
+    return bool(query.data)
+
+@app.route("/dub/<int:video_id>/<language>", methods=["POST"])
+def dub_video(video_id, language):
+    """
+    Render a dubbed audio track for a processed video from its subtitles in
+    `language`. Optional JSON body: {"tts_engine": "espeak"|"tone", "format": "mp3"|"ogg"|"wav"}.
+    Streams NDJSON events: {"event": "progress", "done", "total"} while segments
+    render, then one "done" (with the download path), "error" or "cancelled".
+    A track where some segments failed to synthesise is served but not reused:
+    the next POST renders it again. Closing the connection cancels the render.
+    Long videos need the gthread profile (GUNICORN_PROFILE), since a sync
+    worker is killed after its timeout.
+    """
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id"}), 400
+
+    if not DUB_LANGUAGE.match(language):
+        return jsonify({"error": f"Invalid language '{language}'"}), 400
+
+    body = request.get_json(silent=True) or {}
+    fmt = body.get("format", "mp3")
+    if fmt not in DUB_FORMATS:
+        return jsonify({"error": f"Unsupported format '{fmt}'. Choose from: {', '.join(DUB_FORMATS)}"}), 400
+    try:
+        engine = dubbing.get_engine(body.get("tts_engine"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not engine.is_available():
+        return jsonify({"error": f"TTS engine '{engine.name}' is not available on this server"}), 400
+    if not engine.supports(language):
+        return jsonify({"error": f"TTS engine '{engine.name}' has no voice for '{language}'"}), 400
+
+    try:
+        if not user_owns_video(video_id, user_id):
+            return jsonify({"error": "Video not found"}), 404
+    except Exception as e:
+        logging.error(f"Error checking video ownership for dubbing: {e}")
+        return jsonify({"error": str(e)}), 500
+
+    # Rendering is CPU-heavy: same per-user limit as /upload
+    if not rate_limit(user_id):
+        return jsonify({"error": "Rate limit exceeded. Please wait before making more requests."}), 429
+
+    try:
+        segments = get_dub_segments(video_id, language)
+    except translation_engines.TranslationUnavailable as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logging.error(f"Error loading segments to dub: {e}")
+        return jsonify({"error": str(e)}), 500
+    if not segments:
+        return jsonify({"error": "No subtitles or transcript to dub for this video"}), 404
+
+    os.makedirs(DUB_FOLDER, exist_ok=True)
+    path = dub_path(video_id, language, engine.name, fmt)
+    download = f"/download-dub/{video_id}/{language}?format={fmt}&tts_engine={engine.name}"
+    if os.path.exists(path) and not os.path.exists(dub_incomplete_marker(path)):
+        done = {"event": "done", "cached": True, "download": download}
+        return Response(json.dumps(done) + "\n", mimetype="application/x-ndjson")
+
+    events = queue.Queue()
+    deadline = deadlines.Deadline(DUB_BUDGET_SEC, name="dub")
+    finished = threading.Event()
+
+    def render():
+        partial = f"{path}.{threading.get_ident()}.part"
+        try:
+            with deadlines.scope(deadline), metrics.span("dub"):
+                stats = dubbing.render_dub(
+                    segments, partial, language, engine.name, fmt,
+                    total_sec=max(seg["end"] for seg in segments),
+                    on_progress=lambda done, total: events.put({"event": "progress", "done": done, "total": total})
+                )
+            if stats["failed"]:
+                # Written before the track, so a concurrent POST never takes it for a complete one
+                open(dub_incomplete_marker(path), "w").close()
+            os.replace(partial, path)
+            if not stats["failed"] and os.path.exists(dub_incomplete_marker(path)):
+                os.remove(dub_incomplete_marker(path))
+            events.put(dict(stats, event="done", cached=False, download=download))
+        except deadlines.Cancelled as e:
+            events.put({"event": "cancelled", "reason": e.reason})
+        except Exception as e:
+            logging.error(f"Dubbing video {video_id} into {language} failed: {e}")
+            events.put({"event": "error", "error": str(e)})
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+            finished.set()
+            events.put(None)
+
+    threading.Thread(target=render, name=f"dub-{video_id}-{language}", daemon=True).start()
+
+    def stream():
+        try:
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                yield json.dumps(event) + "\n"
+        finally:
+            # Generator closed early: the client went away
+            if not finished.is_set():
+                deadline.cancel("client disconnected")
+
+    return Response(stream(), mimetype="application/x-ndjson")
+
+@app.route("/download-dub/<int:video_id>/<language>", methods=["GET"])
+def download_dub(video_id, language):
+    """Download a rendered dub track (?format=mp3, ?tts_engine=...). Supports conditional and range requests."""
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id"}), 400
+
+    fmt = request.args.get("format", "mp3")
+    engine_name = request.args.get("tts_engine", dubbing.DUB_TTS_ENGINE)
+    if fmt not in DUB_FORMATS or engine_name not in dubbing.ENGINES or not DUB_LANGUAGE.match(language):
+        return jsonify({"error": "Unsupported format, TTS engine or language"}), 400
+    path = dub_path(video_id, language, engine_name, fmt)
+    if not os.path.exists(path) or not user_owns_video(video_id, user_id):
+        return jsonify({"error": "Dub not found. POST /dub first."}), 404
+    filename = f"{downloads.safe_filename(get_video_title(video_id))}_{language}_dub.{fmt}"
+    response = send_file(os.path.abspath(path), mimetype=DUB_FORMATS[fmt], as_attachment=True,
+                         download_name=filename, conditional=True, etag=True)
+    response.headers["Cache-Control"] = f"private, max-age={downloads.DOWNLOAD_MAX_AGE_SEC}"
+    return response
+
+# ---------- BATCH INGEST ----------
+# POST /batch queues many videos on the shared pool of batch.py. What the
+# user already has is looked up once for the whole batch (video rows,
+# transcripts, summaries and subtitles in a few `in` queries, new video rows
+# created in one upsert); each video then runs the /upload pipeline minus
+# whatever is stored, with one YouTube metadata fetch for its title and download.
+BATCH_MAX_VIDEOS = int(os.getenv("BATCH_MAX_VIDEOS", "200"))
+BATCH_MAX_ACTIVE = int(os.getenv("BATCH_MAX_ACTIVE", "2"))
+YOUTUBE_VIDEO_ID = re.compile(r"(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/live/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])")
+
+def youtube_video_key(url):
+    """The 11-character id of a YouTube video URL, or None."""
+    match = YOUTUBE_VIDEO_ID.search(url) if isinstance(url, str) else None
+    return match.group(1) if match else None
+
+def expand_playlist(playlist_url, limit):
+    """Video URLs of a playlist or channel: at most limit + 1, enough to tell it is too long."""
+    with resilience.protected("youtube", "playlist"):
+        return list(itertools.islice(Playlist(playlist_url).url_generator(), limit + 1))
+
+def batch_video_complete(features, languages, action, source_language=None):
+    """True when get_video_features() shows everything a batch asks for is stored."""
+    transcripts = features["available_languages"]
+    if not transcripts or (source_language and source_language not in transcripts):
+        return False
+    if action in ("summarize", "both") and not features["has_summary"]:
+        return False
+    if action in ("subtitles", "both") and not set(languages) <= set(features["available_subtitles"]):
+        return False
+    return True
+
+def resolve_batch_items(urls, user_id, languages, action, source_language=None):
+    """
+    One batch.Item per distinct video of `urls`, in order, with its video row
+    (matched on the URL as given or its canonical watch URL; the missing ones
+    are created in one upsert) and what is already stored for it. Items with
+    nothing left to do start out cached.
+    """
+    items = []
+    seen = set()
+    for url in urls:
+        key = youtube_video_key(url)
+        if key not in seen:
+            seen.add(key)
+            items.append(batch.Item(len(items), url))
+    canonical = {item.url: f"https://www.youtube.com/watch?v={youtube_video_key(item.url)}" for item in items}
+    existing = get_supabase().table("video_url").select("id, video_url").eq("user_id", user_id).in_(
+        "video_url", sorted(set(canonical) | set(canonical.values()))).execute()
+    rows = {row["video_url"]: row for row in existing.data or []}
+    new_items = []
+    for item in items:
+        row = rows.get(item.url) or rows.get(canonical[item.url])
+        if row:
+            # The stored URL, so title updates hit the same row
+            item.url, item.video_id = row["video_url"], row["id"]
+        else:
+            new_items.append(item)
+    if new_items:
+        inserted = get_supabase().table("video_url").upsert([
+            {"video_url": item.url, "user_id": user_id, "title": "YouTube Video"} for item in new_items
+        ]).execute()
+        ids = {row["video_url"]: row["id"] for row in inserted.data}
+        for item in new_items:
+            item.video_id = ids[item.url]
+    features = get_video_features([item.video_id for item in items if item not in new_items])
+    for item in items:
+        if item.video_id in features:
+            item.stored = features[item.video_id]
+            if batch_video_complete(item.stored, languages, action, source_language):
+                item.status = batch.CACHED
+    return items
+
+def process_batch_video(job, item):
+    """batch.Batch process callback: one video, logged and accounted like an /upload."""
+    log_token = structured_logging.bind_request(f"batch-{job.id[:8]}-{item.position}", job.user_id)
+    try:
+        with usage.track() as video_usage:
+            try:
+                return run_batch_pipeline(job, item)
+            finally:
+                account_request_usage(video_usage, job.user_id)
+    finally:
+        structured_logging.unbind_request(log_token)
+
+def run_batch_pipeline(job, item):
+    """
+    The /upload pipeline for a batch video, skipping whatever is stored:
+    no download when the transcript exists, no summary or subtitle that is
+    already there. Raises when a chunk failed (the next submission resumes
+    from the checkpoints).
+    """
+    user_id = job.user_id
+    options = job.options
+    languages = options["languages"]
+    action = options["action"]
+    started = time.perf_counter()
+    track_user_activity(user_id, "video_processed", item.video_id)
+
+    source_language, transcript_text = None, None
+    if item.stored.get("available_languages"):
+        source_language, transcript_text = find_transcript(item.video_id, options["source_language"])
+    if transcript_text:
+        segments = json.loads(transcript_text)
+        usage.record(cache_hits=1, cached_audio_seconds=max((seg["end"] for seg in segments), default=0))
+    else:
+        job.update(item, stage="metadata")
+        yt = open_youtube(item.url)
+        title = get_youtube_title(item.url, yt)
+        job.update(item, stage="download", title=title)
+        downloaded_file = download_audio(item.url, yt)
+        try:
+            job.update(item, stage="transcribe")
+            segments, source_language, complete = generate_subtitles_async(
+                downloaded_file, language_hint=options["source_language"], asr_engine=options["asr_engine"])
+        finally:
+            cleanup_download(downloaded_file)
+        if not complete:
+            raise Exception("Transcript incomplete: some chunks failed. Submit the video again to resume from its checkpoints.")
+        upsert_transcript(item.video_id, source_language, segments, user_id)
+
+    if action in ("summarize", "both") and not item.stored.get("has_summary"):
+        job.update(item, stage="summarize")
+        upsert_summary(item.video_id, summarize_segments(segments), user_id)
+        track_user_activity(user_id, "summary_generated", item.video_id, languages[0])
+
+    if action in ("subtitles", "both"):
+        missing = [language for language in languages if language not in item.stored.get("available_subtitles", [])]
+        if missing:
+            job.update(item, stage="translate")
+            variants = translate_variants(segments, None, missing, source_language, "subtitles")
+            translated = {language: variant["translated_subtitles"]
+                          for language, variant in variants.items() if "error" not in variant}
+            upsert_subtitles(item.video_id, translated, user_id)
+            processing_duration = int(time.perf_counter() - started)
+            for language in translated:
+                track_user_activity(user_id, "subtitle_generated", item.video_id, language, processing_duration)
+            failed = [language for language in missing if language not in translated]
+            if failed:
+                raise Exception(f"Translation into {', '.join(failed)} failed: {variants[failed[0]]['error']}. "
+                                f"Submit the video again to retry.")
+    return batch.DONE
+
+def store_new_batch(job):
+    """
+    Insert a batch and its items (migrations/006_batches.sql). Returns False
+    when that fails, e.g. before the migration: the batch then runs with its
+    progress in this process only.
+    """
+    try:
+        get_supabase().table("batches").insert({
+            "id": job.id, "user_id": job.user_id, "options": job.options,
+            "total": len(job.items), "created_at": job.created_at, "finished_at": job.finished_at,
+        }).execute()
+        get_supabase().table("batch_items").insert([
+            dict(item.to_dict(), batch_id=job.id) for item in job.items
+        ]).execute()
+        return True
+    except Exception as e:
+        logging.error(f"Could not store batch {job.id}, its progress is only served by this worker: {e}")
+        return False
+
+def write_batch_progress(job, items):
+    """
+    batch.Batch write callback: the changed items in one upsert, the titles
+    of the newly finished ones in another, and the batch's end time.
+    """
+    get_supabase().table("batch_items").upsert([
+        dict(item.to_dict(), batch_id=job.id) for item in items
+    ], on_conflict="batch_id,position").execute()
+    # Every item finishes once, so each title is written once
+    titled = [item for item in items if item.title and item.status in batch.FINISHED_STATES]
+    if titled:
+        get_supabase().table("video_url").upsert([
+            {"id": item.video_id, "video_url": item.url, "user_id": job.user_id, "title": item.title}
+            for item in titled
+        ]).execute()
+    if job.finished_at:
+        get_supabase().table("batches").update({"finished_at": job.finished_at}).eq("id", job.id).execute()
+
+@app.route("/batch", methods=["POST"])
+def create_batch():
+    """
+    Queue many YouTube videos at once. JSON body: "urls" (a list) and/or
+    "playlist_url" (a playlist or channel), plus the /upload options
+    "language" (one or several, default "en"), "action", "asr_engine" and
+    "source_language".
+    Videos are deduplicated within the batch and against what the user has
+    stored, and processed on the shared batch pool, a few at a time per
+    process and fairly across batches. Counts as one request for the rate
+    limit. Answers 202 with the batch's progress (see GET /batch/<id>).
+    """
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id. Please set X-User-Id header with your UUID."}), 400
+
+    body = request.get_json(silent=True) or {}
+    urls = body.get("urls") or []
+    playlist_url = body.get("playlist_url")
+    target_languages = parse_target_languages(body.get("language", "en"))
+    action = body.get("action", "both")
+    if action not in ("subtitles", "summarize"):
+        action = "both"
+    asr_engine = body.get("asr_engine")
+    requested_source = body.get("source_language")
+    source_language = asr_engines.language_code(requested_source)
+
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return jsonify({"error": "urls must be a list of YouTube URLs"}), 400
+    if not urls and not playlist_url:
+        return jsonify({"error": "Provide urls and/or a playlist_url"}), 400
+    if len(urls) > BATCH_MAX_VIDEOS:
+        return jsonify({"error": f"A batch holds at most {BATCH_MAX_VIDEOS} videos"}), 400
+    if not target_languages or len(target_languages) > MAX_TARGET_LANGUAGES:
+        return jsonify({"error": f"Provide between 1 and {MAX_TARGET_LANGUAGES} target languages"}), 400
+    if requested_source and not source_language:
+        return jsonify({"error": f"Unsupported source_language '{requested_source}'"}), 400
+    if asr_engine and asr_engine != "auto" and asr_engine not in asr_engines.ENGINES:
+        return jsonify({"error": f"Unknown asr_engine '{asr_engine}'. Choose from: auto, {', '.join(asr_engines.ENGINES)}"}), 400
+
+    scheduler = batch.get_scheduler()
+    if len(scheduler.active(user_id)) >= BATCH_MAX_ACTIVE:
+        return jsonify({"error": f"At most {BATCH_MAX_ACTIVE} batches can run at once. Wait for one to finish."}), 429
+    if not rate_limit(user_id):
+        return jsonify({"error": "Rate limit exceeded. Please wait before making more requests."}), 429
+
+    if playlist_url:
+        try:
+            urls = urls + expand_playlist(playlist_url, BATCH_MAX_VIDEOS)
+        except Exception as e:
+            logging.error(f"Failed to expand playlist {playlist_url}: {e}")
+            return jsonify({"error": f"Could not read the playlist: {e}"}), 400
+    urls = [url.strip() for url in urls]
+    invalid = [url for url in urls if not youtube_video_key(url)]
+    if invalid:
+        return jsonify({"error": "Not YouTube video URLs", "invalid_urls": invalid[:10]}), 400
+    if len({youtube_video_key(url) for url in urls}) > BATCH_MAX_VIDEOS:
+        return jsonify({"error": f"A batch holds at most {BATCH_MAX_VIDEOS} videos"}), 400
+
+    try:
+        items = resolve_batch_items(urls, user_id, target_languages, action, source_language)
+    except Exception as e:
+        logging.error(f"Error resolving batch videos: {e}")
+        return jsonify({"error": str(e)}), 500
+    job = batch.Batch(user_id, items, process_batch_video, options={
+        "languages": target_languages, "action": action,
+        "asr_engine": asr_engine, "source_language": source_language,
+    })
+    if store_new_batch(job):
+        job.write = write_batch_progress
+    scheduler.submit(job)
+    logging.info(f"Batch {job.id}: {len(items)} videos ({len(urls) - len(items)} duplicates), "
+                 f"{batch.format_counts(job.progress(with_items=False)['counts'])}")
+    return jsonify(dict(job.progress(), duplicates=len(urls) - len(items), progress_url=f"/batch/{job.id}")), 202
+
+@app.route("/batch/<batch_id>", methods=["GET"])
+def get_batch(batch_id):
+    """
+    Progress of a batch: status ("running" or "finished"), counts per item
+    state, the finished fraction and every item with its video_id, state,
+    current stage and error. Served live by the worker running the batch,
+    otherwise from the batch tables (at most BATCH_FLUSH_SEC behind).
+    """
+    user_id = get_user_id()
+
+    if not check_user_exists(user_id):
+        return jsonify({"error": "Missing or invalid user_id"}), 400
+    if not is_valid_uuid(batch_id):
+        return jsonify({"error": "Batch not found"}), 404
+
+    job = batch.get_scheduler().get(batch_id)
+    if job is not None:
+        if job.user_id != user_id:
+            return jsonify({"error": "Batch not found"}), 404
+        return jsonify(job.progress())
+    try:
+        query = get_supabase().table("batches").select("id, created_at, finished_at").eq("id", batch_id).eq("user_id", user_id).execute()
+        if not query.data:
+            return jsonify({"error": "Batch not found"}), 404
+        items = get_supabase().table("batch_items").select(
+            "position, url, video_id, title, status, stage, error, updated_at"
+        ).eq("batch_id", batch_id).order("position").execute().data or []
+    except Exception as e:
+        logging.error(f"Error loading batch {batch_id}: {e}")
+        return jsonify({"error": str(e)}), 500
+    row = query.data[0]
+    return jsonify({"batch_id": row["id"], "created_at": row["created_at"], "finished_at": row["finished_at"],
+                    **batch.summarize(items), "items": items})
+
+# ---------- ADMIN PROFILING ENDPOINTS ----------
+@app.route("/admin/profiles", methods=["GET"])
+def list_request_profiles():
+    """List stored request profiles (admin only)."""
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    return jsonify({"profiles": profiling.list_profiles()})
+
+@app.route("/admin/profiles/<profile_id>", methods=["GET"])
+def get_request_profile(profile_id):
+    """
+    Get one stored profile (admin only).
+    ?format=collapsed returns the stacks as plain text for flamegraph.pl / speedscope.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    record = profiling.load_profile(profile_id)
+    if not record:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "collapsed":
+        return Response("\n".join(record["collapsed_stacks"]) + "\n", mimetype="text/plain")
+    return jsonify(record)
+
+@app.route("/admin/usage", methods=["GET"])
+def admin_api_usage():
+    """
+    External API usage and estimated cost (admin only): per day, per user
+    (the API_USAGE_REPORT_USERS costliest) and in total over the last ?days=
+    (default 30), optionally for one ?user_id=. worker_totals is this
+    worker's usage since it started, including requests without a user.
+    """
+    if not is_admin_request():
+        return jsonify({"error": "Admin token required"}), 403
+    user_id = request.args.get("user_id")
+    try:
+        days = int(request.args.get("days", 30))
+        if not 1 <= days <= 366:
+            raise ValueError
+    except ValueError:
+        return jsonify({"error": "days must be an integer between 1 and 366"}), 400
+    if user_id and not is_valid_uuid(user_id):
+        return jsonify({"error": "Invalid user_id"}), 400
+    since = (datetime.utcnow() - dt_timedelta(days=days - 1)).date().isoformat()
+    try:
+        report = get_api_usage_report(since, user_id)
+    except Exception as e:
+        logging.error(f"Error building API usage report: {e}")
+        return jsonify({"error": str(e)}), 500
+    return jsonify(dict(report, since=since, prices=usage.PRICES, worker_totals=usage.process_totals.snapshot()))
+
+# ---------- METRICS ENDPOINT ----------
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint (merged across gunicorn workers), admin only:
+    X-Admin-Token, or the same token as a bearer token (the scrape config's
+    `authorization: {credentials: ...}`).
+    """
+    admin_token = os.getenv("ADMIN_TOKEN")
+    bearer = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not (is_admin_request() or (admin_token and hmac.compare_digest(bearer.encode(), admin_token.encode()))):
+        return jsonify({"error": "Admin token required"}), 403
+    payload, content_type = metrics.render_latest()
+    return Response(payload, content_type=content_type)
+
 # ---------- HEALTH CHECK ENDPOINT ----------
+# Warm the lazily built clients in the background after the first health check
+PREWARM_CLIENTS = os.getenv("PREWARM_CLIENTS", "1") == "1"
+_prewarm_once = threading.Lock()
+
+def prewarm_clients():
+    """Build the SDK clients, open the Supabase connection pool and start the audio workers."""
+    started = time.perf_counter()
+    steps = (
+        ("supabase", lambda: get_supabase().table("video_url").select("id").limit(1).execute()),
+        ("google_translate", get_translate_client),
+        ("groq", get_groq_client),
+        ("pytubefix", lambda: __import__("pytubefix")),
+        ("audio_pool", lambda: audio_pool.get_pool().submit(audio_pool.ffmpeg_binary).result()),
+    )
+    for name, warm in steps:
+        try:
+            warm()
+        except Exception as e:
+            logging.warning(f"Prewarming {name} failed: {e}")
+    logging.info(f"Prewarm finished in {time.perf_counter() - started:.2f}s")
+
 @app.route("/health", methods=["GET"])
 def health_check():
     """Health check endpoint for Render deployment."""
-    return jsonify({"status": "healthy", "message": "DubMyYT backend is running"}), 200
+    # Never released, so only the first health check starts the prewarm
+    if PREWARM_CLIENTS and _prewarm_once.acquire(blocking=False):
+        threading.Thread(target=prewarm_clients, name="prewarm", daemon=True).start()
+    dependencies = resilience.status()
+    # An open breaker degrades features but the instance itself is up, so still 200
+    degraded = [name for name, state in dependencies.items() if state["state"] != "closed"]
+    return jsonify({
+        "status": "degraded" if degraded else "healthy",
+        "message": "DubMyYT backend is running",
+        "dependencies": dependencies
+    }), 200
 
 @app.route("/", methods=["GET"])
 def root():
@@ -1416,7 +2710,8 @@ def root():
             "health": "/health",
             "upload": "/upload",
             "user_dashboard": "/user-dashboard",
-            "user_analytics": "/user-analytics"
+            "user_analytics": "/user-analytics",
+            "metrics": "/metrics"
         },
         "status": "healthy"
     }), 200
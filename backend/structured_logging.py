@@ -0,0 +1,233 @@
+"""
+Non-blocking, structured logging for the backend.
+
+Request threads (and the chunk threads they fan out to) never write to the
+log file themselves: the root logger has a single QueueHandler that puts
+records on a bounded in-memory queue, and a QueueListener thread formats
+and writes them. A full queue drops the record (counted in
+dubmyyt_log_records_dropped_total) instead of stalling a request.
+
+Each record is a JSON object carrying the request context it was emitted in:
+
+  request_id  X-Request-Id of the request (generated when absent, echoed back)
+  user_id     X-User-Id of the request
+  stage       innermost metrics span (e.g. transcribe_chunk_sync) or deadline stage
+
+The context lives in contextvars, so it follows the request into threads
+started with contextvars.copy_context() and into the shared event loop.
+
+Volume controls:
+  LOG_LEVEL          root level (default INFO)
+  LOG_SAMPLE_RATE    fraction of requests whose DEBUG/INFO records are kept
+                     (default 1.0); warnings and errors are always kept, and
+                     the decision is per request so a kept request logs fully
+  LOG_FORMAT         json (default) or text
+  LOG_FILE           default server.log; "-" for stderr
+  LOG_QUEUE_SIZE     records buffered before dropping (default 10000)
+  LOG_PROGRESS_INTERVAL_SEC  seconds between download progress lines (default 5)
+
+The variables are read by configure(), so they can come from .env.
+"""
+import os
+import sys
+import copy
+import time
+import json
+import queue
+import random
+import atexit
+import logging
+import contextvars
+import logging.handlers
+from datetime import datetime, timezone
+
+import metrics
+import deadlines
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s %(stage)s] %(message)s"
+
+_request_id = contextvars.ContextVar("log_request_id", default=None)
+_user_id = contextvars.ContextVar("log_user_id", default=None)
+_sampled = contextvars.ContextVar("log_sampled", default=True)
+
+_queue_handler = None
+_listener = None
+_sample_rate = 1.0
+
+
+def new_request_id():
+    return os.urandom(8).hex()
+
+
+def bind_request(request_id=None, user_id=None, sample_rate=None):
+    """
+    Attach a request's context to every record logged in the current context.
+    Returns a token for unbind_request(). The sampling decision is made here.
+    """
+    rate = _sample_rate if sample_rate is None else sample_rate
+    return (
+        _request_id.set((request_id or new_request_id())[:64]),
+        _user_id.set(user_id[:64] if user_id else None),
+        _sampled.set(rate >= 1.0 or random.random() < rate),
+    )
+
+
+def unbind_request(token):
+    for var, var_token in zip((_request_id, _user_id, _sampled), token):
+        var.reset(var_token)
+
+
+def current_request_id():
+    return _request_id.get()
+
+
+def _current_stage():
+    stage = metrics.current_stage()
+    if stage:
+        return stage
+    deadline_name = deadlines.current().name
+    return deadline_name if deadline_name != "request" else None
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps request_id/user_id/stage on records and applies request sampling."""
+
+    def filter(self, record):
+        if not _sampled.get() and record.levelno < logging.WARNING:
+            return False
+        record.request_id = _request_id.get()
+        record.user_id = _user_id.get()
+        record.stage = _current_stage()
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking or raising."""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.LOG_RECORDS_DROPPED.inc()
+
+    def prepare(self, record):
+        # Resolve the message and traceback in the emitting thread, keeping
+        # the traceback separate so the JSON formatter can put it in its own field
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room: the stock put_nowait raises when the queue is full
+        self.queue.put(self._sentinel)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "user_id": getattr(record, "user_id", None),
+            "stage": getattr(record, "stage", None),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _output_handler(path, fmt):
+    handler = logging.StreamHandler(sys.stderr) if path == "-" else logging.FileHandler(path)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    return handler
+
+
+def configure(level=None, path=None, fmt=None, queue_size=None, sample_rate=None, handler=None):
+    """
+    Route the root logger through the queue. Arguments default to the LOG_*
+    environment variables; `handler` replaces the file/stderr output handler.
+    Safe to call more than once.
+    """
+    global _queue_handler, _listener, _sample_rate
+    if _queue_handler is not None:
+        return
+    level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+    path = path or os.getenv("LOG_FILE", "server.log")
+    fmt = fmt or os.getenv("LOG_FORMAT", "json")
+    queue_size = queue_size or int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    _sample_rate = sample_rate if sample_rate is not None else float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+    log_queue = queue.Queue(queue_size)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestContextFilter())
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_queue_handler)
+    _listener = _Listener(log_queue, handler or _output_handler(path, fmt))
+    _listener.start()
+    atexit.register(shutdown)
+
+
+def shutdown():
+    """Flush the queue and stop the writer thread."""
+    global _queue_handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+    _queue_handler = _listener = None
+
+
+def _restart_after_fork():
+    # The writer thread doesn't survive fork (gunicorn --preload): give the
+    # child a fresh queue and its own writer thread
+    global _listener
+    if _queue_handler is None:
+        return
+    _queue_handler.queue = queue.Queue(_queue_handler.queue.maxsize)
+    _listener = _Listener(_queue_handler.queue, *_listener.handlers)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+class ProgressLogger:
+    """
+    pytubefix on_progress callback that logs at most every interval_sec
+    (and at completion), instead of drawing a progress bar on stdout per chunk.
+    """
+
+    def __init__(self, label, interval_sec=None, clock=None):
+        self.label = label
+        if interval_sec is None:
+            interval_sec = float(os.getenv("LOG_PROGRESS_INTERVAL_SEC", "5"))
+        self.interval_sec = interval_sec
+        self._clock = clock or time.monotonic
+        self._last = None
+
+    def __call__(self, stream, chunk, bytes_remaining):
+        total = getattr(stream, "filesize", 0) or 0
+        done = total - bytes_remaining
+        now = self._clock()
+        if bytes_remaining > 0 and self._last is not None and now - self._last < self.interval_sec:
+            return
+        self._last = now
+        if total:
+            logging.info(f"{self.label}: {100.0 * done / total:.0f}% ({done / 2 ** 20:.1f}/{total / 2 ** 20:.1f} MB)")
+        else:
+            logging.info(f"{self.label}: {done / 2 ** 20:.1f} MB")
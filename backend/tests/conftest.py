@@ -0,0 +1,68 @@
+"""
+Shared fixtures: the local fakes from benchmarks/fakes.py and the real app
+served in-process against them.
+
+server.py, resilience.py and checkpoints.py read their configuration at
+import, so the environment is set once per session, before the app is first
+imported; tests adjust module attributes (via monkeypatch) rather than env.
+
+    cd backend
+    python -m pytest tests
+"""
+import os
+import sys
+import shutil
+from types import SimpleNamespace
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from benchmarks.fakes import FakeGroq, FakeTranslate, FakePostgrest, AudioServer
+from benchmarks.synthetic import write_wav
+from benchmarks.bench_load import InProcessServer, app_environment
+
+
+@pytest.fixture(scope="session")
+def fakes(tmp_path_factory):
+    audio_dir = str(tmp_path_factory.mktemp("audio"))
+    # 16 kHz mono keeps download and preprocessing short
+    shutil.move(write_wav(60, sample_rate=16000, channels=1), os.path.join(audio_dir, "template.wav"))
+    fakes = SimpleNamespace(
+        groq=FakeGroq().start(),
+        translate=FakeTranslate().start(),
+        postgrest=FakePostgrest().start(),
+        audio=AudioServer(audio_dir, default_file="template.wav").start(),
+        audio_dir=audio_dir,
+    )
+    yield fakes
+    for fake in (fakes.groq, fakes.translate, fakes.postgrest, fakes.audio):
+        fake.stop()
+
+
+@pytest.fixture(scope="session")
+def live_server(fakes, tmp_path_factory):
+    """The app on a local port; importing anything from the app needs this first."""
+    env = app_environment(fakes)
+    env["CHECKPOINT_FOLDER"] = str(tmp_path_factory.mktemp("checkpoints"))
+    server = InProcessServer(env, 0)
+    import audio_pool
+    yield server
+    server.stop()
+    audio_pool.shutdown_pool()
+
+
+@pytest.fixture
+def add_audio(fakes):
+    """
+    add_audio(video_key, seconds, seed) serves that much synthetic audio for
+    the fake video `video_key`. Checkpoints are keyed by the audio, so videos
+    that must not share them need different seeds.
+    """
+    def add(video_key, seconds, seed=0):
+        path = os.path.join(fakes.audio_dir, f"{video_key}.wav")
+        shutil.move(write_wav(seconds, sample_rate=16000, channels=1, seed=seed), path)
+        return path
+    return add
@@ -0,0 +1,125 @@
+"""
+Analytics against the fake Supabase, with the SQL functions of
+migrations/003_analytics_aggregation.sql (registered in FakePostgrest) and
+without them, where call_rpc falls back to the client-side path. Both paths
+must leave the same counters behind and build the same dashboard.
+"""
+import uuid
+
+import pytest
+
+ACTIVITIES = [
+    ("video_processed", None, 0),
+    ("summary_generated", None, 0),
+    ("subtitle_generated", "es", 3),
+    ("subtitle_generated", "fr", 2),
+]
+
+
+@pytest.fixture
+def supabase(fakes, live_server, monkeypatch):
+    """The fake Supabase, with call_rpc's record of missing functions reset for the test."""
+    import server
+    monkeypatch.setattr(server, "_missing_rpcs", set())
+    monkeypatch.setattr(fakes.postgrest, "rpc_functions", dict(fakes.postgrest.rpc_functions))
+    return fakes.postgrest
+
+
+def use_sql_functions(supabase, enabled):
+    from benchmarks.fakes import DEFAULT_RPC_FUNCTIONS
+    import server
+    supabase.rpc_functions = dict(DEFAULT_RPC_FUNCTIONS) if enabled else {}
+    server._missing_rpcs.clear()
+
+
+def rows(supabase, table, user_id):
+    return [row for row in supabase.tables[table] if row.get("user_id") == user_id]
+
+
+def analytics_row(supabase, user_id):
+    (row,) = rows(supabase, "user_analytics", user_id)
+    return row
+
+
+def record_activities(user_id):
+    import server
+    for activity, language, processing_time in ACTIVITIES:
+        server.track_user_activity(user_id, activity, 1, language, processing_time)
+
+
+@pytest.mark.parametrize("sql_functions", [True, False], ids=["sql", "fallback"])
+def test_record_user_activity(supabase, sql_functions):
+    use_sql_functions(supabase, sql_functions)
+    user_id = str(uuid.uuid4())
+    record_activities(user_id)
+
+    analytics = analytics_row(supabase, user_id)
+    assert (analytics["videos_processed"], analytics["summaries_generated"], analytics["subtitles_generated"]) == (1, 1, 2)
+    assert analytics["languages_used"] == ["es", "fr"]
+    assert analytics["total_processing_time"] == 5
+    assert len(rows(supabase, "user_activity_log", user_id)) == len(ACTIVITIES)
+    (daily,) = rows(supabase, "daily_usage_stats", user_id)
+    assert (daily["videos_count"], daily["summaries_count"], daily["subtitles_count"]) == (1, 1, 2)
+    assert daily["unique_languages"] == 2
+    assert daily["total_time"] == 5
+
+
+@pytest.mark.parametrize("sql_functions", [True, False], ids=["sql", "fallback"])
+def test_sync_user_analytics(supabase, sql_functions):
+    import server
+    use_sql_functions(supabase, sql_functions)
+    user_id, other_user = str(uuid.uuid4()), str(uuid.uuid4())
+    for owner, videos in ((user_id, 3), (other_user, 1)):
+        seeded = supabase.seed("video_url", [{"video_url": f"https://youtube.com/watch?v={uuid.uuid4().hex[:11]}",
+                                              "user_id": owner, "title": "Synthetic"} for _ in range(videos)])
+        supabase.seed("summaries", [{"video_id": row["id"], "user_id": owner, "summary": "s"} for row in seeded[:2]])
+        supabase.seed("subtitles", [{"video_id": row["id"], "user_id": owner, "language": language, "srt": "x"}
+                                    for row, language in zip(seeded, ("es", "fr", "es"))])
+
+    assert server.sync_existing_user_data(user_id)
+
+    analytics = analytics_row(supabase, user_id)
+    assert (analytics["videos_processed"], analytics["summaries_generated"], analytics["subtitles_generated"]) == (3, 2, 3)
+    assert analytics["languages_used"] == ["es", "fr"]
+    assert not rows(supabase, "user_analytics", other_user)
+
+
+@pytest.mark.parametrize("recorded_with_sql", [True, False], ids=["recorded-sql", "recorded-fallback"])
+def test_dashboard_counts_match_fallback(supabase, recorded_with_sql):
+    import server
+    use_sql_functions(supabase, recorded_with_sql)
+    user_id = str(uuid.uuid4())
+    record_activities(user_id)
+
+    use_sql_functions(supabase, True)
+    from_sql = server.get_user_dashboard_data(user_id)
+    use_sql_functions(supabase, False)
+    from_fallback = server.get_user_dashboard_data(user_id)
+
+    assert from_sql["period_totals"] == from_fallback["period_totals"] == {
+        "videos": 1, "summaries": 1, "subtitles": 2, "processing_time": 5}
+    assert from_sql["analytics"] == from_fallback["analytics"]
+    assert from_sql["usage_trends"] == from_fallback["usage_trends"]
+    assert [a["activity_type"] for a in from_sql["recent_activity"]] == \
+        [a["activity_type"] for a in from_fallback["recent_activity"]]
+    assert len(from_sql["recent_activity"]) == len(ACTIVITIES)
+    assert [a["name"] for a in from_sql["achievements"]] == [a["name"] for a in from_fallback["achievements"]] == ["First Video"]
+
+
+def test_missing_function_falls_back_once(supabase):
+    import server
+    use_sql_functions(supabase, False)
+    calls_before = supabase.snapshot().get("POST rpc/user_dashboard", 0)
+
+    assert server.call_rpc("user_dashboard", {"p_user_id": "u", "p_since": "2000-01-01"}, lambda: "fallback") == "fallback"
+    assert "user_dashboard" in server._missing_rpcs
+    # Known to be missing: the fallback runs without asking PostgREST again
+    assert server.call_rpc("user_dashboard", {"p_user_id": "u", "p_since": "2000-01-01"}, lambda: "again") == "again"
+    assert supabase.snapshot().get("POST rpc/user_dashboard", 0) == calls_before + 1
+
+
+def test_present_function_is_called(supabase):
+    import server
+    use_sql_functions(supabase, True)
+    assert server.call_rpc("analytics_user_ids", {"p_after": None, "p_limit": 1}, lambda: "fallback") != "fallback"
+    assert "analytics_user_ids" not in server._missing_rpcs
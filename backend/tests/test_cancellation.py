@@ -0,0 +1,134 @@
+"""
+Cancelled /upload requests must stop calling Groq. A slow FakeGroq and a
+20-minute video keep transcription queued when the request is cancelled,
+either by the client disconnecting or by the request budget
+(REQUEST_BUDGET_SEC) running out; no new transcription call may start more
+than BOUND_SEC after the cancellation, and the remaining chunks are never sent.
+"""
+import json
+import time
+import uuid
+import threading
+import http.client
+
+import pytest
+
+TRANSCRIPTION_ROUTE = "POST /openai/v1/audio/transcriptions"
+MINUTES = 20
+GROQ_LATENCY_SEC = 1.0
+CONCURRENCY = 2
+BOUND_SEC = 1.0
+# Long enough for calls already in flight to finish and for any late ones to show up
+SETTLE_SEC = GROQ_LATENCY_SEC * 2 + 1
+
+
+class CallTimeline:
+    """Samples the FakeGroq transcription counter to find when the last call arrived."""
+
+    def __init__(self, groq, interval=0.02):
+        self.groq = groq
+        self.interval = interval
+        self.baseline = self.count()
+        self.last_change = None
+        self._count = self.baseline
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def count(self):
+        return self.groq.snapshot().get(TRANSCRIPTION_ROUTE, 0)
+
+    def sent(self):
+        return self.count() - self.baseline
+
+    def wait_for_call(self):
+        while self.count() <= self.baseline:
+            time.sleep(self.interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            count = self.count()
+            if count != self._count:
+                self._count = count
+                self.last_change = time.monotonic()
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def post_upload(url, video_key):
+    host, port = url.split("//")[1].split(":")
+    conn = http.client.HTTPConnection(host, int(port))
+    body = json.dumps({"youtube_url": f"https://www.youtube.com/watch?v={video_key}", "language": "es", "action": "both"})
+    conn.request("POST", "/upload", body=body, headers={"Content-Type": "application/json", "X-User-Id": str(uuid.uuid4())})
+    return conn
+
+
+@pytest.fixture
+def slow_groq(fakes, live_server, monkeypatch):
+    import asr_engines
+    import audio_pool
+    monkeypatch.setattr(fakes.groq, "latency", GROQ_LATENCY_SEC)
+    monkeypatch.setattr(asr_engines.GroqASREngine, "max_concurrency", CONCURRENCY)
+    # Start the pool up front so worker spawn time isn't part of the request
+    audio_pool.get_pool().submit(audio_pool.ffmpeg_binary).result()
+    return fakes.groq
+
+
+@pytest.fixture
+def long_video(add_audio):
+    """long_video() adds a fresh 20-minute video (its own audio, so no checkpoints carry over) and returns its key."""
+    def add():
+        video_key = f"cancel-{uuid.uuid4().hex[:8]}"
+        add_audio(video_key, MINUTES * 60, seed=uuid.uuid4().int % 10000)
+        return video_key
+    return add
+
+
+def assert_stopped(timeline, cancelled_at):
+    time.sleep(SETTLE_SEC)
+    timeline.stop()
+    assert 0 < timeline.sent() < MINUTES
+    assert timeline.last_change - cancelled_at <= BOUND_SEC
+
+
+def disconnect_during_asr(url, groq, video_key, after_sec):
+    """
+    Start an upload and close the connection `after_sec` after its first Groq
+    call. Returns (timeline, when it closed, seconds it took to reach Groq).
+    """
+    timeline = CallTimeline(groq)
+    started = time.monotonic()
+    conn = post_upload(url, video_key)
+    timeline.wait_for_call()
+    reached_asr_sec = time.monotonic() - started
+    time.sleep(after_sec)
+    conn.close()
+    return timeline, time.monotonic(), reached_asr_sec
+
+
+def test_client_disconnect_stops_transcription(live_server, slow_groq, long_video):
+    timeline, cancelled_at, _ = disconnect_during_asr(live_server.url, slow_groq, long_video(), 2)
+    assert_stopped(timeline, cancelled_at)
+
+
+def test_request_budget_stops_transcription(live_server, slow_groq, long_video, monkeypatch):
+    import deadlines
+    # Download and preprocessing time varies by machine: time a probe request to the
+    # first Groq call, then give the real one that plus a few chunks' worth of budget
+    probe, _, reached_asr_sec = disconnect_during_asr(live_server.url, slow_groq, long_video(), 0)
+    time.sleep(SETTLE_SEC)
+    probe.stop()
+    # Read by the /upload decorator when the request starts
+    monkeypatch.setattr(deadlines, "REQUEST_BUDGET_SEC", reached_asr_sec + 4 * GROQ_LATENCY_SEC)
+
+    timeline = CallTimeline(slow_groq)
+    conn = post_upload(live_server.url, long_video())
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    assert response.status == 504
+    # The 504 goes out as soon as the deadline cancels the request
+    assert_stopped(timeline, time.monotonic())
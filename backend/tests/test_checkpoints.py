@@ -0,0 +1,97 @@
+"""
+Kill-and-resume for chunk checkpoints: generate_subtitles_async runs in a
+child process with a slow fake ASR engine and is SIGKILLed once some chunks
+are checkpointed (as the gunicorn timeout would); rerunning the same audio
+must send only the missing chunks to the engine and return the complete
+transcript.
+"""
+import os
+import sys
+import glob
+import time
+import signal
+import threading
+import subprocess
+
+MINUTES = 10
+KILL_AFTER = 5
+SEGMENTS_PER_CHUNK = 12
+CHUNK_DELAY_SEC = 0.5
+
+
+def register_fake_engine():
+    import asr_engines
+
+    class SlowFakeEngine(asr_engines.ASREngine):
+        """Returns synthetic segments after CHUNK_DELAY_SEC and records which chunks it saw."""
+
+        name = "fake"
+        # One chunk at a time, so the kill lands between two checkpoints
+        max_concurrency = 1
+
+        def __init__(self):
+            self.chunk_starts = []
+            self._lock = threading.Lock()
+
+        def transcribe(self, chunk_path, language_hint="en", chunk_start_sec=0):
+            time.sleep(CHUNK_DELAY_SEC)
+            with self._lock:
+                self.chunk_starts.append(chunk_start_sec)
+            step = 60.0 / SEGMENTS_PER_CHUNK
+            return self.shift_segments([
+                {"id": i, "start": i * step, "end": (i + 1) * step, "text": f" Segment {i}."}
+                for i in range(SEGMENTS_PER_CHUNK)
+            ], chunk_start_sec)
+
+        def detect_and_transcribe(self, chunk_path, chunk_start_sec=0):
+            return self.transcribe(chunk_path, None, chunk_start_sec), "en"
+
+    asr_engines.ENGINES["fake"] = SlowFakeEngine
+    asr_engines._instances.pop("fake", None)
+    return asr_engines.get_engine("fake")
+
+
+def checkpointed_chunks(folder, ignore=frozenset()):
+    """Chunk checkpoint files under `folder`, leaving out the `ignore` set (earlier tests' leftovers)."""
+    return {path for path in glob.glob(os.path.join(folder, "*", "*.json"))
+            if os.path.basename(path) != "language.json"} - ignore
+
+
+def test_resume_sends_only_missing_chunks(live_server):
+    import server
+    import checkpoints
+    from benchmarks.synthetic import write_wav, remove_quietly
+
+    folder = checkpoints.CHECKPOINT_FOLDER
+    earlier = checkpointed_chunks(folder)
+    audio_path = write_wav(MINUTES * 60)
+    try:
+        # The child inherits the session's environment, so it checkpoints into the same folder
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        child = subprocess.Popen([sys.executable, os.path.abspath(__file__), audio_path],
+                                 cwd=backend_dir, env=dict(os.environ, PYTHONPATH=backend_dir),
+                                 start_new_session=True)
+        while len(checkpointed_chunks(folder, earlier)) < KILL_AFTER and child.poll() is None:
+            time.sleep(0.01)
+        # Kill the whole group so the child's audio pool workers go with it
+        os.killpg(child.pid, signal.SIGKILL)
+        child.wait()
+        assert len(checkpointed_chunks(folder, earlier)) == KILL_AFTER
+
+        engine = register_fake_engine()
+        segments, language, complete = server.generate_subtitles_async(audio_path, asr_engine="fake")
+
+        assert len(engine.chunk_starts) == MINUTES - KILL_AFTER
+        assert complete
+        assert language == "en"
+        assert len(segments) == MINUTES * SEGMENTS_PER_CHUNK
+        assert not checkpointed_chunks(folder, earlier)
+    finally:
+        remove_quietly(audio_path)
+
+
+if __name__ == "__main__":
+    # Child side of the test: transcribe argv[1] until killed
+    import server
+    register_fake_engine()
+    server.generate_subtitles_async(sys.argv[1], asr_engine="fake")
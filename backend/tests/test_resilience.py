@@ -0,0 +1,69 @@
+"""
+Fault injection for the dependency circuit breakers: Google Translate hangs
+(FakeTranslate in hang mode) while /upload keeps being called.
+
+A single-language request whose translation fails answers 502 with
+failed_languages (the transcript and summary are stored, only the
+translation has to be retried). Every such answer must come back within
+BOUND_SEC, the google_translate breaker must open after BREAKER_MIN_CALLS
+failures, and once the fake recovers and the open period has passed the next
+request must succeed and close the breaker again.
+"""
+import json
+import time
+import uuid
+
+import pytest
+import requests
+
+TRANSLATE_TIMEOUT_SEC = 1.0
+BREAKER_MIN_CALLS = 3
+BREAKER_OPEN_SEC = 3.0
+# Download, transcription and summary of the one-minute fake video, plus one timed-out translation
+BOUND_SEC = 15.0
+
+
+def upload(url):
+    body = {"youtube_url": f"https://www.youtube.com/watch?v=fault-{uuid.uuid4().hex[:8]}",
+            "language": "es", "action": "both"}
+    started = time.perf_counter()
+    response = requests.post(f"{url}/upload", data=json.dumps(body), timeout=300,
+                             headers={"Content-Type": "application/json", "X-User-Id": str(uuid.uuid4())})
+    return response, time.perf_counter() - started
+
+
+def breaker_state(url):
+    return requests.get(f"{url}/health", timeout=5).json()["dependencies"]["google_translate"]["state"]
+
+
+@pytest.fixture
+def hanging_translate(fakes, live_server, monkeypatch):
+    import resilience
+    monkeypatch.setitem(resilience.DEPENDENCIES["google_translate"], "timeout", TRANSLATE_TIMEOUT_SEC)
+    monkeypatch.setitem(resilience._breakers, "google_translate", resilience.CircuitBreaker(
+        "google_translate", window_sec=300, min_calls=BREAKER_MIN_CALLS, open_sec=BREAKER_OPEN_SEC))
+    fakes.translate.hang = True
+    yield fakes.translate
+    fakes.translate.hang = False
+    # Wake the handlers still blocked on timed-out calls
+    fakes.translate.release()
+
+
+def test_hanging_translate_fails_fast_and_breaker_recovers(live_server, hanging_translate):
+    states = []
+    for _ in range(BREAKER_MIN_CALLS + 2):
+        response, elapsed = upload(live_server.url)
+        assert response.status_code == 502
+        assert response.json()["failed_languages"] == ["es"]
+        assert response.json()["original_subtitles"]
+        assert elapsed < BOUND_SEC
+        states.append(breaker_state(live_server.url))
+    assert states[BREAKER_MIN_CALLS - 1:] == ["open"] * 3
+
+    hanging_translate.hang = False
+    time.sleep(BREAKER_OPEN_SEC)
+    response, elapsed = upload(live_server.url)
+    assert response.status_code == 200
+    assert "failed_languages" not in response.json()
+    assert elapsed < BOUND_SEC
+    assert breaker_state(live_server.url) == "closed"
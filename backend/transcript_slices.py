@@ -0,0 +1,98 @@
+"""
+Time-window lookups over a transcript's segments.
+
+A Timeline is built once per (video, language) transcript: segment starts in
+order, plus the running maximum of segment ends. Both arrays are sorted, so
+the segments overlapping [start, end) are found with two bisections, i.e.
+O(log n + k) for k returned segments, however long the video is. The running
+maximum makes this exact even when Whisper segments overlap (an end is not
+always after the previous segment's end).
+
+Timelines are kept in a per-process LRU (SLICE_CACHE_SIZE entries). The
+upsert paths invalidate their entry; SLICE_CACHE_TTL_SEC bounds how long a
+worker can serve a transcript that another worker has since replaced.
+"""
+import os
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+
+SLICE_CACHE_SIZE = int(os.getenv("SLICE_CACHE_SIZE", "256"))
+SLICE_CACHE_TTL_SEC = float(os.getenv("SLICE_CACHE_TTL_SEC", "600"))
+
+
+class Timeline:
+    """Segments of one transcript, searchable by time."""
+
+    def __init__(self, segments):
+        rows = sorted(
+            (float(segment["start"]), float(segment["end"]), segment.get("text", "").strip())
+            for segment in segments
+            if segment.get("start") is not None and segment.get("end") is not None
+        )
+        self.starts = [row[0] for row in rows]
+        self.ends = [row[1] for row in rows]
+        self.texts = [row[2] for row in rows]
+        self.max_ends = []
+        running = float("-inf")
+        for end in self.ends:
+            running = max(running, end)
+            self.max_ends.append(running)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def duration(self):
+        return self.max_ends[-1] if self.max_ends else 0.0
+
+    def slice(self, start, end):
+        """Segments overlapping [start, end), in time order."""
+        # First segment that could still be running at `start`
+        lo = bisect_right(self.max_ends, start)
+        # First segment starting at or after `end`
+        hi = bisect_left(self.starts, end, lo)
+        return [
+            {"index": i, "start": self.starts[i], "end": self.ends[i], "text": self.texts[i]}
+            for i in range(lo, hi)
+            if self.ends[i] > start
+        ]
+
+
+class TimelineCache:
+    """LRU of Timelines keyed by (video_id, language)."""
+
+    def __init__(self, size=SLICE_CACHE_SIZE, ttl=SLICE_CACHE_TTL_SEC):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, video_id, language, load):
+        """
+        Cached Timeline for the transcript, built from load() (segments, or
+        None when there is no transcript) on a miss. Returns None if load() does.
+        """
+        key = (video_id, language)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[0]
+        segments = load()
+        if segments is None:
+            return None
+        timeline = Timeline(segments)
+        with self._lock:
+            self._entries[key] = (timeline, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return timeline
+
+    def invalidate(self, video_id, language=None):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == video_id and language in (None, key[1])]:
+                del self._entries[key]
@@ -0,0 +1,303 @@
+"""
+Text translation engines for subtitles and summaries.
+
+Every engine implements translate_many(texts, source_language, target_language)
+and returns one string per input, in order. The module-level translate_many
+raises TranslationUnavailable when no engine could translate: callers never
+get the source text back in place of a translation.
+
+  google  Google Translate v2 (default), up to GOOGLE_TRANSLATE_BATCH texts per call
+  local   OPUS-MT Marian models converted to CTranslate2, on the CPU. Optional
+          dependencies: pip install ctranslate2 sentencepiece. One model per
+          language pair under LOCAL_MT_MODEL_DIR/<src>-<tgt>, e.g.
+            ct2-transformers-converter --model Helsinki-NLP/opus-mt-en-es \\
+                --output_dir $LOCAL_MT_MODEL_DIR/en-es --copy_files source.spm target.spm
+  fake    Deterministic "[tgt] text" output for tests and benchmarks
+
+TRANSLATION_ENGINE=google|local|fake|auto picks the engine. With "auto" the
+router prefers the free local engine when it has a model for the pair and
+its estimated latency for the batch fits the caller's budget, and falls back
+to Google otherwise. Latency estimates start from the defaults below and
+follow the observed per-call and per-text times.
+"""
+import os
+import time
+import logging
+import threading
+
+import deadlines
+import resilience
+import usage
+
+TRANSLATION_ENGINE = os.getenv("TRANSLATION_ENGINE", "google")
+
+# Google Translate v2 accepts at most 128 text segments per request
+GOOGLE_TRANSLATE_BATCH = int(os.getenv("GOOGLE_TRANSLATE_BATCH", "128"))
+
+LOCAL_MT_MODEL_DIR = os.getenv("LOCAL_MT_MODEL_DIR", "mt_models")
+LOCAL_MT_BATCH = int(os.getenv("LOCAL_MT_BATCH", "32"))
+LOCAL_MT_THREADS = int(os.getenv("LOCAL_MT_THREADS", os.cpu_count() or 1))
+
+FAKE_TRANSLATE_LATENCY = float(os.getenv("FAKE_TRANSLATE_LATENCY", "0"))
+
+# Weight of the newest observation in the latency estimates
+LATENCY_SMOOTHING = 0.2
+
+
+class TranslationUnavailable(Exception):
+    """No engine is available for a language pair, or every routed engine failed."""
+
+
+class TranslationEngine:
+    """Base class: batching and latency bookkeeping around _translate_batch."""
+
+    name = "base"
+    max_batch = 128
+    # Initial latency model: fixed cost per call plus cost per text
+    call_overhead_sec = 0.0
+    per_text_sec = 0.0
+
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+
+    def is_available(self):
+        return True
+
+    def supports(self, source_language, target_language):
+        return True
+
+    def estimate_latency(self, count):
+        """Expected seconds to translate `count` texts."""
+        calls = -(-count // self.max_batch)
+        return calls * self.call_overhead_sec + count * self.per_text_sec
+
+    def translate_many(self, texts, source_language, target_language):
+        translated = []
+        for start in range(0, len(texts), self.max_batch):
+            # Stop between batches once the request is cancelled
+            deadlines.current().check()
+            batch = texts[start:start + self.max_batch]
+            started = time.perf_counter()
+            translated.extend(self._translate_batch(batch, source_language, target_language))
+            self._observe(len(batch), time.perf_counter() - started)
+        return translated
+
+    def _translate_batch(self, texts, source_language, target_language):
+        raise NotImplementedError
+
+    def _observe(self, count, elapsed):
+        # Split the observed time between the fixed and per-text parts in the same
+        # proportion the current estimate predicts, then smooth
+        with self._stats_lock:
+            predicted = self.call_overhead_sec + count * self.per_text_sec
+            if predicted <= 0:
+                self.per_text_sec = elapsed / count
+                return
+            scale = elapsed / predicted
+            self.call_overhead_sec += LATENCY_SMOOTHING * (self.call_overhead_sec * scale - self.call_overhead_sec)
+            self.per_text_sec += LATENCY_SMOOTHING * (self.per_text_sec * scale - self.per_text_sec)
+
+
+class GoogleTranslationEngine(TranslationEngine):
+    """
+    Google Translate v2. server.py owns the credentials: it either assigns a
+    google.cloud.translate_v2 client to `client` or sets `client_factory`,
+    which is called on first use (it may return None without credentials).
+    """
+
+    name = "google"
+    max_batch = GOOGLE_TRANSLATE_BATCH
+    call_overhead_sec = 0.3
+    per_text_sec = 0.001
+
+    def __init__(self, client=None, client_factory=None):
+        super().__init__()
+        self.client_factory = client_factory
+        self._client_lock = threading.Lock()
+        self.client = client
+
+    @property
+    def client(self):
+        if self._client is None and self.client_factory is not None:
+            with self._client_lock:
+                if self._client is None and self.client_factory is not None:
+                    factory, self.client_factory = self.client_factory, None
+                    self.client = factory()
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+        if client is not None:
+            _bound_api_requests(client)
+
+    def is_available(self):
+        return self.client is not None
+
+    def _translate_batch(self, texts, source_language, target_language):
+        kwargs = {"target_language": target_language, "format_": "text"}
+        if source_language:
+            kwargs["source_language"] = source_language
+        with resilience.protected("google_translate", "translate"):
+            results = self.client.translate(texts, **kwargs)
+        usage.record(translate_calls=1, translate_characters=sum(len(text) for text in texts))
+        return [result["translatedText"] for result in results]
+
+
+def _bound_api_requests(client):
+    """
+    translate_v2.Client.translate() takes no timeout and its HTTP calls default
+    to 60 s; give each one the configured timeout, capped by the request deadline.
+    """
+    connection = getattr(client, "_connection", None)
+    if connection is None:
+        return
+    api_request = connection.api_request
+    if getattr(api_request, "bounded", False):
+        return
+
+    def bounded_api_request(*args, **kwargs):
+        kwargs.setdefault("timeout", deadlines.current().timeout(resilience.timeout("google_translate")))
+        return api_request(*args, **kwargs)
+
+    bounded_api_request.bounded = True
+    connection.api_request = bounded_api_request
+
+
+class LocalMarianEngine(TranslationEngine):
+    """
+    OPUS-MT Marian models on CTranslate2 (int8, CPU). Models are loaded on
+    first use per language pair and kept for the life of the process.
+    """
+
+    name = "local"
+    max_batch = LOCAL_MT_BATCH
+    call_overhead_sec = 0.05
+    per_text_sec = 0.02
+
+    def __init__(self, model_dir=LOCAL_MT_MODEL_DIR, threads=LOCAL_MT_THREADS):
+        super().__init__()
+        self.model_dir = model_dir
+        self.threads = threads
+        self._models = {}
+        self._models_lock = threading.Lock()
+
+    def is_available(self):
+        try:
+            import ctranslate2  # noqa: F401
+            import sentencepiece  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _pair_dir(self, source_language, target_language):
+        return os.path.join(self.model_dir, f"{source_language}-{target_language}")
+
+    def supports(self, source_language, target_language):
+        # Marian models are per pair, so the source language must be known
+        return bool(source_language) and os.path.isdir(self._pair_dir(source_language, target_language))
+
+    def _model(self, source_language, target_language):
+        pair = (source_language, target_language)
+        if pair not in self._models:
+            with self._models_lock:
+                if pair not in self._models:
+                    try:
+                        import ctranslate2
+                        import sentencepiece
+                    except ImportError:
+                        raise RuntimeError("Local translation engine requires ctranslate2 and sentencepiece")
+                    path = self._pair_dir(source_language, target_language)
+                    logging.info(f"Loading local translation model {path}")
+                    self._models[pair] = (
+                        ctranslate2.Translator(path, device="cpu", compute_type="int8", intra_threads=self.threads),
+                        sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "source.spm")),
+                        sentencepiece.SentencePieceProcessor(model_file=os.path.join(path, "target.spm")),
+                    )
+        return self._models[pair]
+
+    def _translate_batch(self, texts, source_language, target_language):
+        translator, source_sp, target_sp = self._model(source_language, target_language)
+        tokens = [source_sp.encode(text, out_type=str) + ["</s>"] for text in texts]
+        results = translator.translate_batch(tokens, max_batch_size=self.max_batch, beam_size=1)
+        return [target_sp.decode(result.hypotheses[0]) for result in results]
+
+
+class FakeTranslationEngine(TranslationEngine):
+    """Deterministic stand-in: prefixes each text with the target language."""
+
+    name = "fake"
+    max_batch = 128
+    call_overhead_sec = FAKE_TRANSLATE_LATENCY
+
+    def _translate_batch(self, texts, source_language, target_language):
+        if FAKE_TRANSLATE_LATENCY:
+            time.sleep(FAKE_TRANSLATE_LATENCY)
+        return [f"[{target_language}] {text}" for text in texts]
+
+
+ENGINES = {
+    GoogleTranslationEngine.name: GoogleTranslationEngine,
+    LocalMarianEngine.name: LocalMarianEngine,
+    FakeTranslationEngine.name: FakeTranslationEngine,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_engine(name):
+    """Return the shared instance of an engine by name."""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown translation engine '{name}'. Choose from: {', '.join(ENGINES)}")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = ENGINES[name]()
+        return _instances[name]
+
+
+def route(source_language, target_language, count, latency_budget=None, requested=None):
+    """
+    Return the engines to try for a batch, best first. An explicit engine (or
+    TRANSLATION_ENGINE other than "auto") is the only candidate. With "auto",
+    the local engine comes first when it has the pair and fits the latency
+    budget, since Google bills per character.
+    """
+    choice = requested or TRANSLATION_ENGINE
+    if choice != "auto":
+        engine = get_engine(choice)
+        return [engine] if engine.is_available() else []
+
+    google = get_engine("google")
+    local = get_engine("local")
+    candidates = []
+    if local.is_available() and local.supports(source_language, target_language):
+        if latency_budget is None or local.estimate_latency(count) <= latency_budget:
+            candidates.append(local)
+    if google.is_available():
+        candidates.append(google)
+    if local not in candidates and local.is_available() and local.supports(source_language, target_language):
+        # Over budget, but still better than no translation at all
+        candidates.append(local)
+    return candidates
+
+
+def translate_many(texts, source_language, target_language, latency_budget=None, engine=None):
+    """
+    Translate a list of texts, trying the routed engines in order. Raises
+    TranslationUnavailable if none is available or every one fails.
+    """
+    texts = list(texts)
+    if not texts or source_language == target_language:
+        return texts
+    candidates = route(source_language, target_language, len(texts), latency_budget, engine)
+    if not candidates:
+        raise TranslationUnavailable(f"No translation engine available for {source_language}->{target_language}")
+    errors = []
+    for candidate in candidates:
+        try:
+            return candidate.translate_many(texts, source_language, target_language)
+        except Exception as e:
+            logging.error(f"Translation with {candidate.name} failed ({source_language}->{target_language}): {e}")
+            errors.append(f"{candidate.name}: {e}")
+    raise TranslationUnavailable(f"Translation {source_language}->{target_language} failed ({'; '.join(errors)})")
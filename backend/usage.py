@@ -0,0 +1,149 @@
+"""
+Usage and cost accounting for the paid external APIs.
+
+Groq bills transcription per audio second and chat completions per token;
+Google Translate bills per character. Every call site records what it used
+with record(), which adds it to:
+  - the current request's Usage (bound with track(); the request's chunk and
+    translation threads copy the context, so they add to the same object),
+  - this worker's running totals (process_totals, for /admin/usage),
+  - dubmyyt_api_usage_total{quantity} in Prometheus.
+
+server.py binds a Usage per request, logs it when the request ends and adds
+it to the user's row of the day in api_usage_daily
+(migrations/004_api_usage.sql).
+
+Quantities:
+  asr_calls, asr_audio_seconds    Groq transcription requests and the audio they billed
+  llm_calls, llm_tokens_in/out    Groq chat completions and their prompt/completion tokens
+  translate_calls, translate_characters
+                                  Google Translate requests and characters sent
+  bytes_uploaded                  request bodies sent to Groq, retries included
+  retries                         Groq SDK retries (attempts after the first)
+  cache_hits, cached_audio_seconds
+                                  work served from checkpoints or stored
+                                  transcripts/summaries instead of the APIs
+
+Costs are estimates from list prices, configurable with GROQ_ASR_USD_PER_HOUR,
+GROQ_LLM_USD_PER_M_INPUT, GROQ_LLM_USD_PER_M_OUTPUT and
+GOOGLE_TRANSLATE_USD_PER_M_CHARS. saved_usd prices cached_audio_seconds at
+the transcription rate: what the caches saved on transcription.
+"""
+import os
+import threading
+import contextvars
+from contextlib import contextmanager
+
+import metrics
+
+FIELDS = (
+    "asr_calls", "asr_audio_seconds", "bytes_uploaded",
+    "llm_calls", "llm_tokens_in", "llm_tokens_out",
+    "translate_calls", "translate_characters",
+    "retries", "cache_hits", "cached_audio_seconds",
+)
+
+PRICES = {
+    "asr_audio_seconds": float(os.getenv("GROQ_ASR_USD_PER_HOUR", "0.111")) / 3600,
+    "llm_tokens_in": float(os.getenv("GROQ_LLM_USD_PER_M_INPUT", "0.59")) / 1e6,
+    "llm_tokens_out": float(os.getenv("GROQ_LLM_USD_PER_M_OUTPUT", "0.79")) / 1e6,
+    "translate_characters": float(os.getenv("GOOGLE_TRANSLATE_USD_PER_M_CHARS", "20")) / 1e6,
+}
+
+
+class Usage:
+    """Thread-safe counters of external API usage."""
+
+    def __init__(self, values=None):
+        self._values = dict.fromkeys(FIELDS, 0)
+        self._lock = threading.Lock()
+        if values:
+            self.add(**{field: values.get(field) or 0 for field in FIELDS})
+
+    def add(self, **amounts):
+        with self._lock:
+            for field, amount in amounts.items():
+                self._values[field] += amount
+
+    def snapshot(self):
+        with self._lock:
+            values = dict(self._values)
+        values["asr_audio_seconds"] = round(values["asr_audio_seconds"], 3)
+        values["cached_audio_seconds"] = round(values["cached_audio_seconds"], 3)
+        values["cost_usd"] = round(sum(values[field] * price for field, price in PRICES.items()), 6)
+        values["saved_usd"] = round(values["cached_audio_seconds"] * PRICES["asr_audio_seconds"], 6)
+        return values
+
+    def __bool__(self):
+        with self._lock:
+            return any(self._values.values())
+
+
+process_totals = Usage()
+_current = contextvars.ContextVar("usage", default=None)
+
+
+@contextmanager
+def track():
+    """Collect the usage recorded in this context (and contexts copied from it) into a new Usage."""
+    usage = Usage()
+    token = _current.set(usage)
+    try:
+        yield usage
+    finally:
+        _current.reset(token)
+
+
+def bind():
+    """Non-contextmanager form of track() for request hooks: returns (usage, token)."""
+    usage = Usage()
+    return usage, _current.set(usage)
+
+
+def unbind(token):
+    _current.reset(token)
+
+
+def current():
+    """The Usage of the running request, or None outside one."""
+    return _current.get()
+
+
+def record(**amounts):
+    """Add usage to the current request, the process totals and the metrics."""
+    amounts = {field: amount for field, amount in amounts.items() if amount}
+    if not amounts:
+        return
+    usage = _current.get()
+    if usage is not None:
+        usage.add(**amounts)
+    process_totals.add(**amounts)
+    for field, amount in amounts.items():
+        metrics.API_USAGE.labels(field).inc(amount)
+
+
+class _MeteredTransport:
+    """httpx transport wrapper that counts request bytes and SDK retries."""
+
+    def __init__(self, transport):
+        self._transport = transport
+
+    def handle_request(self, request):
+        # Stainless SDKs (groq) number their attempts in this header
+        retried = request.headers.get("x-stainless-retry-count", "0") not in ("", "0")
+        record(bytes_uploaded=int(request.headers.get("content-length") or 0), retries=int(retried))
+        return self._transport.handle_request(request)
+
+    def close(self):
+        self._transport.close()
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
+def instrument_groq(client):
+    """Meter the HTTP requests of a groq.Groq client (and of its with_options() copies)."""
+    http_client = client._client
+    if not isinstance(http_client._transport, _MeteredTransport):
+        http_client._transport = _MeteredTransport(http_client._transport)
+    return client
@@ -470,27 +470,34 @@ function DubMyYT() {
     downloadContent(content, filename, 'text/plain');
   };
 
-  const downloadExistingSubtitle = async (language) => {
+  // The download endpoints return the raw file; its name comes from Content-Disposition
+  const saveDownloadedFile = (response, fallbackName) => {
+    const disposition = response.headers['content-disposition'] || '';
+    const match = disposition.match(/filename="([^"]+)"/);
+    const url = window.URL.createObjectURL(response.data);
+    const a = document.createElement('a');
+    a.href = url;
+    a.download = match ? match[1] : fallbackName;
+    document.body.appendChild(a);
+    a.click();
+    window.URL.revokeObjectURL(url);
+    document.body.removeChild(a);
+  };
+
+  const downloadExistingSubtitle = async (language, format = 'srt') => {
     try {
       const response = await axios.get(
         `${API_BASE_URL}/download-subtitle/${selectedVideo}/${language}`,
         {
+          params: { format },
+          responseType: 'blob',
           headers: {
             "X-User-Id": userId
           }
         }
       );
       
-      const { content, filename } = response.data;
-      const blob = new Blob([content], { type: 'text/srt' });
-      const url = window.URL.createObjectURL(blob);
-      const a = document.createElement('a');
-      a.href = url;
-      a.download = filename;
-      document.body.appendChild(a);
-      a.click();
-      window.URL.revokeObjectURL(url);
-      document.body.removeChild(a);
+      saveDownloadedFile(response, `subtitles_${language}.${format}`);
     } catch (error) {
       showError('Failed to download subtitle');
       console.error(error);
@@ -502,22 +509,14 @@ function DubMyYT() {
       const response = await axios.get(
         `${API_BASE_URL}/download-summary/${selectedVideo}`,
         {
+          responseType: 'blob',
           headers: {
             "X-User-Id": userId
           }
         }
       );
       
-      const { content, filename } = response.data;
-      const blob = new Blob([content], { type: 'text/plain' });
-      const url = window.URL.createObjectURL(blob);
-      const a = document.createElement('a');
-      a.href = url;
-      a.download = filename;
-      document.body.appendChild(a);
-      a.click();
-      window.URL.revokeObjectURL(url);
-      document.body.removeChild(a);
+      saveDownloadedFile(response, 'summary.txt');
     } catch (error) {
       showError('Failed to download summary');
       console.error(error);
@@ -11,7 +11,7 @@ cd backend
 # Use Gunicorn for production (default on Render)
 if [[ -n "$PORT" ]]; then
     echo " Starting production server with Gunicorn on port $PORT..."
-    exec gunicorn --bind 0.0.0.0:$PORT --workers 2 --timeout 120 --access-logfile - --error-logfile - server:app
+    exec gunicorn -c gunicorn_config.py server:app
 else
     echo "Starting development server..."
     exec python server.py